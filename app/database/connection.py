@@ -2,6 +2,8 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.database.query_counter import install_query_counter
+
 # Baseは実際には使用されていないためインポートを削除
 
 # DB接続設定: 環境変数 or デフォルト値
@@ -9,6 +11,13 @@ DATABASE_URL = os.getenv(
     "DATABASE_URL", "postgresql://postgres:postgres@db:5432/instagram_analytics"
 )
 
+# 非同期DB設定: true の場合は asyncpg ベースの非同期エンジンと非同期ルーターを使用
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "False").lower() == "true"
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1),
+)
+
 # SQLAlchemyエンジン設定
 engine = create_engine(
     DATABASE_URL,
@@ -17,9 +26,32 @@ engine = create_engine(
     pool_recycle=3600,  # 1時間ごとに接続リサイクル
 )
 
+# リクエストごとのクエリ数を計測
+install_query_counter(engine)
+
 # DBセッションファクトリ
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 非同期エンジンとセッションファクトリ（USE_ASYNC_DB=true の場合のみ作成）
+async_engine = None
+AsyncSessionLocal = None
+if USE_ASYNC_DB:
+    # asyncpgは非同期モード使用時のみ必要なため、ここでインポート
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=bool(os.getenv("SQL_ECHO", "False").lower() == "true"),
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        pool_size=int(os.getenv("ASYNC_DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "20")),
+    )
+    install_query_counter(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
 
 # FastAPI依存性注入用DBセッション
 def get_db():
@@ -28,3 +60,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# FastAPI依存性注入用の非同期DBセッション
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
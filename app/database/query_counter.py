@@ -0,0 +1,92 @@
+"""
+リクエストごとのデータベースクエリ数の計測
+エンジンが実行したSQL文をリクエスト単位で数え、レスポンスヘッダー
+（X-DB-Query-Count）に出力して、キャッシュヒット時にクエリが発生していないかなどを
+確認できるようにする
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+# クエリ数をレスポンスヘッダーに出力するかどうか（開発・計測用のため明示的に有効にする）
+DB_QUERY_COUNT_HEADER = os.getenv("DB_QUERY_COUNT_HEADER", "False").lower() == "true"
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+
+
+class QueryCounter:
+    """実行したSQL文の数（同期エンドポイントはスレッドプールで実行されるため可変オブジェクトで共有する）"""
+
+    __slots__ = ("count",)
+
+    def __init__(self) -> None:
+        self.count = 0
+
+
+_current_counter: ContextVar[Optional[QueryCounter]] = ContextVar(
+    "db_query_counter", default=None
+)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """
+    ブロック内で実行されたSQL文を数える
+
+    Yields:
+        QueryCounter: クエリ数（count）
+    """
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """計測中であればクエリ数を加算"""
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+def install_query_counter(engine: Engine) -> None:
+    """
+    エンジンにクエリ数を計測するイベントリスナーを登録
+    非同期エンジンの場合は sync_engine を渡す
+
+    Args:
+        engine: SQLAlchemyエンジン
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+class QueryCountMiddleware:
+    """リクエストごとのクエリ数を X-DB-Query-Count ヘッダーに出力するASGIミドルウェア"""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as counter:
+
+            async def send_with_count(message):
+                # ヘッダー送信時点までのクエリ数を出力
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append(QUERY_COUNT_HEADER, str(counter.count))
+                await send(message)
+
+            await self.app(scope, receive, send_with_count)
@@ -1,5 +1,19 @@
 from app.database.repositories.influencer_post_repository import (
     InfluencerPostRepository,
 )
+from app.database.repositories.influencer_stats_repository import (
+    InfluencerStatsRepository,
+)
+from app.database.repositories.async_influencer_post_repository import (
+    AsyncInfluencerPostRepository,
+)
+from app.database.repositories.async_influencer_stats_repository import (
+    AsyncInfluencerStatsRepository,
+)
 
-__all__ = ["InfluencerPostRepository"]
+__all__ = [
+    "InfluencerPostRepository",
+    "InfluencerStatsRepository",
+    "AsyncInfluencerPostRepository",
+    "AsyncInfluencerStatsRepository",
+]
@@ -0,0 +1,80 @@
+"""
+インフルエンサー投稿データへの非同期アクセスを担当するリポジトリクラス
+AsyncSession（asyncpg）を使用する非同期ルーター向けに、読み取り系の操作を提供します
+"""
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.models.database_models import InfluencerPost, InfluencerPostNoun
+
+
+class AsyncInfluencerPostRepository:
+    """
+    インフルエンサー投稿データへの非同期アクセスを提供するリポジトリクラス
+    InfluencerPostRepository の読み取り系メソッドの非同期版
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        コンストラクタ
+
+        Args:
+            db: SQLAlchemy 非同期データベースセッション
+        """
+        self.db = db
+
+    async def get_latest_update_time(self, influencer_id: Optional[int] = None):
+        """
+        最新の更新日時を取得（キャッシュ制御用）
+
+        Args:
+            influencer_id: 特定のインフルエンサーIDに限定する場合
+
+        Returns:
+            datetime: 最新の更新日時、または投稿がない場合はNone
+        """
+        stmt = select(func.max(InfluencerPost.updated_at))
+
+        if influencer_id:
+            stmt = stmt.where(InfluencerPost.influencer_id == influencer_id)
+
+        return await self.db.scalar(stmt)
+
+    async def count_posts(self, influencer_id: int) -> int:
+        """
+        指定されたインフルエンサーIDの投稿数を取得
+
+        Args:
+            influencer_id: インフルエンサーID
+
+        Returns:
+            int: 投稿数
+        """
+        stmt = select(func.count(InfluencerPost.id)).where(
+            InfluencerPost.influencer_id == influencer_id
+        )
+        return await self.db.scalar(stmt) or 0
+
+    async def get_keyword_counts(self, influencer_id: int, limit: int = 10):
+        """
+        インポート時に保存した名詞出現回数を集計し、頻出順に取得
+
+        Args:
+            influencer_id: インフルエンサーID
+            limit: 取得する上位件数
+
+        Returns:
+            list: (word, count) の行リスト
+        """
+        total = func.sum(InfluencerPostNoun.count)
+        stmt = (
+            select(InfluencerPostNoun.word, total.label("count"))
+            .where(InfluencerPostNoun.influencer_id == influencer_id)
+            .group_by(InfluencerPostNoun.word)
+            .order_by(total.desc(), InfluencerPostNoun.word)
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return result.all()
@@ -0,0 +1,152 @@
+"""
+インフルエンサー集計値（ロールアップ）への非同期アクセスを担当するリポジトリクラス
+AsyncSession（asyncpg）を使用する非同期ルーター向けに、ランキングの読み出しを提供します
+"""
+
+from datetime import date
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Tuple
+
+from app.database.repositories.influencer_stats_repository import (
+    metrics_ranking_statement,
+    period_ranking_statement,
+    ranking_after,
+)
+from app.models.database_models import InfluencerDailyStats, InfluencerStats
+
+
+class AsyncInfluencerStatsRepository:
+    """
+    インフルエンサー集計値への非同期アクセスを提供するリポジトリクラス
+    InfluencerStatsRepository の読み取り系メソッドの非同期版
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        コンストラクタ
+
+        Args:
+            db: SQLAlchemy 非同期データベースセッション
+        """
+        self.db = db
+
+    async def get_latest_update_time(self):
+        """
+        集計テーブルの最終更新日時を取得（キャッシュ制御用）
+
+        Returns:
+            datetime: 最終更新日時、集計値がない場合はNone
+        """
+        return await self.db.scalar(select(func.max(InfluencerStats.updated_at)))
+
+    async def get_latest_daily_update_time(self):
+        """
+        日別集計値の最終更新日時を取得（期間指定ランキングのキャッシュ制御用）
+
+        Returns:
+            datetime: 最新の更新日時、集計値がない場合はNone
+        """
+        return await self.db.scalar(select(func.max(InfluencerDailyStats.updated_at)))
+
+    async def get_top_in_period(
+        self,
+        metric: str,
+        period: Tuple[date, date],
+        limit: int = 10,
+        after: Optional[Tuple[float, int]] = None,
+    ):
+        """
+        期間内の平均値の多い順にインフルエンサーをランキング
+
+        Args:
+            metric: likes または comments
+            period: 集計期間の (開始日, 終了日)（両端を含む）
+            limit: 取得する上位件数
+            after: 前のページの最後の行の (平均値, インフルエンサーID)（続きを取得する場合）
+
+        Returns:
+            list: インフルエンサーのランキングデータ
+        """
+        result = await self.db.execute(
+            period_ranking_statement(metric, period, limit, after)
+        )
+        return result.all()
+
+    async def get_ranking(
+        self,
+        metric: str,
+        comment_weight: float,
+        limit: int = 10,
+        after: Optional[Tuple[float, int]] = None,
+        period: Optional[Tuple[date, date]] = None,
+    ):
+        """
+        指定した指標の多い順にインフルエンサーをランキングし、全指標をまとめて取得
+
+        Args:
+            metric: ランキングの指標（likes / comments / engagement / median_likes / posts）
+            comment_weight: エンゲージメントでのコメント1件の重み
+            limit: 取得する上位件数
+            after: 前のページの最後の行の (指標の値, インフルエンサーID)（続きを取得する場合）
+            period: 集計期間の (開始日, 終了日)（Noneの場合は全期間）
+
+        Returns:
+            list: インフルエンサーごとの全指標とランキングの指標の値
+        """
+        result = await self.db.execute(
+            metrics_ranking_statement(metric, comment_weight, limit, after, period)
+        )
+        return result.all()
+
+    async def get_top_by_likes(
+        self, limit: int = 10, after: Optional[Tuple[float, int]] = None
+    ):
+        """
+        平均いいね数の多い順にインフルエンサーをランキング
+
+        Args:
+            limit: 取得する上位件数
+            after: 前のページの最後の行の (平均値, インフルエンサーID)（続きを取得する場合）
+
+        Returns:
+            list: インフルエンサーのランキングデータ
+        """
+        stmt = select(
+            InfluencerStats.influencer_id,
+            InfluencerStats.avg_likes,
+            InfluencerStats.post_count.label("total_posts"),
+        )
+        if after is not None:
+            stmt = stmt.where(ranking_after(InfluencerStats.avg_likes, after))
+        stmt = stmt.order_by(
+            InfluencerStats.avg_likes.desc(), InfluencerStats.influencer_id
+        ).limit(limit)
+        result = await self.db.execute(stmt)
+        return result.all()
+
+    async def get_top_by_comments(
+        self, limit: int = 10, after: Optional[Tuple[float, int]] = None
+    ):
+        """
+        平均コメント数の多い順にインフルエンサーをランキング
+
+        Args:
+            limit: 取得する上位件数
+            after: 前のページの最後の行の (平均値, インフルエンサーID)（続きを取得する場合）
+
+        Returns:
+            list: インフルエンサーのランキングデータ
+        """
+        stmt = select(
+            InfluencerStats.influencer_id,
+            InfluencerStats.avg_comments,
+            InfluencerStats.post_count.label("total_posts"),
+        )
+        if after is not None:
+            stmt = stmt.where(ranking_after(InfluencerStats.avg_comments, after))
+        stmt = stmt.order_by(
+            InfluencerStats.avg_comments.desc(), InfluencerStats.influencer_id
+        ).limit(limit)
+        result = await self.db.execute(stmt)
+        return result.all()
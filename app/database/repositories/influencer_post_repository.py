@@ -4,11 +4,16 @@
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Set
 
-from app.models.database_models import InfluencerPost
+from app.models.database_models import (
+    InfluencerPost,
+    InfluencerPostNoun,
+    InfluencerPostTag,
+)
 
 
 class InfluencerPostRepository:
@@ -178,3 +183,150 @@ class InfluencerPostRepository:
             query = query.filter(InfluencerPost.influencer_id == influencer_id)
 
         return query.scalar()
+
+    def count_posts(self, influencer_id: Optional[int] = None) -> int:
+        """
+        指定されたインフルエンサーIDの投稿数を取得
+
+        Args:
+            influencer_id: インフルエンサーID（Noneの場合は全投稿）
+
+        Returns:
+            int: 投稿数
+        """
+        query = self.db.query(func.count(InfluencerPost.id))
+        if influencer_id is not None:
+            query = query.filter(InfluencerPost.influencer_id == influencer_id)
+        return query.scalar() or 0
+
+    def get_keyword_counts(self, influencer_id: int, limit: int = 10):
+        """
+        インポート時に保存した名詞出現回数を集計し、頻出順に取得
+
+        Args:
+            influencer_id: インフルエンサーID
+            limit: 取得する上位件数
+
+        Returns:
+            list: (word, count) の行リスト
+        """
+        total = func.sum(InfluencerPostNoun.count)
+        return (
+            self.db.query(InfluencerPostNoun.word, total.label("count"))
+            .filter(InfluencerPostNoun.influencer_id == influencer_id)
+            .group_by(InfluencerPostNoun.word)
+            .order_by(total.desc(), InfluencerPostNoun.word)
+            .limit(limit)
+            .all()
+        )
+
+    def get_tag_counts(
+        self, tag_type: str, influencer_id: Optional[int] = None, limit: int = 10
+    ):
+        """
+        インポート時に保存したハッシュタグ・メンションの出現回数を集計し、頻出順に取得
+
+        Args:
+            tag_type: hashtag または mention
+            influencer_id: インフルエンサーID（Noneの場合は全インフルエンサー）
+            limit: 取得する上位件数
+
+        Returns:
+            list: (tag, count) の行リスト
+        """
+        total = func.sum(InfluencerPostTag.count)
+        query = self.db.query(InfluencerPostTag.tag, total.label("count")).filter(
+            InfluencerPostTag.tag_type == tag_type
+        )
+        if influencer_id is not None:
+            query = query.filter(InfluencerPostTag.influencer_id == influencer_id)
+        return (
+            query.group_by(InfluencerPostTag.tag)
+            .order_by(total.desc(), InfluencerPostTag.tag)
+            .limit(limit)
+            .all()
+        )
+
+    def get_texts_by_post_ids(self, post_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        指定された投稿IDの既存テキストを取得（インポート時の変更検出用）
+
+        Args:
+            post_ids: 投稿IDのリスト
+
+        Returns:
+            Dict[int, Optional[str]]: 既存の投稿ID → テキスト
+        """
+        if not post_ids:
+            return {}
+        return dict(
+            self.db.query(InfluencerPost.post_id, InfluencerPost.text)
+            .filter(InfluencerPost.post_id.in_(post_ids))
+            .all()
+        )
+
+    def upsert_posts(self, rows: List[Dict[str, Any]]) -> Set[int]:
+        """
+        投稿を post_id 単位で追加または更新（コミットは呼び出し元で行う）
+        既存の投稿は いいね数・コメント数・テキストのいずれかが変わった場合のみ更新し、
+        実際に変更があった行だけ updated_at を進める
+
+        Args:
+            rows: 投稿カラムの辞書のリスト（post_id は重複なし）
+
+        Returns:
+            Set[int]: 追加または更新された投稿ID
+        """
+        if not rows:
+            return set()
+
+        stmt = insert(InfluencerPost).values(rows)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[InfluencerPost.post_id],
+            set_={
+                "likes": excluded.likes,
+                "comments": excluded.comments,
+                "text": excluded.text,
+                "updated_at": func.now(),
+            },
+            where=or_(
+                InfluencerPost.likes.is_distinct_from(excluded.likes),
+                InfluencerPost.comments.is_distinct_from(excluded.comments),
+                InfluencerPost.text.is_distinct_from(excluded.text),
+            ),
+        ).returning(InfluencerPost.post_id)
+        return {post_id for (post_id,) in self.db.execute(stmt)}
+
+    def touch_latest_posts(self, influencer_ids: Optional[List[int]] = None) -> int:
+        """
+        インフルエンサーごとに最終更新日時が最も新しい投稿の updated_at を現在時刻に進める
+        （コミットは呼び出し元で行う）
+        並列書き込みでは開始の早いトランザクションが後からコミットされることがあり、
+        その投稿の updated_at ではデータバージョンが進まないため、全コミット後に呼び出して進める
+
+        Args:
+            influencer_ids: 対象のインフルエンサーIDのリスト（Noneの場合は全インフルエンサー）
+
+        Returns:
+            int: 更新した投稿数
+        """
+        latest = select(
+            InfluencerPost.influencer_id, func.max(InfluencerPost.updated_at)
+        ).group_by(InfluencerPost.influencer_id)
+        if influencer_ids is not None:
+            if not influencer_ids:
+                return 0
+            latest = latest.where(InfluencerPost.influencer_id.in_(influencer_ids))
+
+        stmt = (
+            update(InfluencerPost)
+            .where(
+                tuple_(InfluencerPost.influencer_id, InfluencerPost.updated_at).in_(
+                    latest
+                )
+            )
+            .values(updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        return self.db.execute(stmt).rowcount
@@ -0,0 +1,424 @@
+"""
+インフルエンサー集計値（ロールアップ）へのアクセスを担当するリポジトリクラス
+ランキングを投稿テーブルの全件集計ではなく、インデックス付きの集計テーブルから取得します
+期間指定のランキングは日別の集計テーブルを期間分だけ合計して求めます
+"""
+
+from datetime import date
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, Float, and_, cast, func, literal, select, exists, or_
+from sqlalchemy.dialects.postgresql import insert
+from typing import Iterable, Optional, Tuple
+
+from app.models.database_models import (
+    InfluencerDailyStats,
+    InfluencerPost,
+    InfluencerStats,
+)
+
+
+def ranking_after(
+    value_column, after: Tuple[float, int], id_column=InfluencerStats.influencer_id
+):
+    """
+    ランキングのキーセット条件（指定した位置より後の行）を作成
+    （平均値の降順 + ID順）のインデックスの範囲読み出しになるため、
+    何ページ目でもOFFSETのように先頭から読み飛ばす必要がない
+
+    Args:
+        value_column: ランキングの平均値のカラム（または集計式）
+        after: 前のページの最後の行の (平均値, インフルエンサーID)
+        id_column: インフルエンサーIDのカラム
+
+    Returns:
+        SQLAlchemyの条件式
+    """
+    value, influencer_id = after
+    # 先頭の条件でインデックスの開始位置を決め、同じ平均値の行はID順で続きから読む
+    return and_(
+        value_column <= value,
+        or_(value_column < value, id_column > influencer_id),
+    )
+
+
+# 指標別ランキングで指定できる指標
+RANKING_METRICS = ("likes", "comments", "engagement", "median_likes", "posts")
+
+
+def metrics_ranking_statement(
+    metric: str,
+    comment_weight: float,
+    limit: int = 10,
+    after: Optional[Tuple[float, int]] = None,
+    period: Optional[Tuple[date, date]] = None,
+):
+    """
+    指定した指標でランキングし、全指標をまとめて返すSELECT文を作成（同期・非同期のリポジトリで共用）
+    全期間は集計テーブルの1行、期間指定は日別集計値の1回の集計から全指標を求めるため、
+    指標ごとに投稿テーブルを集計し直す必要がない
+
+    Args:
+        metric: ランキングの指標（likes / comments / engagement / median_likes / posts）
+        comment_weight: エンゲージメントでのコメント1件の重み（いいね1件を1とする）
+        limit: 取得する上位件数
+        after: 前のページの最後の行の (指標の値, インフルエンサーID)（続きを取得する場合）
+        period: 集計期間の (開始日, 終了日)（Noneの場合は全期間）
+
+    Returns:
+        Select: influencer_id / avg_likes / avg_comments / median_likes / total_posts /
+        value（ランキングの指標の値）を返すSELECT文
+    """
+    if period is None:
+        id_column = InfluencerStats.influencer_id
+        avg_likes = InfluencerStats.avg_likes
+        avg_comments = InfluencerStats.avg_comments
+        # 中央値の導入前に作成された行（再計算前）はNULLのため最下位として扱う
+        median_likes = func.coalesce(InfluencerStats.median_likes, 0.0)
+        total_posts = InfluencerStats.post_count
+    else:
+        # 中央値は日別の合計から求められないため、期間指定では返さない
+        id_column = InfluencerDailyStats.influencer_id
+        total_posts = func.sum(InfluencerDailyStats.post_count)
+        avg_likes = cast(func.sum(InfluencerDailyStats.sum_likes), Float) / total_posts
+        avg_comments = (
+            cast(func.sum(InfluencerDailyStats.sum_comments), Float) / total_posts
+        )
+        median_likes = literal(None, Float)
+
+    values = {
+        "likes": avg_likes,
+        "comments": avg_comments,
+        "engagement": avg_likes + avg_comments * comment_weight,
+        "median_likes": median_likes,
+        "posts": total_posts,
+    }
+    value = values[metric]
+
+    stmt = select(
+        id_column.label("influencer_id"),
+        avg_likes.label("avg_likes"),
+        avg_comments.label("avg_comments"),
+        median_likes.label("median_likes"),
+        total_posts.label("total_posts"),
+        value.label("value"),
+    )
+    if period is None:
+        if after is not None:
+            stmt = stmt.where(ranking_after(value, after, id_column))
+    else:
+        stmt = stmt.where(InfluencerDailyStats.day.between(*period)).group_by(id_column)
+        if after is not None:
+            stmt = stmt.having(ranking_after(value, after, id_column))
+    return stmt.order_by(value.desc(), id_column).limit(limit)
+
+
+def period_ranking_statement(
+    metric: str,
+    period: Tuple[date, date],
+    limit: int = 10,
+    after: Optional[Tuple[float, int]] = None,
+):
+    """
+    期間内の平均値でランキングするSELECT文を作成（同期・非同期のリポジトリで共用）
+    インフルエンサーごとに期間の日数分の日別集計値を合計するだけで、投稿テーブルは読まない
+
+    Args:
+        metric: likes または comments
+        period: 集計期間の (開始日, 終了日)（両端を含む）
+        limit: 取得する上位件数
+        after: 前のページの最後の行の (平均値, インフルエンサーID)（続きを取得する場合）
+
+    Returns:
+        Select: 平均値を avg_likes / avg_comments、投稿数を total_posts とするSELECT文
+    """
+    sum_column = getattr(InfluencerDailyStats, f"sum_{metric}")
+    total_posts = func.sum(InfluencerDailyStats.post_count)
+    avg_value = cast(func.sum(sum_column), Float) / total_posts
+    since, until = period
+
+    stmt = (
+        select(
+            InfluencerDailyStats.influencer_id,
+            avg_value.label(f"avg_{metric}"),
+            total_posts.label("total_posts"),
+        )
+        .where(InfluencerDailyStats.day.between(since, until))
+        .group_by(InfluencerDailyStats.influencer_id)
+    )
+    if after is not None:
+        stmt = stmt.having(
+            ranking_after(avg_value, after, InfluencerDailyStats.influencer_id)
+        )
+    return stmt.order_by(avg_value.desc(), InfluencerDailyStats.influencer_id).limit(
+        limit
+    )
+
+
+class InfluencerStatsRepository:
+    """
+    インフルエンサー集計値へのアクセスを提供するリポジトリクラス
+    集計値の再計算（インポート時）とランキングの読み出しを提供
+    """
+
+    def __init__(self, db: Session):
+        """
+        コンストラクタ
+
+        Args:
+            db: SQLAlchemy データベースセッション
+        """
+        self.db = db
+
+    def refresh(self, influencer_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        投稿テーブルから集計値を再計算して保存（コミットは呼び出し元で行う）
+
+        Args:
+            influencer_ids: 再計算するインフルエンサーID（Noneの場合は全件）
+        """
+        if influencer_ids is not None:
+            influencer_ids = list(influencer_ids)
+            if not influencer_ids:
+                return
+
+        aggregate = select(
+            InfluencerPost.influencer_id,
+            func.sum(InfluencerPost.likes),
+            func.sum(InfluencerPost.comments),
+            func.count(InfluencerPost.id),
+            func.avg(InfluencerPost.likes),
+            func.avg(InfluencerPost.comments),
+            func.percentile_cont(0.5).within_group(InfluencerPost.likes),
+            func.max(InfluencerPost.post_date),
+            func.now(),
+        ).group_by(InfluencerPost.influencer_id)
+        if influencer_ids is not None:
+            aggregate = aggregate.where(
+                InfluencerPost.influencer_id.in_(influencer_ids)
+            )
+
+        columns = [
+            "influencer_id",
+            "sum_likes",
+            "sum_comments",
+            "post_count",
+            "avg_likes",
+            "avg_comments",
+            "median_likes",
+            "last_post_date",
+            "updated_at",
+        ]
+        stmt = insert(InfluencerStats).from_select(columns, aggregate)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[InfluencerStats.influencer_id],
+            set_={column: stmt.excluded[column] for column in columns[1:]},
+            # 集計値が変わらない場合は更新せず、updated_at（ランキングのETag）を維持する
+            where=or_(
+                *(
+                    getattr(InfluencerStats, column).is_distinct_from(
+                        stmt.excluded[column]
+                    )
+                    for column in [
+                        "sum_likes",
+                        "sum_comments",
+                        "post_count",
+                        "median_likes",
+                        "last_post_date",
+                    ]
+                )
+            ),
+        )
+        self.db.execute(stmt)
+
+        # 投稿がなくなったインフルエンサーの集計値を削除
+        orphaned = self.db.query(InfluencerStats).filter(
+            ~exists().where(
+                InfluencerPost.influencer_id == InfluencerStats.influencer_id
+            )
+        )
+        if influencer_ids is not None:
+            orphaned = orphaned.filter(
+                InfluencerStats.influencer_id.in_(influencer_ids)
+            )
+        orphaned.delete(synchronize_session=False)
+
+        self.refresh_daily(influencer_ids)
+
+    def refresh_daily(self, influencer_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        投稿テーブルから日別の集計値を再計算して保存（コミットは呼び出し元で行う）
+        集計値が変わらない日の行は更新せず、投稿がなくなった日の行は削除する
+
+        Args:
+            influencer_ids: 再計算するインフルエンサーID（Noneの場合は全件）
+        """
+        if influencer_ids is not None:
+            influencer_ids = list(influencer_ids)
+            if not influencer_ids:
+                return
+
+        day = cast(InfluencerPost.post_date, Date)
+        aggregate = select(
+            InfluencerPost.influencer_id,
+            day,
+            func.sum(InfluencerPost.likes),
+            func.sum(InfluencerPost.comments),
+            func.count(InfluencerPost.id),
+            func.now(),
+        ).group_by(InfluencerPost.influencer_id, day)
+        if influencer_ids is not None:
+            aggregate = aggregate.where(
+                InfluencerPost.influencer_id.in_(influencer_ids)
+            )
+
+        columns = [
+            "influencer_id",
+            "day",
+            "sum_likes",
+            "sum_comments",
+            "post_count",
+            "updated_at",
+        ]
+        stmt = insert(InfluencerDailyStats).from_select(columns, aggregate)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                InfluencerDailyStats.influencer_id,
+                InfluencerDailyStats.day,
+            ],
+            set_={column: stmt.excluded[column] for column in columns[2:]},
+            where=or_(
+                *(
+                    getattr(InfluencerDailyStats, column).is_distinct_from(
+                        stmt.excluded[column]
+                    )
+                    for column in ["sum_likes", "sum_comments", "post_count"]
+                )
+            ),
+        )
+        self.db.execute(stmt)
+
+        # 投稿がなくなった日の集計値を削除
+        orphaned = self.db.query(InfluencerDailyStats).filter(
+            ~exists().where(
+                InfluencerPost.influencer_id == InfluencerDailyStats.influencer_id,
+                cast(InfluencerPost.post_date, Date) == InfluencerDailyStats.day,
+            )
+        )
+        if influencer_ids is not None:
+            orphaned = orphaned.filter(
+                InfluencerDailyStats.influencer_id.in_(influencer_ids)
+            )
+        orphaned.delete(synchronize_session=False)
+
+    def get_latest_daily_update_time(self):
+        """
+        日別集計値の最終更新日時を取得（期間指定ランキングのキャッシュ制御用）
+
+        Returns:
+            datetime: 最新の更新日時、集計値がない場合はNone
+        """
+        return self.db.query(func.max(InfluencerDailyStats.updated_at)).scalar()
+
+    def get_top_in_period(
+        self,
+        metric: str,
+        period: Tuple[date, date],
+        limit: int = 10,
+        after: Optional[Tuple[float, int]] = None,
+    ):
+        """
+        期間内の平均値の多い順にインフルエンサーをランキング
+
+        Args:
+            metric: likes または comments
+            period: 集計期間の (開始日, 終了日)（両端を含む）
+            limit: 取得する上位件数
+            after: 前のページの最後の行の (平均値, インフルエンサーID)（続きを取得する場合）
+
+        Returns:
+            list: インフルエンサーのランキングデータ
+        """
+        return self.db.execute(
+            period_ranking_statement(metric, period, limit, after)
+        ).all()
+
+    def get_ranking(
+        self,
+        metric: str,
+        comment_weight: float,
+        limit: int = 10,
+        after: Optional[Tuple[float, int]] = None,
+        period: Optional[Tuple[date, date]] = None,
+    ):
+        """
+        指定した指標の多い順にインフルエンサーをランキングし、全指標をまとめて取得
+
+        Args:
+            metric: ランキングの指標（likes / comments / engagement / median_likes / posts）
+            comment_weight: エンゲージメントでのコメント1件の重み
+            limit: 取得する上位件数
+            after: 前のページの最後の行の (指標の値, インフルエンサーID)（続きを取得する場合）
+            period: 集計期間の (開始日, 終了日)（Noneの場合は全期間）
+
+        Returns:
+            list: インフルエンサーごとの全指標とランキングの指標の値
+        """
+        return self.db.execute(
+            metrics_ranking_statement(metric, comment_weight, limit, after, period)
+        ).all()
+
+    def get_top_by_likes(
+        self, limit: int = 10, after: Optional[Tuple[float, int]] = None
+    ):
+        """
+        平均いいね数の多い順にインフルエンサーをランキング
+
+        Args:
+            limit: 取得する上位件数
+            after: 前のページの最後の行の (平均値, インフルエンサーID)（続きを取得する場合）
+
+        Returns:
+            list: インフルエンサーのランキングデータ
+        """
+        query = self.db.query(
+            InfluencerStats.influencer_id,
+            InfluencerStats.avg_likes,
+            InfluencerStats.post_count.label("total_posts"),
+        )
+        if after is not None:
+            query = query.filter(ranking_after(InfluencerStats.avg_likes, after))
+        return (
+            query.order_by(
+                InfluencerStats.avg_likes.desc(), InfluencerStats.influencer_id
+            )
+            .limit(limit)
+            .all()
+        )
+
+    def get_top_by_comments(
+        self, limit: int = 10, after: Optional[Tuple[float, int]] = None
+    ):
+        """
+        平均コメント数の多い順にインフルエンサーをランキング
+
+        Args:
+            limit: 取得する上位件数
+            after: 前のページの最後の行の (平均値, インフルエンサーID)（続きを取得する場合）
+
+        Returns:
+            list: インフルエンサーのランキングデータ
+        """
+        query = self.db.query(
+            InfluencerStats.influencer_id,
+            InfluencerStats.avg_comments,
+            InfluencerStats.post_count.label("total_posts"),
+        )
+        if after is not None:
+            query = query.filter(ranking_after(InfluencerStats.avg_comments, after))
+        return (
+            query.order_by(
+                InfluencerStats.avg_comments.desc(), InfluencerStats.influencer_id
+            )
+            .limit(limit)
+            .all()
+        )
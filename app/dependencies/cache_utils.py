@@ -1,21 +1,267 @@
 """
 キャッシュ機能を提供するユーティリティモジュール
 API応答のパフォーマンスを向上させるためのシンプルなインメモリキャッシュを実装
+エントリ数と推定メモリ量に上限を設け、LRU/LFUで追い出しを行う
+キャッシュミス時の再計算はキーごとに1回に集約する（シングルフライト）
 """
 
+import asyncio
+import os
+import sys
+import threading
 import time
-from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# キャッシュ設定: 環境変数 or デフォルト値
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru").lower()
+CACHE_SWEEP_INTERVAL = float(os.getenv("CACHE_SWEEP_INTERVAL", "60"))
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    値のおおよそのメモリ使用量（バイト）を推定
+
+    Args:
+        value: 対象の値
+
+    Returns:
+        int: 推定バイト数
+    """
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+
+    if isinstance(value, dict):
+        size += sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+            for k, v in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    return size
+
+
+class _CacheEntry:
+    """キャッシュエントリ（新鮮期限・有効期限・値・推定サイズ・参照回数）"""
+
+    __slots__ = ("fresh_until", "expiry", "value", "size", "frequency")
+
+    def __init__(self, fresh_until: float, expiry: float, value: Any, size: int):
+        self.fresh_until = fresh_until
+        self.expiry = expiry
+        self.value = value
+        self.size = size
+        self.frequency = 1
+
+
+class _Call:
+    """実行中の計算（結果を待つ呼び出し元と共有する）"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    同じキーに対する同時実行中の計算を1回に集約するクラス
+    最初の呼び出し元だけが計算し、同時に来た呼び出し元はその結果を待って共有する
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """
+        指定したキーの計算が実行中かどうか
+
+        Args:
+            key: 計算のキー
+
+        Returns:
+            bool: 実行中ならTrue
+        """
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        キーごとに1回だけ計算を実行し、同時に来た呼び出し元と結果を共有
+
+        Args:
+            key: 計算のキー
+            fn: 計算を行う関数
+
+        Returns:
+            Any: 計算結果
+
+        Raises:
+            Exception: 計算中に発生した例外（待機していた呼び出し元にも伝播）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight の非同期版（イベントループをブロックせずに待機する）
+    同じキーに対する同時実行中のコルーチンを1回に集約する
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """
+        指定したキーの計算が実行中かどうか
+
+        Args:
+            key: 計算のキー
+
+        Returns:
+            bool: 実行中ならTrue
+        """
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        キーごとに1回だけコルーチンを実行し、同時に来た呼び出し元と結果を共有
+
+        Args:
+            key: 計算のキー
+            fn: 計算を行うコルーチン関数
+
+        Returns:
+            Any: 計算結果
+
+        Raises:
+            Exception: 計算中に発生した例外（待機していた呼び出し元にも伝播）
+        """
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            try:
+                # 待機側がキャンセルされても実行元の計算は中断しない
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 実行元がキャンセルされた場合（クライアントの切断など）は、
+                # 自身がキャンセルされていなければ新しい実行元として計算し直す
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 待機者がいない場合の "exception was never retrieved" 警告を抑止
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
 
 
 class SimpleCache:
     """
     シンプルなインメモリキャッシュクラス
     TTL（Time To Live）でキャッシュの有効期限を設定可能
+    エントリ数・推定バイト数の上限を超えるとLRUまたはLFUで追い出す
     """
 
-    def __init__(self):
-        """キャッシュを初期化"""
-        self._cache: Dict[str, Tuple[float, Any]] = {}
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        policy: str = CACHE_EVICTION_POLICY,
+        sweep_interval: float = CACHE_SWEEP_INTERVAL,
+    ):
+        """
+        キャッシュを初期化
+
+        Args:
+            max_entries: 最大エントリ数
+            max_bytes: 最大推定バイト数
+            policy: 追い出し方式（"lru" または "lfu"）
+            sweep_interval: 期限切れエントリを一括削除する間隔（秒）
+
+        Raises:
+            ValueError: policyが不正な場合
+        """
+        if policy not in EVICTION_POLICIES:
+            raise ValueError("policy must be 'lru' or 'lfu'")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.sweep_interval = sweep_interval
+
+        # 挿入・参照順を保持（LRUでは末尾が最新、LFUでは同一頻度内の順序に使用）
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        # LFU用: 参照回数ごとのキー集合（挿入順を保持）
+        self._frequencies: Dict[int, "OrderedDict[str, None]"] = {}
+        self._min_frequency = 0
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._next_sweep = time.time() + sweep_interval
+
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._evictions = 0
+        self._expirations = 0
+
+        # キャッシュミス時の再計算を集約
+        self._flights = SingleFlight()
+        self._async_flights = AsyncSingleFlight()
+
+    def _lookup(self, key: str, now: float) -> Optional[_CacheEntry]:
+        """有効期限内のエントリを取得（期限切れは削除）"""
+        self._maybe_sweep(now)
+
+        entry = self._cache.get(key)
+        if entry is not None and entry.expiry < now:
+            self._remove(key)
+            self._expirations += 1
+            return None
+        return entry
 
     def get(self, key: str) -> Optional[Any]:
         """
@@ -27,17 +273,128 @@ class SimpleCache:
         Returns:
             Any または None: キャッシュされた値（有効期限切れまたは存在しない場合はNone）
         """
-        if key not in self._cache:
-            return None
+        with self._lock:
+            now = time.time()
+            entry = self._lookup(key, now)
+            if entry is None or entry.fresh_until < now:
+                self._misses += 1
+                return None
 
-        timestamp, value = self._cache[key]
-        if timestamp < time.time():
-            self._cache.pop(key)
-            return None
+            self._touch(key, entry)
+            self._hits += 1
+            return entry.value
+
+    def _peek_fresh(self, key: str) -> Optional[Any]:
+        """統計を更新せずに新鮮な値を取得"""
+        with self._lock:
+            now = time.time()
+            entry = self._lookup(key, now)
+            if entry is None or entry.fresh_until < now:
+                return None
+            return entry.value
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """
+        新鮮期限を過ぎていても、有効期限内であれば値を取得
+
+        Args:
+            key: キャッシュのキー
+
+        Returns:
+            Any または None: キャッシュされた値（有効期限切れまたは存在しない場合はNone）
+        """
+        with self._lock:
+            entry = self._lookup(key, time.time())
+            if entry is None:
+                return None
+
+            self._touch(key, entry)
+            self._stale_hits += 1
+            return entry.value
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl_seconds: int = 300,
+        stale_seconds: int = 0,
+    ) -> Any:
+        """
+        キャッシュから値を取得し、ない場合は計算して保存
+        同じキーの同時ミスは1回の計算に集約され、他の呼び出し元は結果を共有する
+        stale_secondsを指定すると、期限切れ後もその間は古い値を返しつつ1回だけ再計算する
+
+        Args:
+            key: キャッシュのキー
+            compute: 値を計算する関数
+            ttl_seconds: 値が新鮮とみなされる期間（秒）
+            stale_seconds: 新鮮期限後に古い値を返してよい期間（秒）
+
+        Returns:
+            Any: キャッシュされた値または計算結果
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
 
-        return value
+        # 他の呼び出し元が再計算中であれば古い値をそのまま返す
+        if stale_seconds and self._flights.in_flight(key):
+            stale_value = self.get_stale(key)
+            if stale_value is not None:
+                return stale_value
 
-    def set(self, key: str, value: Any, ttl_seconds: int = 300) -> None:
+        def compute_and_store():
+            # 直前に他の呼び出し元が保存していればそれを使う
+            cached = self._peek_fresh(key)
+            if cached is not None:
+                return cached
+            result = compute()
+            self.set(key, result, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
+            return result
+
+        return self._flights.do(key, compute_and_store)
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl_seconds: int = 300,
+        stale_seconds: int = 0,
+    ) -> Any:
+        """
+        get_or_compute の非同期版（計算にコルーチン関数を受け取る）
+
+        Args:
+            key: キャッシュのキー
+            compute: 値を計算するコルーチン関数
+            ttl_seconds: 値が新鮮とみなされる期間（秒）
+            stale_seconds: 新鮮期限後に古い値を返してよい期間（秒）
+
+        Returns:
+            Any: キャッシュされた値または計算結果
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        if stale_seconds and self._async_flights.in_flight(key):
+            stale_value = self.get_stale(key)
+            if stale_value is not None:
+                return stale_value
+
+        async def compute_and_store():
+            cached = self._peek_fresh(key)
+            if cached is not None:
+                return cached
+            result = await compute()
+            self.set(key, result, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
+            return result
+
+        return await self._async_flights.do(key, compute_and_store)
+
+    def set(
+        self, key: str, value: Any, ttl_seconds: int = 300, stale_seconds: int = 0
+    ) -> None:
         """
         指定したキーで値をキャッシュに保存
 
@@ -45,9 +402,38 @@ class SimpleCache:
             key: キャッシュのキー
             value: キャッシュする値
             ttl_seconds: キャッシュの有効期間（秒）、デフォルトは300秒（5分）
+            stale_seconds: 有効期間後も get_stale で古い値を返せる期間（秒）
         """
-        expiry = time.time() + ttl_seconds
-        self._cache[key] = (expiry, value)
+        size = estimate_size(key) + estimate_size(value)
+
+        with self._lock:
+            now = time.time()
+            self._maybe_sweep(now)
+
+            # 上書き時は参照回数を引き継ぐ（更新のたびに追い出し候補にならないようにする）
+            frequency = 1
+            if key in self._cache:
+                frequency = self._cache[key].frequency
+                self._remove(key)
+
+            # 単体で上限を超える値はキャッシュしない
+            if size > self.max_bytes or self.max_entries <= 0:
+                return
+
+            fresh_until = now + ttl_seconds
+            entry = _CacheEntry(fresh_until, fresh_until + stale_seconds, value, size)
+            entry.frequency = frequency
+            self._cache[key] = entry
+            self._bytes += size
+            if self.policy == "lfu":
+                self._frequencies.setdefault(frequency, OrderedDict())[key] = None
+                if self._min_frequency in self._frequencies:
+                    self._min_frequency = min(self._min_frequency, frequency)
+                else:
+                    self._min_frequency = min(self._frequencies)
+
+            while len(self._cache) > self.max_entries or self._bytes > self.max_bytes:
+                self._evict_one(exclude=key)
 
     def invalidate(self, key: str) -> None:
         """
@@ -56,12 +442,107 @@ class SimpleCache:
         Args:
             key: 無効化するキャッシュのキー
         """
-        if key in self._cache:
-            self._cache.pop(key)
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
 
     def clear(self) -> None:
         """キャッシュをすべてクリア"""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._frequencies.clear()
+            self._min_frequency = 0
+            self._bytes = 0
+
+    def sweep(self) -> int:
+        """
+        期限切れのエントリを一括削除
+
+        Returns:
+            int: 削除したエントリ数
+        """
+        with self._lock:
+            now = time.time()
+            expired = [key for key, entry in self._cache.items() if entry.expiry < now]
+            for key in expired:
+                self._remove(key)
+            self._expirations += len(expired)
+            self._next_sweep = now + self.sweep_interval
+            return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの統計情報を取得（サイズ調整用）
+
+        Returns:
+            dict: ヒット数、ミス数、追い出し数などの統計情報
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "policy": self.policy,
+                "entries": len(self._cache),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale_hits": self._stale_hits,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _maybe_sweep(self, now: float) -> None:
+        """一定間隔ごとに期限切れエントリを削除（償却処理）"""
+        if now >= self._next_sweep:
+            self.sweep()
+
+    def _touch(self, key: str, entry: _CacheEntry) -> None:
+        """参照されたエントリの順序・頻度を更新"""
+        if self.policy == "lru":
+            self._cache.move_to_end(key)
+            return
+
+        frequency = entry.frequency
+        bucket = self._frequencies[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._frequencies[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = frequency + 1
+        entry.frequency = frequency + 1
+        self._frequencies.setdefault(entry.frequency, OrderedDict())[key] = None
+
+    def _remove(self, key: str) -> None:
+        """エントリを削除してメモリ使用量を更新"""
+        entry = self._cache.pop(key)
+        self._bytes -= entry.size
+        if self.policy == "lfu":
+            bucket = self._frequencies[entry.frequency]
+            del bucket[key]
+            if not bucket:
+                del self._frequencies[entry.frequency]
+
+    def _evict_one(self, exclude: str) -> None:
+        """追い出し方式に従って1エントリを削除"""
+        if self.policy == "lru":
+            victim = next(k for k in self._cache if k != exclude)
+        else:
+            if self._min_frequency not in self._frequencies:
+                self._min_frequency = min(self._frequencies)
+            victim = next(
+                (k for k in self._frequencies[self._min_frequency] if k != exclude),
+                None,
+            )
+            if victim is None:
+                # 最小頻度が挿入直後のキーのみの場合は次に少ない頻度から選ぶ
+                frequency = min(
+                    f for f in self._frequencies if f != self._min_frequency
+                )
+                victim = next(iter(self._frequencies[frequency]))
+        self._remove(victim)
+        self._evictions += 1
 
 
 def get_cache_key(prefix: str, **kwargs) -> str:
@@ -0,0 +1,296 @@
+"""
+ルーター共通のユーティリティ
+データバージョン（最終更新日時）に基づく条件付きGET（ETag / Last-Modified / 304）と、
+高速レスポンスモード（orjsonによるシリアライズ）、エンコード済みレスポンスのキャッシュを提供
+"""
+
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.dependencies.cache_utils import cache, get_cache_key
+
+# 高速レスポンスモード: true の場合、ランキング・分析APIはサービスが組み立てた値を
+# response_model で再検証せずにorjsonでシリアライズする
+FAST_JSON_RESPONSE = os.getenv("FAST_JSON_RESPONSE", "False").lower() == "true"
+if FAST_JSON_RESPONSE:
+    # orjsonは高速レスポンスモード使用時のみ必要なため、起動時に存在を確認
+    import orjson  # noqa: F401
+
+# レスポンスキャッシュ: true の場合、ランキング・分析APIのエンコード済みのボディを
+# ETag（ルート・パラメータ・データバージョンから生成）ごとにキャッシュする
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "True").lower() == "true"
+# レスポンスキャッシュの有効期間（秒）。キーにデータバージョンを含むため長めに設定可能
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+# gzip圧縮したボディも合わせてキャッシュする (true/false)
+RESPONSE_CACHE_GZIP = os.getenv("RESPONSE_CACHE_GZIP", "True").lower() == "true"
+# gzip圧縮するボディの最小バイト数（小さいボディは圧縮しても効果が小さい）
+RESPONSE_CACHE_GZIP_MIN_BYTES = int(os.getenv("RESPONSE_CACHE_GZIP_MIN_BYTES", "1024"))
+
+
+def build_etag(*parts: Any) -> str:
+    """
+    ルート・パラメータ・データバージョンからETagを生成
+
+    Args:
+        *parts: ETagに含める値
+
+    Returns:
+        str: 強いETag（ダブルクォート付き）
+    """
+    raw = "|".join(
+        part.isoformat() if isinstance(part, datetime) else str(part) for part in parts
+    )
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def _to_utc(value: datetime) -> datetime:
+    """タイムゾーンなしの日時はUTCとして扱い、秒未満を切り捨て"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def format_http_date(value: datetime) -> str:
+    """
+    日時をHTTP日付形式（Last-Modified用）に変換
+
+    Args:
+        value: 日時（タイムゾーンなしの場合はUTCとみなす）
+
+    Returns:
+        str: HTTP日付文字列
+    """
+    return format_datetime(_to_utc(value), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match ヘッダーがETagに一致するか（弱い比較）"""
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    クライアントのキャッシュが最新かどうかを判定
+    If-None-Match がある場合はそちらを優先し、なければ If-Modified-Since と比較
+
+    Args:
+        request: リクエスト
+        etag: 現在のETag
+        last_modified: 現在のデータの最終更新日時
+
+    Returns:
+        bool: 304 Not Modified を返してよい場合はTrue
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _to_utc(last_modified) <= _to_utc(since)
+
+    return False
+
+
+# ランキングの次ページのカーソルを返すレスポンスヘッダー
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def set_cache_headers(
+    response: Response, etag: str, last_modified: Optional[datetime] = None
+) -> None:
+    """
+    ETag / Last-Modified / Cache-Control ヘッダーを設定
+
+    Args:
+        response: レスポンス
+        etag: ETag
+        last_modified: データの最終更新日時
+    """
+    response.headers["ETag"] = etag
+    # ポーリングするクライアントには毎回再検証させる（304で応答）
+    response.headers["Cache-Control"] = "no-cache"
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_http_date(last_modified)
+
+
+def not_modified_response(
+    etag: str, last_modified: Optional[datetime] = None
+) -> Response:
+    """
+    304 Not Modified レスポンスを作成
+
+    Args:
+        etag: ETag
+        last_modified: データの最終更新日時
+
+    Returns:
+        Response: ボディなしの304レスポンス
+    """
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, last_modified)
+    return response
+
+
+def json_response(response: Response, content: Any) -> Any:
+    """
+    エンドポイントの戻り値を高速レスポンスモードに応じて返す
+    有効な場合は response_model による検証を省き、orjsonでシリアライズしたレスポンスを返す
+    （サービスが型変換済みの値から組み立てた辞書・リストにのみ使用する）
+    無効な場合は内容をそのまま返し、FastAPIが response_model で検証・シリアライズする
+
+    Args:
+        response: ヘッダー（ETag・カーソルなど）を設定済みのレスポンス
+        content: レスポンスの内容
+
+    Returns:
+        ORJSONResponse または content
+    """
+    if not FAST_JSON_RESPONSE:
+        return content
+    fast_response = ORJSONResponse(content)
+    # FastAPIが注入したレスポンスに設定したヘッダーを引き継ぐ
+    fast_response.raw_headers.extend(response.headers.raw)
+    return fast_response
+
+
+class CachedResponse(NamedTuple):
+    """キャッシュするレスポンス（エンコード済みのボディ・gzip圧縮したボディ・ヘッダー）"""
+
+    body: bytes
+    gzip_body: Optional[bytes]
+    headers: List[Tuple[bytes, bytes]]
+
+
+def _response_cache_key(etag: str) -> str:
+    """レスポンスキャッシュのキー（ETagはルート・パラメータ・データバージョンから生成される）"""
+    return get_cache_key("response", etag=etag)
+
+
+def _coding_quality(params: str) -> float:
+    """Accept-Encoding の各エントリのパラメータから品質値（q）を取得（不正な値は0）"""
+    for param in params.split(";"):
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value.strip())
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """
+    Accept-Encoding ヘッダーでgzipを受け付けているか
+    すべてのエントリを解析し、gzipの明示的な指定を * より優先する
+    （順序に関係なく gzip;q=0 は拒否）
+    """
+    qualities = {}
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        if name in ("gzip", "*"):
+            qualities.setdefault(name, _coding_quality(params))
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def _build_cached_response(request: Request, entry: CachedResponse) -> Response:
+    """キャッシュしたボディからレスポンスを作成（シリアライズは行わない）"""
+    if entry.gzip_body is not None and _accepts_gzip(request):
+        response = Response(entry.gzip_body, media_type="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(entry.body, media_type="application/json")
+    response.raw_headers.extend(entry.headers)
+    if entry.gzip_body is not None:
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def encode_response_body(request: Request, content: Any) -> bytes:
+    """
+    レスポンスの内容をエンドポイントの戻り値と同じJSONにエンコード
+    高速レスポンスモードではorjsonでそのまま、通常モードではルートの response_model で
+    検証してからエンコードする
+
+    Args:
+        request: リクエスト（マッチしたルートの response_model を参照する）
+        content: レスポンスの内容
+
+    Returns:
+        bytes: エンコード済みのボディ
+
+    Raises:
+        ResponseValidationError: 内容が response_model に一致しない場合
+    """
+    if FAST_JSON_RESPONSE:
+        return ORJSONResponse(content).body
+    field = request.scope["route"].response_field
+    value, errors = field.validate(content, {}, loc=("response",))
+    if errors:
+        raise ResponseValidationError(errors=errors, body=content)
+    return JSONResponse(field.serialize(value)).body
+
+
+def get_cached_response(request: Request, etag: str) -> Optional[Response]:
+    """
+    キャッシュ済みのレスポンスを取得
+    データベースへの問い合わせやシリアライズを行わずにエンコード済みのボディを返す
+
+    Args:
+        request: リクエスト
+        etag: 現在のETag
+
+    Returns:
+        Response: キャッシュ済みのレスポンス、ない場合（キャッシュ無効時を含む）はNone
+    """
+    if not RESPONSE_CACHE:
+        return None
+    entry = cache.get(_response_cache_key(etag))
+    if entry is None:
+        return None
+    return _build_cached_response(request, entry)
+
+
+def cache_response(
+    request: Request, response: Response, etag: str, content: Any
+) -> Any:
+    """
+    レスポンスの内容をエンコードしてETagごとにキャッシュし、レスポンスを返す
+    gzipが有効で一定以上の大きさのボディは、圧縮したボディも合わせてキャッシュする
+
+    Args:
+        request: リクエスト
+        response: ヘッダー（ETag・カーソルなど）を設定済みのレスポンス
+        etag: 現在のETag
+        content: レスポンスの内容
+
+    Returns:
+        Response: キャッシュしたボディのレスポンス（キャッシュ無効時は json_response の戻り値）
+    """
+    if not RESPONSE_CACHE:
+        return json_response(response, content)
+    body = encode_response_body(request, content)
+    gzip_body = None
+    if RESPONSE_CACHE_GZIP and len(body) >= RESPONSE_CACHE_GZIP_MIN_BYTES:
+        gzip_body = gzip.compress(body)
+    entry = CachedResponse(body, gzip_body, list(response.headers.raw))
+    cache.set(_response_cache_key(etag), entry, ttl_seconds=RESPONSE_CACHE_TTL)
+    return _build_cached_response(request, entry)
@@ -2,10 +2,14 @@ import os
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 
-from app.routers import influencer, analytics
+from app.routers import influencer, analytics, async_influencer, async_analytics
 from app.models import base
-from app.database.connection import engine
+from app.database.connection import engine, USE_ASYNC_DB
+from app.database.query_counter import DB_QUERY_COUNT_HEADER, QueryCountMiddleware
+from app.dependencies.cache_utils import cache
+from app.dependencies.utils import FAST_JSON_RESPONSE
 
 # ロガー設定
 logging.basicConfig(
@@ -24,6 +28,8 @@ app = FastAPI(
     title="Instagram Analytics API",
     description="Instagram influencer data analysis API",
     version="0.1.0",
+    # 高速レスポンスモードでは検証済みのレスポンスもorjsonでシリアライズする
+    default_response_class=ORJSONResponse if FAST_JSON_RESPONSE else JSONResponse,
 )
 
 # CORS設定
@@ -35,7 +41,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# リクエストごとのクエリ数をレスポンスヘッダーに出力
+if DB_QUERY_COUNT_HEADER:
+    app.add_middleware(QueryCountMiddleware)
+
 # ルーターの登録
+# 非同期DBが有効な場合は同じパスの非同期版を先に登録して優先させる
+if USE_ASYNC_DB:
+    app.include_router(
+        async_influencer.router, prefix="/api/v1/influencers", tags=["influencers"]
+    )
+    app.include_router(
+        async_analytics.router, prefix="/api/v1/analytics", tags=["analytics"]
+    )
 app.include_router(
     influencer.router, prefix="/api/v1/influencers", tags=["influencers"]
 )
@@ -45,3 +63,18 @@ app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytic
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Instagram Analytics API!"}
+
+
+@app.get("/ready")
+def read_readiness():
+    """
+    レディネスチェック
+    形態素解析はインポート時のみ行い、リクエストの処理では辞書を使わないため起動後は常にready
+    """
+    return {"status": "ready"}
+
+
+@app.get("/cache/stats")
+def read_cache_stats():
+    """インメモリキャッシュの統計情報（ヒット数・ミス数・追い出し数など）"""
+    return cache.stats()
@@ -1,4 +1,16 @@
-from sqlalchemy import Column, Integer, String, BigInteger, Text, DateTime, func
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    BigInteger,
+    Text,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    func,
+)
 from app.models.base import Base
 
 
@@ -6,6 +18,12 @@ class InfluencerPost(Base):
     """インフルエンサー投稿を表すSQLAlchemyモデル"""
 
     __tablename__ = "influencer_posts"
+    __table_args__ = (
+        # インフルエンサー単位の最終更新日時（データバージョン）をインデックスのみで取得
+        Index("idx_influencer_posts_influencer_updated", "influencer_id", "updated_at"),
+        # 全インフルエンサーの最終更新日時（全体のタグ集計のデータバージョン）をインデックスのみで取得
+        Index("idx_influencer_posts_updated", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     influencer_id = Column(Integer, nullable=False, index=True)
@@ -23,3 +41,124 @@ class InfluencerPost(Base):
 
     def __repr__(self):
         return f"<InfluencerPost(id={self.id}, influencer_id={self.influencer_id}, post_id={self.post_id})>"
+
+
+class InfluencerPostNoun(Base):
+    """投稿ごとの名詞出現回数を表すSQLAlchemyモデル（インポート時に形態素解析して保存）"""
+
+    __tablename__ = "influencer_post_nouns"
+    __table_args__ = (
+        Index("idx_influencer_post_nouns_influencer_word", "influencer_id", "word"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    post_id = Column(
+        BigInteger,
+        ForeignKey("influencer_posts.post_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    influencer_id = Column(Integer, nullable=False)
+    word = Column(Text, nullable=False)
+    count = Column(Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<InfluencerPostNoun(post_id={self.post_id}, word={self.word}, count={self.count})>"
+
+
+class InfluencerPostTag(Base):
+    """投稿ごとのハッシュタグ・メンション出現回数を表すSQLAlchemyモデル（インポート時に抽出して保存）"""
+
+    __tablename__ = "influencer_post_tags"
+    __table_args__ = (
+        Index(
+            "idx_influencer_post_tags_influencer_type_tag",
+            "influencer_id",
+            "tag_type",
+            "tag",
+        ),
+        Index("idx_influencer_post_tags_type_tag", "tag_type", "tag"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    post_id = Column(
+        BigInteger,
+        ForeignKey("influencer_posts.post_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    influencer_id = Column(Integer, nullable=False)
+    # hashtag または mention
+    tag_type = Column(String(10), nullable=False)
+    tag = Column(Text, nullable=False)
+    count = Column(Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<InfluencerPostTag(post_id={self.post_id}, tag_type={self.tag_type}, tag={self.tag})>"
+
+
+class InfluencerStats(Base):
+    """インフルエンサーごとの集計値（ランキング用のロールアップ、インポート時に更新）"""
+
+    __tablename__ = "influencer_stats"
+
+    influencer_id = Column(Integer, primary_key=True, autoincrement=False)
+    sum_likes = Column(BigInteger, nullable=False, default=0)
+    sum_comments = Column(BigInteger, nullable=False, default=0)
+    post_count = Column(Integer, nullable=False, default=0)
+    avg_likes = Column(Float, nullable=False, default=0)
+    avg_comments = Column(Float, nullable=False, default=0)
+    # いいね数の中央値（一部の投稿だけ極端に多いインフルエンサーの影響を抑えたランキング用）
+    median_likes = Column(Float)
+    last_post_date = Column(DateTime)
+    updated_at = Column(
+        DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self):
+        return f"<InfluencerStats(influencer_id={self.influencer_id}, post_count={self.post_count})>"
+
+
+# ランキング（平均値の降順 + ID順）をインデックス順に読み出すためのインデックス
+Index(
+    "idx_influencer_stats_avg_likes",
+    InfluencerStats.avg_likes.desc(),
+    InfluencerStats.influencer_id,
+)
+Index(
+    "idx_influencer_stats_avg_comments",
+    InfluencerStats.avg_comments.desc(),
+    InfluencerStats.influencer_id,
+)
+# ランキングのデータバージョン（集計値の最終更新日時）をインデックスのみで取得
+Index("idx_influencer_stats_updated", InfluencerStats.updated_at)
+
+
+class InfluencerDailyStats(Base):
+    """インフルエンサーごと・投稿日ごとの集計値（期間指定ランキング用のロールアップ、インポート時に更新）"""
+
+    __tablename__ = "influencer_daily_stats"
+    __table_args__ = (
+        # 期間内の日別集計値をテーブルを読まずにインデックスのみで合計する
+        Index(
+            "idx_influencer_daily_stats_day",
+            "day",
+            "influencer_id",
+            postgresql_include=["sum_likes", "sum_comments", "post_count"],
+        ),
+        # 期間指定ランキングのデータバージョン（日別集計値の最終更新日時）をインデックスのみで取得
+        Index("idx_influencer_daily_stats_updated", "updated_at"),
+    )
+
+    influencer_id = Column(Integer, primary_key=True, autoincrement=False)
+    # 投稿日（UTC）
+    day = Column(Date, primary_key=True)
+    sum_likes = Column(BigInteger, nullable=False, default=0)
+    sum_comments = Column(BigInteger, nullable=False, default=0)
+    post_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self):
+        return f"<InfluencerDailyStats(influencer_id={self.influencer_id}, day={self.day})>"
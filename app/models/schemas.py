@@ -32,6 +32,17 @@ class InfluencerPost(InfluencerPostBase):
 #     total_posts: int = Field(..., description="投稿数")
 
 
+# 指標別ランキングのスキーマ
+class InfluencerMetricsRanking(BaseModel):
+    influencer_id: int
+    value: float = Field(..., description="ランキングの指標の値")
+    total_posts: int = Field(..., description="投稿数")
+    avg_likes: float = Field(..., description="平均いいね数")
+    avg_comments: float = Field(..., description="平均コメント数")
+    engagement: float = Field(..., description="平均いいね数 + 平均コメント数 × 重み")
+    median_likes: Optional[float] = Field(None, description="いいね数の中央値（全期間のみ）")
+
+
 # ランキング用のスキーマ
 class InfluencerRanking(BaseModel):
     influencer_id: int
@@ -51,6 +62,19 @@ class KeywordAnalysisResponse(BaseModel):
     total_analyzed_posts: int = Field(..., description="分析対象となった投稿の総数")
 
 
+# ハッシュタグ・メンション出現回数のスキーマ
+class TagCount(BaseModel):
+    tag: str = Field(..., description="ハッシュタグまたはメンション（# / @ を除く）")
+    count: int = Field(..., description="出現回数")
+
+
+# ハッシュタグ・メンション分析レスポンスのスキーマ
+class TagAnalysisResponse(BaseModel):
+    tag_type: str = Field(..., description="タグの種別（hashtag または mention）")
+    tags: list[TagCount] = Field(..., description="タグ一覧と出現回数")
+    total_analyzed_posts: int = Field(..., description="分析対象となった投稿の総数")
+
+
 # 高エンゲージメントキーワード分析のスキーマ（仕様に沿わないAPIのスキーマのため除外）
 # class EngagementKeywordsResponse(BaseModel):
 #     keywords: list[KeywordCount] = Field(..., description="キーワード一覧と出現回数")
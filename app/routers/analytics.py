@@ -3,16 +3,24 @@
 テキスト分析機能を提供します
 """
 
-from fastapi import APIRouter, Depends, Query, Path, HTTPException
+from fastapi import APIRouter, Depends, Query, Path, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
 from app.database.connection import get_db
-from app.services import text_analysis_service
+from app.dependencies.utils import (
+    build_etag,
+    cache_response,
+    get_cached_response,
+    is_not_modified,
+    not_modified_response,
+    set_cache_headers,
+)
+from app.database.repositories import InfluencerPostRepository
+from app.services import tag_service, text_analysis_service
 from app.models.schemas import (
     KeywordAnalysisResponse,
+    TagAnalysisResponse,
 )
-from app.models.database_models import InfluencerPost
 
 # ルーター定義
 router = APIRouter()
@@ -24,6 +32,8 @@ router = APIRouter()
     summary="インフルエンサーの投稿で頻出する名詞を抽出",
 )
 def get_influencer_keywords(
+    request: Request,
+    response: Response,
     influencer_id: int = Path(..., description="インフルエンサーID", ge=1),
     limit: int = Query(20, description="取得するキーワード数", ge=1, le=100),
     db: Session = Depends(get_db),
@@ -35,30 +45,140 @@ def get_influencer_keywords(
     - **limit**: 返すキーワードの最大数（1〜100の範囲、デフォルト20）
 
     形態素解析を使用して日本語テキストを適切に分析し、名詞のみを抽出して頻度をカウントします。
+
+    ETag / Last-Modified に対応しており、データ未更新時は 304 を返します。
     """
     try:
-        # インフルエンサーのキーワード頻度を取得
-        keywords = text_analysis_service.get_influencer_keywords(
-            db, influencer_id, limit
+        # データバージョンから条件付きGETを判定（未更新なら集計せずに304を返す）
+        data_version = text_analysis_service.get_influencer_data_version(
+            db, influencer_id
         )
+        etag = build_etag("influencer_keywords", influencer_id, limit, data_version)
+        if is_not_modified(request, etag, data_version):
+            return not_modified_response(etag, data_version)
+        cached = get_cached_response(request, etag)
+        if cached is not None:
+            return cached
 
-        # 投稿数を取得
-        posts_count = (
-            db.query(func.count(InfluencerPost.id))
-            .filter(InfluencerPost.influencer_id == influencer_id)
-            .scalar()
-            or 0
+        # インフルエンサーのキーワード頻度と分析対象の投稿数を取得（キャッシュ済みなら問い合わせない）
+        analysis = text_analysis_service.get_influencer_keywords(
+            db, influencer_id, limit, data_version=data_version
         )
 
-        return KeywordAnalysisResponse(
-            keywords=keywords, total_analyzed_posts=posts_count
-        )
+        set_cache_headers(response, etag, data_version)
+        return cache_response(request, response, etag, analysis)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error analyzing keywords: {str(e)}"
         )
 
 
+@router.get(
+    "/tags",
+    response_model=TagAnalysisResponse,
+    summary="全インフルエンサーの投稿で頻出するハッシュタグ・メンションを取得",
+)
+def get_top_tags(
+    request: Request,
+    response: Response,
+    tag_type: str = Query(
+        "hashtag",
+        description="タグの種別（hashtag または mention）",
+        pattern="^(hashtag|mention)$",
+    ),
+    limit: int = Query(20, description="取得するタグ数", ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    全インフルエンサーの投稿から頻出するハッシュタグまたはメンションを取得します。
+
+    - **tag_type**: タグの種別（"hashtag" または "mention"、デフォルト "hashtag"）
+    - **limit**: 返すタグの最大数（1〜100の範囲、デフォルト20）
+
+    インポート時に正規表現で抽出・保存した出現回数を集計します（形態素解析は行いません）。
+
+    ETag / Last-Modified に対応しており、データ未更新時は 304 を返します。
+    """
+    try:
+        repository = InfluencerPostRepository(db)
+        data_version = repository.get_latest_update_time()
+        if data_version is None:
+            return TagAnalysisResponse(
+                tag_type=tag_type, tags=[], total_analyzed_posts=0
+            )
+
+        etag = build_etag("top_tags", tag_type, limit, data_version)
+        if is_not_modified(request, etag, data_version):
+            return not_modified_response(etag, data_version)
+        cached = get_cached_response(request, etag)
+        if cached is not None:
+            return cached
+
+        result = tag_service.get_top_tags(db, tag_type, data_version, limit=limit)
+
+        set_cache_headers(response, etag, data_version)
+        return cache_response(request, response, etag, {"tag_type": tag_type, **result})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing tags: {str(e)}")
+
+
+@router.get(
+    "/{influencer_id}/tags",
+    response_model=TagAnalysisResponse,
+    summary="インフルエンサーの投稿で頻出するハッシュタグ・メンションを取得",
+)
+def get_influencer_tags(
+    request: Request,
+    response: Response,
+    influencer_id: int = Path(..., description="インフルエンサーID", ge=1),
+    tag_type: str = Query(
+        "hashtag",
+        description="タグの種別（hashtag または mention）",
+        pattern="^(hashtag|mention)$",
+    ),
+    limit: int = Query(20, description="取得するタグ数", ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    指定されたインフルエンサーの投稿から頻出するハッシュタグまたはメンションを取得します。
+
+    - **influencer_id**: 分析対象のインフルエンサーID
+    - **tag_type**: タグの種別（"hashtag" または "mention"、デフォルト "hashtag"）
+    - **limit**: 返すタグの最大数（1〜100の範囲、デフォルト20）
+
+    インポート時に正規表現で抽出・保存した出現回数を集計します（形態素解析は行いません）。
+
+    ETag / Last-Modified に対応しており、データ未更新時は 304 を返します。
+    """
+    try:
+        data_version = text_analysis_service.get_influencer_data_version(
+            db, influencer_id
+        )
+        etag = build_etag(
+            "influencer_tags", influencer_id, tag_type, limit, data_version
+        )
+        if is_not_modified(request, etag, data_version):
+            return not_modified_response(etag, data_version)
+        cached = get_cached_response(request, etag)
+        if cached is not None:
+            return cached
+
+        result = tag_service.get_top_tags(
+            db, tag_type, data_version, influencer_id=influencer_id, limit=limit
+        )
+
+        set_cache_headers(response, etag, data_version)
+        return cache_response(request, response, etag, {"tag_type": tag_type, **result})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing tags: {str(e)}")
+
+
 # @router.get(
 #     "/trending-keywords",
 #     response_model=KeywordAnalysisResponse,
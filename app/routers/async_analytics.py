@@ -0,0 +1,67 @@
+"""
+インフルエンサーデータの分析APIエンドポイント（非同期DB版）
+USE_ASYNC_DB が有効な場合に同期版の代わりに登録されます
+"""
+
+from fastapi import APIRouter, Depends, Query, Path, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.connection import get_async_db
+from app.dependencies.utils import (
+    build_etag,
+    cache_response,
+    get_cached_response,
+    is_not_modified,
+    not_modified_response,
+    set_cache_headers,
+)
+from app.services import text_analysis_service
+from app.models.schemas import KeywordAnalysisResponse
+
+# ルーター定義
+router = APIRouter()
+
+
+@router.get(
+    "/{influencer_id}/keywords",
+    response_model=KeywordAnalysisResponse,
+    summary="インフルエンサーの投稿で頻出する名詞を抽出",
+)
+async def get_influencer_keywords(
+    request: Request,
+    response: Response,
+    influencer_id: int = Path(..., description="インフルエンサーID", ge=1),
+    limit: int = Query(20, description="取得するキーワード数", ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    指定されたインフルエンサーの投稿テキストから頻出する名詞を抽出します。
+
+    - **influencer_id**: 分析対象のインフルエンサーID
+    - **limit**: 返すキーワードの最大数（1〜100の範囲、デフォルト20）
+
+    ETag / Last-Modified に対応しており、データ未更新時は 304 を返します。
+    """
+    try:
+        data_version = await text_analysis_service.get_influencer_data_version_async(
+            db, influencer_id
+        )
+        etag = build_etag("influencer_keywords", influencer_id, limit, data_version)
+        if is_not_modified(request, etag, data_version):
+            return not_modified_response(etag, data_version)
+        cached = get_cached_response(request, etag)
+        if cached is not None:
+            return cached
+
+        analysis = await text_analysis_service.get_influencer_keywords_async(
+            db, influencer_id, limit, data_version=data_version
+        )
+
+        set_cache_headers(response, etag, data_version)
+        return cache_response(request, response, etag, analysis)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error analyzing keywords: {str(e)}"
+        )
@@ -2,12 +2,23 @@
 インフルエンサーデータのAPIエンドポイント
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from typing import List, Optional
 
 from app.database.connection import get_db
-from app.models.schemas import InfluencerRanking
+from app.dependencies.utils import (
+    NEXT_CURSOR_HEADER,
+    build_etag,
+    cache_response,
+    get_cached_response,
+    is_not_modified,
+    not_modified_response,
+    set_cache_headers,
+)
+from app.models.schemas import InfluencerMetricsRanking, InfluencerRanking
+
 # from app.models.schemas import InfluencerStats  # コメントアウトしたAPIで使用
 from app.services import influencer_service
 
@@ -43,20 +54,54 @@ router = APIRouter()
     summary="いいね数ランキング取得",
 )
 def get_likes_ranking(
+    request: Request,
+    response: Response,
     limit: int = Query(10, description="取得するランキング数", ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="前のページの X-Next-Cursor（続きを取得する場合）"),
+    window: Optional[str] = Query(
+        None, description="直近の集計期間（7d / 30d / 90d）", pattern="^(7d|30d|90d)$"
+    ),
+    since: Optional[date] = Query(None, description="集計開始日（YYYY-MM-DD）"),
+    until: Optional[date] = Query(None, description="集計終了日（YYYY-MM-DD）"),
     db: Session = Depends(get_db),
 ):
     """
     平均いいね数の多い順にインフルエンサーをランキングします。
 
     - **limit**: 取得するランキング数（最大100）
+    - **cursor**: 前のページのレスポンスヘッダー X-Next-Cursor の値（省略時は1位から）
+    - **window**: 直近の集計期間（7d / 30d / 90d、今日を含む）
+    - **since** / **until**: 集計期間の開始日・終了日（省略時は全期間）
+
+    期間を指定した場合は、期間内の投稿の平均値と投稿数でランキングします。
+
+    続きがある場合は X-Next-Cursor ヘッダーに次のページのカーソルを返します。
+    カーソルを順にたどることで、何ページ目でも同じ速さで全インフルエンサーを順位順に取得できます。
 
     戻り値:
     - **インフルエンサーID**: ランキング対象のインフルエンサーID
     - **平均値**: 平均いいね数
     - **投稿数**: 分析対象の投稿数
+
+    ETag / Last-Modified に対応しており、データ未更新時は 304 を返します。
     """
-    return influencer_service.get_top_influencers_by_likes(db, limit)
+    period = influencer_service.resolve_ranking_period(window, since, until)
+    data_version = influencer_service.get_ranking_data_version(db, period)
+    etag = build_etag("ranking_likes", limit, cursor, period, data_version)
+    if is_not_modified(request, etag, data_version):
+        return not_modified_response(etag, data_version)
+    cached = get_cached_response(request, etag)
+    if cached is not None:
+        return cached
+
+    rankings = influencer_service.get_top_influencers_by_likes(
+        db, limit, cursor, period
+    )
+    next_cursor = influencer_service.get_next_ranking_cursor(rankings, limit)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    set_cache_headers(response, etag, data_version)
+    return cache_response(request, response, etag, rankings)
 
 
 @router.get(
@@ -65,17 +110,123 @@ def get_likes_ranking(
     summary="コメント数ランキング取得",
 )
 def get_comments_ranking(
+    request: Request,
+    response: Response,
     limit: int = Query(10, description="取得するランキング数", ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="前のページの X-Next-Cursor（続きを取得する場合）"),
+    window: Optional[str] = Query(
+        None, description="直近の集計期間（7d / 30d / 90d）", pattern="^(7d|30d|90d)$"
+    ),
+    since: Optional[date] = Query(None, description="集計開始日（YYYY-MM-DD）"),
+    until: Optional[date] = Query(None, description="集計終了日（YYYY-MM-DD）"),
     db: Session = Depends(get_db),
 ):
     """
     平均コメント数の多い順にインフルエンサーをランキングします。
 
     - **limit**: 取得するランキング数（最大100）
+    - **cursor**: 前のページのレスポンスヘッダー X-Next-Cursor の値（省略時は1位から）
+    - **window**: 直近の集計期間（7d / 30d / 90d、今日を含む）
+    - **since** / **until**: 集計期間の開始日・終了日（省略時は全期間）
+
+    期間を指定した場合は、期間内の投稿の平均値と投稿数でランキングします。
+
+    続きがある場合は X-Next-Cursor ヘッダーに次のページのカーソルを返します。
+    カーソルを順にたどることで、何ページ目でも同じ速さで全インフルエンサーを順位順に取得できます。
 
     戻り値:
     - **インフルエンサーID**: ランキング対象のインフルエンサーID
     - **平均値**: 平均コメント数
     - **投稿数**: 分析対象の投稿数
+
+    ETag / Last-Modified に対応しており、データ未更新時は 304 を返します。
     """
-    return influencer_service.get_top_influencers_by_comments(db, limit)
+    period = influencer_service.resolve_ranking_period(window, since, until)
+    data_version = influencer_service.get_ranking_data_version(db, period)
+    etag = build_etag("ranking_comments", limit, cursor, period, data_version)
+    if is_not_modified(request, etag, data_version):
+        return not_modified_response(etag, data_version)
+    cached = get_cached_response(request, etag)
+    if cached is not None:
+        return cached
+
+    rankings = influencer_service.get_top_influencers_by_comments(
+        db, limit, cursor, period
+    )
+    next_cursor = influencer_service.get_next_ranking_cursor(rankings, limit)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    set_cache_headers(response, etag, data_version)
+    return cache_response(request, response, etag, rankings)
+
+
+@router.get(
+    "/ranking",
+    response_model=List[InfluencerMetricsRanking],
+    summary="指標別ランキング取得",
+)
+def get_metrics_ranking(
+    request: Request,
+    response: Response,
+    metric: str = Query(
+        "engagement",
+        description="ランキングの指標（likes / comments / engagement / median_likes / posts）",
+        pattern="^(likes|comments|engagement|median_likes|posts)$",
+    ),
+    limit: int = Query(10, description="取得するランキング数", ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="前のページの X-Next-Cursor（続きを取得する場合）"),
+    window: Optional[str] = Query(
+        None, description="直近の集計期間（7d / 30d / 90d）", pattern="^(7d|30d|90d)$"
+    ),
+    since: Optional[date] = Query(None, description="集計開始日（YYYY-MM-DD）"),
+    until: Optional[date] = Query(None, description="集計終了日（YYYY-MM-DD）"),
+    db: Session = Depends(get_db),
+):
+    """
+    指定した指標の多い順にインフルエンサーをランキングし、各インフルエンサーの全指標を返します。
+
+    - **metric**: ランキングの指標
+        - likes: 平均いいね数
+        - comments: 平均コメント数
+        - engagement: 平均いいね数 + 平均コメント数 × ENGAGEMENT_COMMENT_WEIGHT
+        - median_likes: いいね数の中央値（全期間のみ）
+        - posts: 投稿数
+    - **limit**: 取得するランキング数（最大100）
+    - **cursor**: 前のページのレスポンスヘッダー X-Next-Cursor の値（省略時は1位から）
+    - **window**: 直近の集計期間（7d / 30d / 90d、今日を含む）
+    - **since** / **until**: 集計期間の開始日・終了日（省略時は全期間）
+
+    全ての指標を1回のクエリで取得するため、複数の指標が必要な場合も1回の呼び出しで済みます。
+
+    戻り値:
+    - **インフルエンサーID**: ランキング対象のインフルエンサーID
+    - **値**: ランキングの指標の値
+    - **投稿数・平均いいね数・平均コメント数・エンゲージメント・いいね数の中央値**: 全指標
+
+    ETag / Last-Modified に対応しており、データ未更新時は 304 を返します。
+    """
+    period = influencer_service.resolve_ranking_period(window, since, until)
+    data_version = influencer_service.get_ranking_data_version(db, period)
+    etag = build_etag(
+        "ranking",
+        metric,
+        limit,
+        cursor,
+        period,
+        influencer_service.ENGAGEMENT_COMMENT_WEIGHT,
+        data_version,
+    )
+    if is_not_modified(request, etag, data_version):
+        return not_modified_response(etag, data_version)
+    cached = get_cached_response(request, etag)
+    if cached is not None:
+        return cached
+
+    rankings = influencer_service.get_influencer_ranking(
+        db, metric, limit, cursor, period
+    )
+    next_cursor = influencer_service.get_next_ranking_cursor(rankings, limit, "value")
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    set_cache_headers(response, etag, data_version)
+    return cache_response(request, response, etag, rankings)
@@ -2,11 +2,31 @@
 インフルエンサーデータの取得と分析を行うサービスレイヤー
 """
 
+import base64
+import binascii
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
 from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
-from app.models.database_models import InfluencerPost
+from app.database.repositories import (
+    AsyncInfluencerStatsRepository,
+    InfluencerStatsRepository,
+)
+from app.database.repositories.influencer_stats_repository import RANKING_METRICS
+
+from app.models.database_models import InfluencerPost, InfluencerStats
+
+# 期間指定ランキングの直近期間（window）ごとの日数
+RANKING_WINDOWS = {"7d": 7, "30d": 30, "90d": 90}
+
+# エンゲージメント（平均いいね数 + 平均コメント数 × 重み）でのコメント1件の重み
+ENGAGEMENT_COMMENT_WEIGHT = float(os.getenv("ENGAGEMENT_COMMENT_WEIGHT", "1.0"))
 
 
 def get_influencer_stats(db: Session, influencer_id: int):
@@ -48,28 +68,238 @@ def get_influencer_stats(db: Session, influencer_id: int):
     }
 
 
-def get_top_influencers_by_likes(db: Session, limit: int = 10):
+def resolve_ranking_period(
+    window: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    today: Optional[date] = None,
+) -> Optional[Tuple[date, date]]:
     """
-    平均いいね数の多い順にインフルエンサーをランキング
+    ランキングの集計期間を決定
+    投稿日時はUTCで保存されているため、直近期間もUTCの日付で数える
+
+    Args:
+        window: 直近期間（7d / 30d / 90d、今日を含む）
+        since: 集計開始日（省略時は最初の投稿から）
+        until: 集計終了日（省略時は今日まで）
+        today: 基準日（省略時はUTCの今日）
+
+    Returns:
+        tuple: 集計期間の (開始日, 終了日)（両端を含む）、全期間の場合はNone
+
+    Raises:
+        HTTPException: window と since / until を同時に指定した場合、または期間が不正な場合
+    """
+    if window is None and since is None and until is None:
+        return None
+    if today is None:
+        today = datetime.now(timezone.utc).date()
+
+    if window is not None:
+        if since is not None or until is not None:
+            raise HTTPException(
+                status_code=400,
+                detail="window cannot be combined with since / until",
+            )
+        if window not in RANKING_WINDOWS:
+            raise HTTPException(status_code=400, detail=f"Invalid window: {window}")
+        return today - timedelta(days=RANKING_WINDOWS[window] - 1), today
+
+    since = since or date.min
+    until = until or today
+    if since > until:
+        raise HTTPException(status_code=400, detail="since must not be after until")
+    return since, until
+
+
+def _latest(*versions: Optional[datetime]) -> Optional[datetime]:
+    """Noneを除いた最新の日時（全てNoneの場合はNone）"""
+    return max((version for version in versions if version is not None), default=None)
+
+
+def get_ranking_data_version(db: Session, period: Optional[Tuple[date, date]] = None):
+    """
+    ランキングのデータバージョン（集計テーブルの最終更新日時）を取得
+    条件付きGET（ETag / Last-Modified）に使用する
+    期間指定の場合は日別の集計テーブルの更新日時も含める
 
     Args:
         db: データベースセッション
-        limit: 取得する上位件数（デフォルト: 10）
+        period: 集計期間（Noneの場合は全期間）
 
     Returns:
-        list: インフルエンサーのランキングリスト
+        datetime: 最終更新日時、集計値がない場合はNone
     """
-    results = (
-        db.query(
-            InfluencerPost.influencer_id,
-            func.avg(InfluencerPost.likes).label("avg_likes"),
-            func.count(InfluencerPost.id).label("total_posts"),
+    version = db.query(func.max(InfluencerStats.updated_at)).scalar()
+    if period is None:
+        return version
+    # 投稿が削除された日の行は消えるだけなので、全期間の集計値の更新日時と合わせて判定する
+    return _latest(
+        version, InfluencerStatsRepository(db).get_latest_daily_update_time()
+    )
+
+
+def encode_ranking_cursor(avg_value: float, influencer_id: int) -> str:
+    """
+    ランキングの続きを取得するためのカーソルを作成
+    クライアントには中身を意識させない不透明な文字列として返す
+
+    Args:
+        avg_value: ページの最後の行の平均値
+        influencer_id: ページの最後の行のインフルエンサーID
+
+    Returns:
+        str: URLセーフなカーソル文字列
+    """
+    raw = json.dumps([avg_value, influencer_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_ranking_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    カーソルから (平均値, インフルエンサーID) を復元
+
+    Args:
+        cursor: encode_ranking_cursor で作成したカーソル
+
+    Returns:
+        tuple: (平均値, インフルエンサーID)
+
+    Raises:
+        HTTPException: カーソルの形式が不正な場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        avg_value, influencer_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(avg_value, bool) or not isinstance(avg_value, (int, float)):
+            raise ValueError(avg_value)
+        if isinstance(influencer_id, bool) or not isinstance(influencer_id, int):
+            raise ValueError(influencer_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return float(avg_value), influencer_id
+
+
+def get_next_ranking_cursor(
+    rankings: List[Dict], limit: int, value_key: str = "avg_value"
+) -> Optional[str]:
+    """
+    ランキングのページから次のページのカーソルを作成
+
+    Args:
+        rankings: 取得したランキングのリスト
+        limit: ページの件数
+        value_key: ランキングの指標の値を持つキー
+
+    Returns:
+        str: 次のページのカーソル、最後のページの場合はNone
+    """
+    if len(rankings) < limit:
+        return None
+    last = rankings[-1]
+    return encode_ranking_cursor(last[value_key], last["influencer_id"])
+
+
+def _check_ranking_metric(metric: str, period: Optional[Tuple[date, date]]):
+    """
+    指標別ランキングの指標と集計期間の組み合わせを検証
+
+    Raises:
+        HTTPException: 指標が不正な場合、または期間指定で中央値を指定した場合
+    """
+    if metric not in RANKING_METRICS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"metric must be one of: {', '.join(RANKING_METRICS)}",
         )
-        .group_by(InfluencerPost.influencer_id)
-        .order_by(func.avg(InfluencerPost.likes).desc())
-        .limit(limit)
-        .all()
+    if metric == "median_likes" and period is not None:
+        # 中央値は日別の合計から求められないため、全期間のみ対応
+        raise HTTPException(
+            status_code=400,
+            detail="median_likes cannot be combined with window, since or until",
+        )
+
+
+def _metrics_ranking_rows(results) -> List[Dict]:
+    """指標別ランキングの結果行をレスポンス用の辞書に変換"""
+    return [
+        {
+            "influencer_id": result.influencer_id,
+            "value": float(result.value),
+            "total_posts": result.total_posts,
+            "avg_likes": float(result.avg_likes),
+            "avg_comments": float(result.avg_comments),
+            "engagement": float(result.avg_likes)
+            + float(result.avg_comments) * ENGAGEMENT_COMMENT_WEIGHT,
+            "median_likes": (
+                None if result.median_likes is None else float(result.median_likes)
+            ),
+        }
+        for result in results
+    ]
+
+
+def get_influencer_ranking(
+    db: Session,
+    metric: str,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    period: Optional[Tuple[date, date]] = None,
+):
+    """
+    指定した指標の多い順にインフルエンサーをランキングし、全指標をまとめて返す
+    全期間は集計テーブル、期間指定は日別集計値から1回のクエリで全指標を取得する
+
+    Args:
+        db: データベースセッション
+        metric: ランキングの指標（likes / comments / engagement / median_likes / posts）
+        limit: 取得する上位件数（デフォルト: 10）
+        cursor: 前のページの次ページカーソル（省略時は先頭から）
+        period: 集計期間（Noneの場合は全期間）
+
+    Returns:
+        list: インフルエンサーのランキングリスト（ランキングの指標の値と全指標）
+
+    Raises:
+        HTTPException: 指標・カーソルが不正な場合、または期間指定で中央値を指定した場合
+    """
+    _check_ranking_metric(metric, period)
+    after = decode_ranking_cursor(cursor) if cursor else None
+    results = InfluencerStatsRepository(db).get_ranking(
+        metric, ENGAGEMENT_COMMENT_WEIGHT, limit, after, period
     )
+    return _metrics_ranking_rows(results)
+
+
+def get_top_influencers_by_likes(
+    db: Session,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    period: Optional[Tuple[date, date]] = None,
+):
+    """
+    平均いいね数の多い順にインフルエンサーをランキング
+
+    Args:
+        db: データベースセッション
+        limit: 取得する上位件数（デフォルト: 10）
+        cursor: 前のページの次ページカーソル（省略時は先頭から）
+        period: 集計期間（Noneの場合は全期間）
+
+    Returns:
+        list: インフルエンサーのランキングリスト（期間指定の場合は期間内の平均値と投稿数）
+
+    Raises:
+        HTTPException: カーソルの形式が不正な場合
+    """
+    after = decode_ranking_cursor(cursor) if cursor else None
+    repository = InfluencerStatsRepository(db)
+    if period is not None:
+        # 期間内の日別集計値を合計する
+        results = repository.get_top_in_period("likes", period, limit, after)
+    else:
+        # インポート時に更新される集計テーブルからインデックス順に取得
+        results = repository.get_top_by_likes(limit, after)
 
     return [
         {
@@ -81,28 +311,131 @@ def get_top_influencers_by_likes(db: Session, limit: int = 10):
     ]
 
 
-def get_top_influencers_by_comments(db: Session, limit: int = 10):
+def get_top_influencers_by_comments(
+    db: Session,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    period: Optional[Tuple[date, date]] = None,
+):
     """
     平均コメント数の多い順にインフルエンサーをランキング
 
     Args:
         db: データベースセッション
         limit: 取得する上位件数（デフォルト: 10）
+        cursor: 前のページの次ページカーソル（省略時は先頭から）
+        period: 集計期間（Noneの場合は全期間）
 
     Returns:
-        list: インフルエンサーのランキングリスト
+        list: インフルエンサーのランキングリスト（期間指定の場合は期間内の平均値と投稿数）
+
+    Raises:
+        HTTPException: カーソルの形式が不正な場合
     """
-    results = (
-        db.query(
-            InfluencerPost.influencer_id,
-            func.avg(InfluencerPost.comments).label("avg_comments"),
-            func.count(InfluencerPost.id).label("total_posts"),
-        )
-        .group_by(InfluencerPost.influencer_id)
-        .order_by(func.avg(InfluencerPost.comments).desc())
-        .limit(limit)
-        .all()
-    )
+    after = decode_ranking_cursor(cursor) if cursor else None
+    repository = InfluencerStatsRepository(db)
+    if period is not None:
+        # 期間内の日別集計値を合計する
+        results = repository.get_top_in_period("comments", period, limit, after)
+    else:
+        # インポート時に更新される集計テーブルからインデックス順に取得
+        results = repository.get_top_by_comments(limit, after)
+
+    return [
+        {
+            "influencer_id": result.influencer_id,
+            "avg_value": float(result.avg_comments),
+            "total_posts": result.total_posts,
+        }
+        for result in results
+    ]
+
+
+async def get_ranking_data_version_async(
+    db: AsyncSession, period: Optional[Tuple[date, date]] = None
+):
+    """
+    get_ranking_data_version の非同期版
+
+    Args:
+        db: 非同期データベースセッション
+        period: 集計期間（Noneの場合は全期間）
+
+    Returns:
+        datetime: 最終更新日時、集計値がない場合はNone
+    """
+    repository = AsyncInfluencerStatsRepository(db)
+    version = await repository.get_latest_update_time()
+    if period is None:
+        return version
+    return _latest(version, await repository.get_latest_daily_update_time())
+
+
+async def get_top_influencers_by_likes_async(
+    db: AsyncSession,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    period: Optional[Tuple[date, date]] = None,
+):
+    """
+    get_top_influencers_by_likes の非同期版
+
+    Args:
+        db: 非同期データベースセッション
+        limit: 取得する上位件数（デフォルト: 10）
+        cursor: 前のページの次ページカーソル（省略時は先頭から）
+        period: 集計期間（Noneの場合は全期間）
+
+    Returns:
+        list: インフルエンサーのランキングリスト（期間指定の場合は期間内の平均値と投稿数）
+
+    Raises:
+        HTTPException: カーソルの形式が不正な場合
+    """
+    after = decode_ranking_cursor(cursor) if cursor else None
+    repository = AsyncInfluencerStatsRepository(db)
+    if period is not None:
+        results = await repository.get_top_in_period("likes", period, limit, after)
+    else:
+        results = await repository.get_top_by_likes(limit, after)
+
+    return [
+        {
+            "influencer_id": result.influencer_id,
+            "avg_value": float(result.avg_likes),
+            "total_posts": result.total_posts,
+        }
+        for result in results
+    ]
+
+
+async def get_top_influencers_by_comments_async(
+    db: AsyncSession,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    period: Optional[Tuple[date, date]] = None,
+):
+    """
+    get_top_influencers_by_comments の非同期版
+
+    Args:
+        db: 非同期データベースセッション
+        limit: 取得する上位件数（デフォルト: 10）
+        cursor: 前のページの次ページカーソル（省略時は先頭から）
+        period: 集計期間（Noneの場合は全期間）
+
+    Returns:
+        list: インフルエンサーのランキングリスト（期間指定の場合は期間内の平均値と投稿数）
+
+    Raises:
+        HTTPException: カーソルの形式が不正な場合
+    """
+    after = decode_ranking_cursor(cursor) if cursor else None
+    repository = AsyncInfluencerStatsRepository(db)
+    if period is not None:
+        results = await repository.get_top_in_period("comments", period, limit, after)
+    else:
+        results = await repository.get_top_by_comments(limit, after)
 
     return [
         {
@@ -112,3 +445,34 @@ def get_top_influencers_by_comments(db: Session, limit: int = 10):
         }
         for result in results
     ]
+
+
+async def get_influencer_ranking_async(
+    db: AsyncSession,
+    metric: str,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    period: Optional[Tuple[date, date]] = None,
+):
+    """
+    get_influencer_ranking の非同期版
+
+    Args:
+        db: 非同期データベースセッション
+        metric: ランキングの指標（likes / comments / engagement / median_likes / posts）
+        limit: 取得する上位件数（デフォルト: 10）
+        cursor: 前のページの次ページカーソル（省略時は先頭から）
+        period: 集計期間（Noneの場合は全期間）
+
+    Returns:
+        list: インフルエンサーのランキングリスト（ランキングの指標の値と全指標）
+
+    Raises:
+        HTTPException: 指標・カーソルが不正な場合、または期間指定で中央値を指定した場合
+    """
+    _check_ranking_metric(metric, period)
+    after = decode_ranking_cursor(cursor) if cursor else None
+    results = await AsyncInfluencerStatsRepository(db).get_ranking(
+        metric, ENGAGEMENT_COMMENT_WEIGHT, limit, after, period
+    )
+    return _metrics_ranking_rows(results)
@@ -7,7 +7,10 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from typing import List, Dict, Any
 
-from app.database.repositories import InfluencerPostRepository
+from app.database.repositories import (
+    InfluencerPostRepository,
+    InfluencerStatsRepository,
+)
 
 
 def get_influencer_stats(db: Session, influencer_id: int) -> Dict[str, Any]:
@@ -56,8 +59,8 @@ def get_top_influencers_by_likes(db: Session, limit: int = 10) -> List[Dict[str,
     Returns:
         list: インフルエンサーのランキングリスト
     """
-    # リポジトリをインスタンス化
-    repository = InfluencerPostRepository(db)
+    # 集計テーブルのリポジトリをインスタンス化
+    repository = InfluencerStatsRepository(db)
 
     # いいね数の多い順にランキング取得
     results = repository.get_top_by_likes(limit)
@@ -85,8 +88,8 @@ def get_top_influencers_by_comments(
     Returns:
         list: インフルエンサーのランキングリスト
     """
-    # リポジトリをインスタンス化
-    repository = InfluencerPostRepository(db)
+    # 集計テーブルのリポジトリをインスタンス化
+    repository = InfluencerStatsRepository(db)
 
     # コメント数の多い順にランキング取得
     results = repository.get_top_by_comments(limit)
@@ -0,0 +1,190 @@
+"""
+ハッシュタグ・メンションの抽出と集計を提供するサービスレイヤー
+キャプション中の #ハッシュタグ と @メンション は形態素解析すると分割されてしまうため、
+正規表現で抽出してインポート時に投稿ごとの出現回数を保存し、
+取得時は保存済みの出現回数を集計するだけにする（形態素解析は使用しない）
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database.repositories import InfluencerPostRepository
+from app.dependencies.cache_utils import cache, get_cache_key
+from app.models.database_models import InfluencerPostTag
+from app.services.text_analysis_service import (
+    KEYWORD_CACHE_STALE_SECONDS,
+    KEYWORD_CACHE_TOP_N,
+    KEYWORD_CACHE_TTL,
+)
+
+# タグの種別
+TAG_TYPE_HASHTAG = "hashtag"
+TAG_TYPE_MENTION = "mention"
+TAG_TYPES = (TAG_TYPE_HASHTAG, TAG_TYPE_MENTION)
+
+# ハッシュタグの連なり（#カフェ#ラテ のように空白なしで続くものを含む）
+# 英数字・日本語・アンダースコアで構成され、URLのフラグメントや文字参照は除外
+_HASHTAG_RUN_PATTERN = re.compile(r"(?<![\w&/])((?:#\w+)+)")
+# メンション（Instagramのユーザー名の規則: 英数字・アンダースコア・ピリオド、最大30文字、
+# 先頭と末尾はピリオド以外。メールアドレスは除外）
+_MENTION_PATTERN = re.compile(
+    r"(?<![\w.@])@([A-Za-z0-9_](?:[A-Za-z0-9_.]{0,28}[A-Za-z0-9_])?)(?![\w@])"
+)
+
+
+def extract_tags(content: str) -> Dict[str, Counter]:
+    """
+    テキストからハッシュタグとメンションを抽出
+    全角の＃・＠や英数字はNFKC正規化で半角に揃え、大文字小文字は区別しない
+
+    Args:
+        content: 分析対象のテキスト
+
+    Returns:
+        Dict[str, Counter]: タグの種別ごとの出現回数（キーは # / @ を除いたタグ）
+    """
+    tags = {tag_type: Counter() for tag_type in TAG_TYPES}
+    if not content:
+        return tags
+
+    content = unicodedata.normalize("NFKC", content)
+    tags[TAG_TYPE_HASHTAG].update(
+        tag.lower()
+        for run in _HASHTAG_RUN_PATTERN.findall(content)
+        for tag in run[1:].split("#")
+        # 数字のみのタグ（#1 など）は番号として使われることが多いため除外
+        if not tag.isdigit()
+    )
+    tags[TAG_TYPE_MENTION].update(
+        user.lower() for user in _MENTION_PATTERN.findall(content)
+    )
+    return tags
+
+
+def build_post_tag_rows(posts: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    投稿からハッシュタグとメンションを抽出し、保存用の出現回数レコードを作成
+
+    Args:
+        posts: post_id, influencer_id, text を持つ投稿のイテラブル
+
+    Returns:
+        List[Dict]: influencer_post_tags に挿入するレコードのリスト
+    """
+    rows = []
+    for post in posts:
+        if not post.text:
+            continue
+        for tag_type, counts in extract_tags(post.text).items():
+            for tag, count in counts.items():
+                rows.append(
+                    {
+                        "post_id": post.post_id,
+                        "influencer_id": post.influencer_id,
+                        "tag_type": tag_type,
+                        "tag": tag,
+                        "count": count,
+                    }
+                )
+    return rows
+
+
+def store_post_tags(db: Session, posts: List[Any]) -> int:
+    """
+    投稿のハッシュタグ・メンション出現回数を保存（既存の同一投稿分は置き換え）
+    コミットは呼び出し元で行う
+
+    Args:
+        db: データベースセッション
+        posts: post_id, influencer_id, text を持つ投稿のリスト
+
+    Returns:
+        int: 保存したレコード数
+    """
+    if not posts:
+        return 0
+
+    post_ids = [post.post_id for post in posts]
+    db.query(InfluencerPostTag).filter(InfluencerPostTag.post_id.in_(post_ids)).delete(
+        synchronize_session=False
+    )
+
+    rows = build_post_tag_rows(posts)
+    if rows:
+        db.bulk_insert_mappings(InfluencerPostTag, rows)
+    return len(rows)
+
+
+def _tags_cache_key(
+    tag_type: str, influencer_id: Optional[int], top_n: int, data_version: datetime
+) -> str:
+    """タグ集計結果のキャッシュキーを作成（データが更新されるとキーが変わる）"""
+    return get_cache_key(
+        "top_tags",
+        tag_type=tag_type,
+        influencer_id=influencer_id,
+        top_n=top_n,
+        version=data_version.isoformat(),
+    )
+
+
+def _slice_tag_analysis(result: Dict, limit: int) -> Dict:
+    """キャッシュした集計結果からlimit件のタグを切り出す"""
+    return {
+        "tags": result["tags"][:limit],
+        "total_analyzed_posts": result["total_analyzed_posts"],
+    }
+
+
+def get_top_tags(
+    db: Session,
+    tag_type: str,
+    data_version: datetime,
+    influencer_id: Optional[int] = None,
+    limit: int = 10,
+) -> Dict:
+    """
+    頻出するハッシュタグまたはメンションを取得
+    インポート時に保存した出現回数を集計するだけで、テキストの解析は行わない
+    キーワードと同様に上位100件と分析対象の投稿数をlimitに依存せずまとめてキャッシュする
+
+    Args:
+        db: データベースセッション
+        tag_type: hashtag または mention
+        data_version: データバージョン（投稿の最終更新日時）
+        influencer_id: インフルエンサーID（Noneの場合は全インフルエンサー）
+        limit: 返すタグの最大数
+
+    Returns:
+        Dict: タグと出現回数のリスト（tags）と分析対象の投稿数（total_analyzed_posts）
+
+    Raises:
+        ValueError: タグの種別が不正な場合
+    """
+    if tag_type not in TAG_TYPES:
+        raise ValueError(f"タグの種別は {' / '.join(TAG_TYPES)} のいずれかを指定してください")
+
+    top_n = max(limit, KEYWORD_CACHE_TOP_N)
+    cache_key = _tags_cache_key(tag_type, influencer_id, top_n, data_version)
+
+    def compute():
+        # 保存済みの出現回数を集計し、投稿数も合わせて保存
+        repository = InfluencerPostRepository(db)
+        rows = repository.get_tag_counts(tag_type, influencer_id, top_n)
+        return {
+            "tags": [{"tag": row.tag, "count": int(row.count)} for row in rows],
+            "total_analyzed_posts": repository.count_posts(influencer_id),
+        }
+
+    result = cache.get_or_compute(
+        cache_key,
+        compute,
+        ttl_seconds=KEYWORD_CACHE_TTL,
+        stale_seconds=KEYWORD_CACHE_STALE_SECONDS,
+    )
+    return _slice_tag_analysis(result, limit)
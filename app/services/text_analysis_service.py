@@ -1,46 +1,157 @@
 """
 テキスト分析機能を提供するサービスレイヤー
 日本語の形態素解析、名詞抽出、キーワードカウントなどの機能を提供します
-パフォーマンス最適化（キャッシュ、並行処理）を実装
+形態素解析はインポート時に実行して投稿ごとの名詞出現回数を保存し、
+キーワード取得時は保存済みの出現回数を集計するだけにする
 """
 
+import logging
 import os
+import threading
+import time
+import unicodedata
 from app.dependencies.cache_utils import get_cache_key
 from janome.tokenizer import Tokenizer
-from collections import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Dict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
 from fastapi import HTTPException
 import re
-import concurrent.futures
 
-from app.models.database_models import InfluencerPost
+from app.database.repositories import (
+    AsyncInfluencerPostRepository,
+    InfluencerPostRepository,
+)
+from app.models.database_models import InfluencerPostNoun
 from app.dependencies.cache_utils import cache
+from app.services.tokenization_engine import get_engine
+
+# キーワード分析結果のキャッシュ有効期間（秒）
+# キーにデータバージョン（最終更新日時）を含めるため、データ更新時は自動的に別キーとなる
+KEYWORD_CACHE_TTL = int(os.getenv("KEYWORD_CACHE_TTL", "86400"))
+# キャッシュする上位キーワード数（APIのlimit上限）。任意のlimitはこの結果を切り出して返す
+KEYWORD_CACHE_TOP_N = 100
+# 有効期間後に再計算中の古い値を返してよい期間（秒）
+KEYWORD_CACHE_STALE_SECONDS = int(os.getenv("KEYWORD_CACHE_STALE_SECONDS", "300"))
+
+# 辞書をメモリマップで読み込む（複数ワーカー間でページを共有し、プロセスごとの複製を避ける）
+JANOME_MMAP = os.getenv("JANOME_MMAP", "True").lower() == "true"
+# ウォームアップで形態素解析するテキスト
+WARMUP_TEXT = "インスタグラムでフォロワーが増えるマーケティング施策を分析します"
+
+# 形態素解析の前に除去するURL
+_URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
+# 数字のみ・記号のみの名詞（除外対象）
+_NUMERIC_OR_SYMBOL_PATTERN = re.compile(r"^[0-9０-９]+$|^[!-/:-@[-`{-~]+$")
+# 名詞の品詞情報の接頭辞
+_NOUN_POS_PREFIX = "名詞,"
+
+# キーワードとして数えない名詞（敬称・形式名詞・代名詞など）
+DEFAULT_STOP_WORDS = (
+    "さん",
+    "ちゃん",
+    "くん",
+    "さま",
+    "みなさん",
+    "皆さん",
+    "皆様",
+    "みんな",
+    "こと",
+    "もの",
+    "よう",
+    "ため",
+    "ところ",
+    "とこ",
+    "これ",
+    "それ",
+    "あれ",
+    "どれ",
+    "ここ",
+    "そこ",
+    "どこ",
+    "みたい",
+    "感じ",
+    "本当",
+    "ほんと",
+    "今回",
+)
+
+
+def _load_stop_words() -> frozenset:
+    """
+    ストップワードを読み込む
+    NOUN_STOP_WORDS_FILE（1行1語、#以降はコメント）が指定されていればデフォルトの代わりに使用し、
+    NOUN_STOP_WORDS（カンマ区切り）の語を追加する
+
+    Returns:
+        frozenset: 正規化済みのストップワード
+    """
+    words = list(DEFAULT_STOP_WORDS)
+    stop_words_file = os.getenv("NOUN_STOP_WORDS_FILE")
+    if stop_words_file:
+        with open(stop_words_file, encoding="utf-8") as f:
+            words = [line.split("#", 1)[0].strip() for line in f]
+    words.extend(os.getenv("NOUN_STOP_WORDS", "").split(","))
+    return frozenset(
+        unicodedata.normalize("NFKC", word.strip()) for word in words if word.strip()
+    )
+
+
+# 名詞の出現回数を数える前に除外する語
+NOUN_STOP_WORDS = _load_stop_words()
+# 全角・半角などの表記揺れをNFKCで正規化して同じ語として数える
+NOUN_NORMALIZE = os.getenv("NOUN_NORMALIZE", "True").lower() == "true"
+# 表層形の代わりに基本形（base_form）で数える
+NOUN_LEMMATIZE = os.getenv("NOUN_LEMMATIZE", "False").lower() == "true"
+
+logger = logging.getLogger("app")
 
 # Janomeトークナイザーのシングルトンインスタンス（メモリ効率化のため）
 _tokenizer = None
+_tokenizer_lock = threading.Lock()
 
 
 def get_tokenizer():
     """
     Janomeトークナイザーのシングルトンインスタンスを取得
+    複数のスレッドから同時に呼ばれても辞書のロードは1回だけ行う
 
     Returns:
         Tokenizer: Janome形態素解析器のインスタンス
     """
     global _tokenizer
     if _tokenizer is None:
-        _tokenizer = Tokenizer()
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                _tokenizer = Tokenizer(mmap=JANOME_MMAP)
     return _tokenizer
 
 
-def extract_nouns(content: str) -> List[str]:
+def warm_up_tokenizer() -> float:
+    """
+    トークナイザーを構築し、サンプルテキストを形態素解析して辞書を読み込ませる
+    形態素解析プロセスプールのワーカー初期化時に使用し、最初のチャンクの処理を待たせない
+
+    Returns:
+        float: ウォームアップにかかった時間（秒）
+    """
+    started = time.perf_counter()
+    extract_nouns(WARMUP_TEXT)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Tokenizer warm-up finished in {elapsed:.2f}s (mmap={JANOME_MMAP})")
+    return elapsed
+
+
+def extract_nouns(content: str, use_base_form: bool = False) -> List[str]:
     """
     テキストから名詞を抽出する関数
+    トークンごとの処理は品詞の接頭辞比較・文字数・コンパイル済み正規表現の順に、
+    安い判定から1回ずつ行う
 
     Args:
         content: 分析対象のテキスト
+        use_base_form: 表層形の代わりに基本形を返すかどうか（基本形がない場合は表層形）
 
     Returns:
         List[str]: 抽出された名詞のリスト
@@ -48,106 +159,276 @@ def extract_nouns(content: str) -> List[str]:
     if not content:
         return []
 
-    # トークナイザーを取得
-    tokenizer = get_tokenizer()
-
-    # 前処理: 不要な文字を削除してトークン化負荷を軽減
-    # URLやハッシュタグ、メンション等を事前にフィルタリング
-    content = re.sub(r"https?://\S+|www\.\S+", "", content)
-
-    # テキストをトークン化し、名詞のみを取得（ジェネレータ式で効率化）
+    # 前処理: URLを削除してトークン化負荷を軽減
+    tokens = get_tokenizer().tokenize(_URL_PATTERN.sub("", content))
+    is_numeric_or_symbol = _NUMERIC_OR_SYMBOL_PATTERN.match
 
     nouns = [
-        token.surface
-        for token in tokenizer.tokenize(content)
-        if token.part_of_speech.split(",")[0] == "名詞"
-        and len(token.surface) > 1  # 1文字の名詞は除外
-        and not re.match(
-            r"^[0-9０-９]+$|^[!-/:-@[-`{-~]+$", token.surface
-        )  # 数字や記号のみの場合も除外
-        and not re.match(
-            r"^[0-9０-９]+$|^[!-/:-@[-`{-~]+$", token.surface
-        )  # 数字や記号のみの場合も除外
+        token
+        for token in tokens
+        # 品詞情報（例: "名詞,一般,*,*"）は分割せず接頭辞で判定
+        if token.part_of_speech.startswith(_NOUN_POS_PREFIX)
+        and len(surface := token.surface) > 1  # 1文字の名詞は除外
+        and not is_numeric_or_symbol(surface)  # 数字や記号のみの場合も除外
     ]
+    if use_base_form:
+        return [
+            token.surface if token.base_form == "*" else token.base_form
+            for token in nouns
+        ]
+    return [token.surface for token in nouns]
+
+
+def filter_nouns(
+    nouns: Iterable[str],
+    stop_words: frozenset = NOUN_STOP_WORDS,
+    normalize: bool = NOUN_NORMALIZE,
+) -> List[str]:
+    """
+    抽出した名詞を正規化し、ストップワードを除外する
+
+    Args:
+        nouns: extract_nouns で抽出した名詞
+        stop_words: 除外する語（正規化済み）
+        normalize: NFKC正規化（全角英数字の半角化・半角カナの全角化など）を行うかどうか
+
+    Returns:
+        List[str]: 残った名詞のリスト
+    """
+    if normalize:
+        nouns = (unicodedata.normalize("NFKC", noun) for noun in nouns)
+    return [noun for noun in nouns if noun not in stop_words]
+
 
-    return nouns
+def extract_keywords(content: str) -> List[str]:
+    """
+    出現回数を数える対象の名詞を抽出する（名詞抽出 → 正規化・ストップワード除外）
+
+    Args:
+        content: 分析対象のテキスト
+
+    Returns:
+        List[str]: キーワードとして数える名詞のリスト
+    """
+    return filter_nouns(extract_nouns(content, use_base_form=NOUN_LEMMATIZE))
+
+
+def build_post_noun_rows(posts: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    投稿から名詞を抽出し、保存用の出現回数レコードを作成
+    形態素解析は件数に応じてプロセスプールで並列実行される
+
+    Args:
+        posts: post_id, influencer_id, text を持つ投稿のイテラブル
+
+    Returns:
+        List[Dict]: influencer_post_nouns に挿入するレコードのリスト
+    """
+    posts_with_text = [post for post in posts if post.text]
+    noun_counts = get_engine().count_nouns_many([post.text for post in posts_with_text])
+
+    rows = []
+    for post, counts in zip(posts_with_text, noun_counts):
+        for word, count in counts.items():
+            rows.append(
+                {
+                    "post_id": post.post_id,
+                    "influencer_id": post.influencer_id,
+                    "word": word,
+                    "count": count,
+                }
+            )
+    return rows
+
+
+def store_post_nouns(db: Session, posts: List[Any]) -> int:
+    """
+    投稿の名詞出現回数を保存（既存の同一投稿分は置き換え）
+    コミットは呼び出し元で行う
+
+    Args:
+        db: データベースセッション
+        posts: post_id, influencer_id, text を持つ投稿のリスト
+
+    Returns:
+        int: 保存したレコード数
+    """
+    if not posts:
+        return 0
+
+    post_ids = [post.post_id for post in posts]
+    db.query(InfluencerPostNoun).filter(
+        InfluencerPostNoun.post_id.in_(post_ids)
+    ).delete(synchronize_session=False)
+
+    rows = build_post_noun_rows(posts)
+    if rows:
+        db.bulk_insert_mappings(InfluencerPostNoun, rows)
+    return len(rows)
+
+
+def _keywords_cache_key(influencer_id: int, top_n: int, data_version: datetime) -> str:
+    """キーワード分析結果のキャッシュキーを作成（データが更新されるとキーが変わる）"""
+    return get_cache_key(
+        "influencer_keywords",
+        influencer_id=influencer_id,
+        top_n=top_n,
+        version=data_version.isoformat(),
+    )
+
+
+def get_influencer_data_version(db: Session, influencer_id: int) -> datetime:
+    """
+    インフルエンサーのデータバージョン（投稿の最終更新日時）を取得
+    キャッシュキーと条件付きGET（ETag / Last-Modified）に使用する
+
+    Args:
+        db: データベースセッション
+        influencer_id: インフルエンサーID
+
+    Returns:
+        datetime: 最終更新日時
+
+    Raises:
+        HTTPException: インフルエンサーIDに該当する投稿が見つからない場合
+    """
+    data_version = InfluencerPostRepository(db).get_latest_update_time(influencer_id)
+    if data_version is None:
+        raise HTTPException(
+            status_code=404, detail=f"Influencer with ID {influencer_id} not found"
+        )
+    return data_version
+
+
+def _slice_keyword_analysis(result: Dict, limit: int) -> Dict:
+    """キャッシュした分析結果からlimit件のキーワードを切り出す"""
+    return {
+        "keywords": result["keywords"][:limit],
+        "total_analyzed_posts": result["total_analyzed_posts"],
+    }
 
 
 def get_influencer_keywords(
-    db: Session, influencer_id: int, limit: int = 10
-) -> List[Dict]:
+    db: Session,
+    influencer_id: int,
+    limit: int = 10,
+    data_version: Optional[datetime] = None,
+) -> Dict:
     """
     指定されたインフルエンサーの投稿から頻出キーワード（名詞）を抽出
-    結果をキャッシュして高速化（30分有効）
+    インポート時に保存した名詞出現回数を集計するだけで、形態素解析は行わない
+    上位100件と分析対象の投稿数をlimitに依存せずまとめてキャッシュして高速化
+    （同時ミスは1回の集計に集約、キャッシュヒット時はデータベースに問い合わせない）
+    キャッシュキーに最終更新日時を含めるため、データ更新後に古い結果を返すことはない
 
     Args:
         db: データベースセッション
         influencer_id: インフルエンサーID
         limit: 返すキーワードの最大数
+        data_version: 取得済みのデータバージョン（省略時はここで取得）
 
     Returns:
-        List[Dict]: キーワードと出現回数のリスト
+        Dict: キーワードと出現回数のリスト（keywords）と分析対象の投稿数（total_analyzed_posts）
 
     Raises:
         HTTPException: インフルエンサーIDに該当する投稿が見つからない場合
     """
-    # キャッシュキーを作成
-    cache_key = get_cache_key(
-        "influencer_keywords", influencer_id=influencer_id, limit=limit
+    # limitに依存しない上位N件をキャッシュし、limitごとに切り出す
+    top_n = max(limit, KEYWORD_CACHE_TOP_N)
+
+    # インフルエンサーの最終更新日時をデータバージョンとして使用（キャッシュ制御用）
+    if data_version is None:
+        data_version = get_influencer_data_version(db, influencer_id)
+
+    cache_key = _keywords_cache_key(influencer_id, top_n, data_version)
+
+    def compute():
+        # 保存済みの名詞出現回数を集計し、投稿数も合わせて保存
+        repository = InfluencerPostRepository(db)
+        rows = repository.get_keyword_counts(influencer_id, top_n)
+        return {
+            "keywords": [{"word": row.word, "count": int(row.count)} for row in rows],
+            "total_analyzed_posts": repository.count_posts(influencer_id),
+        }
+
+    # キャッシュ保存（デフォルト24時間）、同時ミスは1回の集計に集約し期限切れ直後は古い値を返す
+    result = cache.get_or_compute(
+        cache_key,
+        compute,
+        ttl_seconds=KEYWORD_CACHE_TTL,
+        stale_seconds=KEYWORD_CACHE_STALE_SECONDS,
     )
+    return _slice_keyword_analysis(result, limit)
 
-    # キャッシュをチェック
-    cached_result = cache.get(cache_key)
-    if cached_result:
-        return cached_result
 
-    # インフルエンサーの最新データを確認するためのクエリ（キャッシュ制御用）
-    _ = (
-        db.query(func.max(InfluencerPost.updated_at))
-        .filter(InfluencerPost.influencer_id == influencer_id)
-        .scalar()
-    )
+async def get_influencer_data_version_async(
+    db: AsyncSession, influencer_id: int
+) -> datetime:
+    """
+    get_influencer_data_version の非同期版
 
-    # インフルエンサーの投稿を取得
-    posts = (
-        db.query(InfluencerPost)
-        .filter(InfluencerPost.influencer_id == influencer_id)
-        .all()
-    )
+    Args:
+        db: 非同期データベースセッション
+        influencer_id: インフルエンサーID
 
-    if not posts:
+    Returns:
+        datetime: 最終更新日時
+
+    Raises:
+        HTTPException: インフルエンサーIDに該当する投稿が見つからない場合
+    """
+    repository = AsyncInfluencerPostRepository(db)
+    data_version = await repository.get_latest_update_time(influencer_id)
+    if data_version is None:
         raise HTTPException(
             status_code=404, detail=f"Influencer with ID {influencer_id} not found"
         )
+    return data_version
 
-    # 名詞抽出（並行処理）
-    all_nouns = []
 
-    def process_text(text):
-        if text:
-            return extract_nouns(text)
-        return []  # pragma: no cover
+async def get_influencer_keywords_async(
+    db: AsyncSession,
+    influencer_id: int,
+    limit: int = 10,
+    data_version: Optional[datetime] = None,
+) -> Dict:
+    """
+    get_influencer_keywords の非同期版（キャッシュは同期版と共有）
 
-    max_workers = min(max(os.cpu_count() or 4, 2), 10)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_text = {
-            executor.submit(process_text, post.text): post
-            for post in posts
-            if post.text
-        }
+    Args:
+        db: 非同期データベースセッション
+        influencer_id: インフルエンサーID
+        limit: 返すキーワードの最大数
+        data_version: 取得済みのデータバージョン（省略時はここで取得）
 
-        for future in concurrent.futures.as_completed(future_to_text):
-            all_nouns.extend(future.result())
+    Returns:
+        Dict: キーワードと出現回数のリスト（keywords）と分析対象の投稿数（total_analyzed_posts）
 
-    # カウント、ソート、整形
-    counter = Counter(all_nouns)
-    top_keywords = counter.most_common(limit)
-    result = [{"word": word, "count": count} for word, count in top_keywords]
+    Raises:
+        HTTPException: インフルエンサーIDに該当する投稿が見つからない場合
+    """
+    top_n = max(limit, KEYWORD_CACHE_TOP_N)
+
+    if data_version is None:
+        data_version = await get_influencer_data_version_async(db, influencer_id)
 
-    # キャッシュ保存（30分）
-    cache.set(cache_key, result, ttl_seconds=1800)
+    cache_key = _keywords_cache_key(influencer_id, top_n, data_version)
 
-    return result
+    async def compute():
+        repository = AsyncInfluencerPostRepository(db)
+        rows = await repository.get_keyword_counts(influencer_id, top_n)
+        return {
+            "keywords": [{"word": row.word, "count": int(row.count)} for row in rows],
+            "total_analyzed_posts": await repository.count_posts(influencer_id),
+        }
+
+    result = await cache.aget_or_compute(
+        cache_key,
+        compute,
+        ttl_seconds=KEYWORD_CACHE_TTL,
+        stale_seconds=KEYWORD_CACHE_STALE_SECONDS,
+    )
+    return _slice_keyword_analysis(result, limit)
 
 
 # def get_cache_key(prefix: str, **kwargs) -> str:
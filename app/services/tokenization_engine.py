@@ -0,0 +1,161 @@
+"""
+形態素解析をプロセスプールで並列実行するエンジン
+Janomeは純Pythonのためスレッドでは並列化できない（GIL）ので、
+常駐するワーカープロセスごとにトークナイザーを事前ロードしてチャンク単位で処理します
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger("app")
+
+# ワーカー数（デフォルトはCPUコア数）
+TOKENIZER_WORKERS = int(os.getenv("TOKENIZER_WORKERS", "0")) or (os.cpu_count() or 1)
+# この件数未満のテキストはプロセス間通信を避けて同一プロセスで処理
+TOKENIZER_PARALLEL_THRESHOLD = int(os.getenv("TOKENIZER_PARALLEL_THRESHOLD", "500"))
+# ワーカーに一度に送るテキスト数
+TOKENIZER_CHUNK_SIZE = int(os.getenv("TOKENIZER_CHUNK_SIZE", "200"))
+
+
+def _init_worker():
+    """ワーカープロセスの初期化時にトークナイザーを事前ロードし、辞書を読み込ませる"""
+    from app.services import text_analysis_service
+
+    text_analysis_service.warm_up_tokenizer()
+
+
+def _count_nouns_chunk(texts: Sequence[str]) -> List[Dict[str, int]]:
+    """
+    テキストのチャンクから名詞の出現回数を数える（正規化・ストップワード除外後、ワーカープロセスで実行）
+
+    Args:
+        texts: 分析対象のテキストのリスト
+
+    Returns:
+        List[Dict[str, int]]: テキストごとの名詞出現回数
+    """
+    from app.services import text_analysis_service
+
+    return [
+        dict(Counter(text_analysis_service.extract_keywords(text))) for text in texts
+    ]
+
+
+class TokenizationEngine:
+    """
+    名詞抽出を行う形態素解析エンジン
+    件数が閾値以上の場合のみ常駐プロセスプールに処理を分散する
+    複数スレッド（インポートの書き込みスレッド等）から同時に呼び出してもプールは1つだけ起動する
+    """
+
+    def __init__(
+        self,
+        max_workers: int = TOKENIZER_WORKERS,
+        parallel_threshold: int = TOKENIZER_PARALLEL_THRESHOLD,
+        chunk_size: int = TOKENIZER_CHUNK_SIZE,
+    ):
+        """
+        コンストラクタ
+
+        Args:
+            max_workers: ワーカープロセス数
+            parallel_threshold: プロセスプールを使用する最小テキスト数
+            chunk_size: ワーカーに一度に送るテキスト数
+        """
+        self.max_workers = max(max_workers, 1)
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = max(chunk_size, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # プロセスプールの起動・破棄を直列化するロック
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """プロセスプールを取得（初回のみ起動）"""
+        with self._lock:
+            if self._executor is None:
+                # スレッドを持つ親プロセス（uvicorn等）からのforkを避けるためspawnを使用
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """
+        異常終了したプロセスプールを破棄
+        他のスレッドがすでに作り直したプールは停止しない
+
+        Args:
+            executor: 異常終了したプロセスプール
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    def count_nouns_many(self, texts: Sequence[str]) -> List[Dict[str, int]]:
+        """
+        複数テキストの名詞出現回数を数える
+
+        Args:
+            texts: 分析対象のテキストのリスト
+
+        Returns:
+            List[Dict[str, int]]: 入力と同じ順序のテキストごとの名詞出現回数
+        """
+        if self.max_workers < 2 or len(texts) < self.parallel_threshold:
+            return _count_nouns_chunk(texts)
+
+        chunks = [
+            texts[i : i + self.chunk_size]
+            for i in range(0, len(texts), self.chunk_size)
+        ]
+        executor = self._get_executor()
+        try:
+            results = []
+            for chunk_result in executor.map(_count_nouns_chunk, chunks):
+                results.extend(chunk_result)
+            return results
+        except (BrokenProcessPool, CancelledError):
+            # ワーカーが異常終了した（またはプールが停止された）場合は次回プールを作り直し、
+            # 今回は同一プロセスで処理
+            logger.warning(
+                "Tokenizer process pool is broken, falling back to in-process"
+            )
+            self._discard_executor(executor)
+            return _count_nouns_chunk(texts)
+
+    def shutdown(self) -> None:
+        """プロセスプールを停止"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# エンジンのシングルトンインスタンス（プロセスプールを使い回すため）
+_engine: Optional[TokenizationEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> TokenizationEngine:
+    """
+    形態素解析エンジンのシングルトンインスタンスを取得
+
+    Returns:
+        TokenizationEngine: 形態素解析エンジン
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TokenizationEngine()
+            atexit.register(_engine.shutdown)
+        return _engine
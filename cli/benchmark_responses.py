@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+"""
+APIレスポンスの組み立て時間のベンチマーク
+ランキング・キーワード分析APIに limit=100 相当のデータを返させ、
+通常モード（response_model で検証して標準のJSONエンコーダでシリアライズ）、
+高速レスポンスモード（FAST_JSON_RESPONSE: 検証を省いてorjsonでシリアライズ）、
+レスポンスキャッシュ（RESPONSE_CACHE: エンコード済みのボディを返す）の
+1リクエストあたりの応答時間（p50 / p99）を比較するCLIツール
+クエリ数の計測（DB_QUERY_COUNT_HEADER）を有効にした状態で計測します
+データベースの時間を含めないよう、サービスは生成したデータを返す関数に差し替え、
+ネットワークを介さずにASGIアプリケーションを直接呼び出して計測します
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from unittest import mock
+
+# ルートディレクトリをPython pathに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# 注意: このインポートはsys.pathの設定後に行う必要があるため、E402警告を無視します
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from app.database.connection import get_db  # noqa: E402
+from app.database.query_counter import QueryCountMiddleware  # noqa: E402
+from app.dependencies import utils  # noqa: E402
+from app.routers import analytics, influencer  # noqa: E402
+
+# ロギング設定
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+# リクエストごとのログを出力しない
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+DATA_VERSION = datetime(2024, 1, 1, 12, 0, 0)
+
+# 計測するモードごとの (FAST_JSON_RESPONSE, RESPONSE_CACHE)
+MODES = {
+    "standard": (False, False),
+    "fast": (True, False),
+    "cached": (False, True),
+}
+
+# 計測するエンドポイント
+ENDPOINTS = {
+    "ranking_likes": "/api/v1/influencers/ranking/likes?limit={limit}",
+    "ranking": "/api/v1/influencers/ranking?limit={limit}",
+    "keywords": "/api/v1/analytics/1/keywords?limit={limit}",
+}
+
+
+def parse_args():
+    """コマンドライン引数のパース"""
+    parser = argparse.ArgumentParser(description="APIレスポンスの組み立て時間のベンチマーク")
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="モード・エンドポイントごとのリクエスト数"
+    )
+    parser.add_argument("--limit", type=int, default=100, help="1レスポンスあたりの件数")
+    return parser.parse_args()
+
+
+def build_data(limit, seed=0):
+    """
+    ランキング・キーワードのサービスが返すデータを生成
+
+    Args:
+        limit: 件数
+        seed: 乱数のシード
+
+    Returns:
+        dict: サービス関数名ごとの戻り値
+    """
+    rng = random.Random(seed)
+    rankings = [
+        {
+            "influencer_id": i,
+            "avg_value": rng.uniform(10, 100000),
+            "total_posts": rng.randint(1, 500),
+        }
+        for i in range(1, limit + 1)
+    ]
+    metrics = []
+    for i in range(1, limit + 1):
+        avg_likes, avg_comments = rng.uniform(10, 100000), rng.uniform(0, 3000)
+        metrics.append(
+            {
+                "influencer_id": i,
+                "value": avg_likes + avg_comments,
+                "total_posts": rng.randint(1, 500),
+                "avg_likes": avg_likes,
+                "avg_comments": avg_comments,
+                "engagement": avg_likes + avg_comments,
+                "median_likes": rng.uniform(10, 100000),
+            }
+        )
+    keywords = {
+        "keywords": [
+            {"word": f"キーワード{i}", "count": rng.randint(1, 1000)} for i in range(limit)
+        ],
+        "total_analyzed_posts": limit,
+    }
+    return {"rankings": rankings, "metrics": metrics, "keywords": keywords}
+
+
+def build_app(data):
+    """
+    サービスを生成したデータを返す関数に差し替えた計測用のアプリケーションを作成
+
+    Args:
+        data: build_data で生成したデータ
+
+    Returns:
+        tuple: (FastAPI, サービスの差し替えを含むコンテキストマネージャのリスト)
+    """
+    app = FastAPI()
+    app.include_router(influencer.router, prefix="/api/v1/influencers")
+    app.include_router(analytics.router, prefix="/api/v1/analytics")
+    app.add_middleware(QueryCountMiddleware)
+    app.dependency_overrides[get_db] = lambda: mock.MagicMock()
+
+    service = "app.services.influencer_service."
+    text_service = "app.services.text_analysis_service."
+    patches = [
+        mock.patch(service + "get_ranking_data_version", return_value=DATA_VERSION),
+        mock.patch(
+            service + "get_top_influencers_by_likes",
+            side_effect=lambda *args: data["rankings"],
+        ),
+        mock.patch(
+            service + "get_influencer_ranking",
+            side_effect=lambda *args: data["metrics"],
+        ),
+        mock.patch(
+            text_service + "get_influencer_data_version", return_value=DATA_VERSION
+        ),
+        mock.patch(
+            text_service + "get_influencer_keywords",
+            side_effect=lambda *args, **kwargs: data["keywords"],
+        ),
+    ]
+    return app, patches
+
+
+def percentile(samples, ratio):
+    """
+    計測値のパーセンタイル（最近傍法）
+
+    Args:
+        samples: 昇順に並べた計測値のリスト
+        ratio: 0〜1の割合（0.99ならp99）
+
+    Returns:
+        float: パーセンタイルの値
+    """
+    index = min(len(samples) - 1, max(0, int(round(ratio * len(samples))) - 1))
+    return samples[index]
+
+
+async def _measure(client, path, requests):
+    """同じリクエストを繰り返し、応答時間（ミリ秒）を昇順で返す"""
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise ValueError(f"{path} が {response.status_code} を返しました")
+    return sorted(samples)
+
+
+async def _measure_modes(app, path, requests):
+    """
+    モードごとに同じリクエストを計測
+
+    Returns:
+        tuple: (モードごとのp50 / p99, モードごとのレスポンスボディ)
+    """
+    result = {}
+    bodies = {}
+    async with httpx.AsyncClient(app=app, base_url="http://testserver") as client:
+        for mode, (fast, cached) in MODES.items():
+            utils.cache.clear()
+            with mock.patch.multiple(
+                utils, FAST_JSON_RESPONSE=fast, RESPONSE_CACHE=cached
+            ):
+                bodies[mode] = (await client.get(path)).json()
+                # ウォームアップ
+                await _measure(client, path, min(requests, 50))
+                samples = await _measure(client, path, requests)
+            result[f"{mode}_p50_ms"] = percentile(samples, 0.5)
+            result[f"{mode}_p99_ms"] = percentile(samples, 0.99)
+    return result, bodies
+
+
+def run_benchmark(requests=2000, limit=100):
+    """
+    通常モード・高速レスポンスモード・レスポンスキャッシュの応答時間を比較
+
+    Args:
+        requests: モード・エンドポイントごとのリクエスト数
+        limit: 1レスポンスあたりの件数
+
+    Returns:
+        dict: エンドポイントごとのモード別 p50 / p99（ミリ秒）
+
+    Raises:
+        ValueError: orjsonがない場合、またはモードによってレスポンスが異なる場合
+    """
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        raise ValueError("高速レスポンスモードの計測には orjson パッケージが必要です（pip install orjson）")
+
+    app, patches = build_app(build_data(limit))
+    results = {}
+    for patcher in patches:
+        patcher.start()
+    try:
+        for name, template in ENDPOINTS.items():
+            path = template.format(limit=limit)
+            result, bodies = asyncio.run(_measure_modes(app, path, requests))
+            if any(body != bodies["standard"] for body in bodies.values()):
+                raise ValueError(f"{name} のレスポンスがモードによって異なります")
+            results[name] = result
+    finally:
+        for patcher in patches:
+            patcher.stop()
+        utils.cache.clear()
+    return results
+
+
+def main():
+    """メイン関数"""
+    args = parse_args()
+    results = run_benchmark(args.requests, args.limit)
+    logger.info(f"リクエスト数: {args.requests}回, 件数: {args.limit}")
+    for name, result in results.items():
+        logger.info(
+            f"{name}: 通常 p50 {result['standard_p50_ms']:.3f}ms / "
+            f"p99 {result['standard_p99_ms']:.3f}ms, "
+            f"高速 p50 {result['fast_p50_ms']:.3f}ms / p99 {result['fast_p99_ms']:.3f}ms, "
+            f"キャッシュ p50 {result['cached_p50_ms']:.3f}ms / "
+            f"p99 {result['cached_p99_ms']:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+既存の投稿データから名詞・ハッシュタグ・メンションの出現回数テーブルを再構築するCLIツール
+保存機能の導入前にインポートされた投稿のバックフィルに使用
+"""
+import argparse
+import logging
+import os
+import sys
+
+from sqlalchemy import func
+
+# ルートディレクトリをPython pathに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# 注意: このインポートはsys.pathの設定後に行う必要があるため、E402警告を無視します
+from app.database.connection import SessionLocal  # noqa: E402
+from app.models.database_models import InfluencerPost  # noqa: E402
+from app.services.tag_service import store_post_tags  # noqa: E402
+from app.services.text_analysis_service import store_post_nouns  # noqa: E402
+
+# ロギング設定
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """コマンドライン引数のパース"""
+    parser = argparse.ArgumentParser(description="投稿データから名詞出現回数を再構築")
+    parser.add_argument("--influencer-id", type=int, help="対象のインフルエンサーID（省略時は全件）")
+    parser.add_argument("--batch-size", type=int, default=1000, help="一度にコミットする投稿数")
+    parser.add_argument(
+        "--tags-only",
+        action="store_true",
+        help="ハッシュタグ・メンションのみ再構築する（形態素解析を行わない）",
+    )
+    return parser.parse_args()
+
+
+def bump_data_version(db, posts):
+    """
+    再構築した投稿の updated_at を進める（コミットは呼び出し元で行う）
+    キーワード・タグのキャッシュキーとETagは投稿の最終更新日時から作られるため、
+    進めないと再構築前の結果が返され続ける
+
+    Args:
+        db: データベースセッション
+        posts: id を持つ投稿のリスト
+    """
+    db.query(InfluencerPost).filter(
+        InfluencerPost.id.in_([post.id for post in posts])
+    ).update({InfluencerPost.updated_at: func.now()}, synchronize_session=False)
+
+
+def build_post_nouns(db, influencer_id=None, batch_size=1000, tags_only=False):
+    """
+    投稿をIDの昇順にバッチで読み込み、名詞・ハッシュタグ・メンションの出現回数を保存し直す
+    同じトランザクションで投稿の updated_at を進め、キャッシュ済みの分析結果を無効にする
+
+    Args:
+        db: データベースセッション
+        influencer_id: 対象のインフルエンサーID（Noneの場合は全件）
+        batch_size: 一度にコミットする投稿数
+        tags_only: ハッシュタグ・メンションのみ再構築するかどうか
+
+    Returns:
+        int: 処理した投稿数
+    """
+    last_id = 0
+    processed = 0
+
+    while True:
+        query = db.query(
+            InfluencerPost.id,
+            InfluencerPost.post_id,
+            InfluencerPost.influencer_id,
+            InfluencerPost.text,
+        ).filter(InfluencerPost.id > last_id)
+        if influencer_id is not None:
+            query = query.filter(InfluencerPost.influencer_id == influencer_id)
+        posts = query.order_by(InfluencerPost.id).limit(batch_size).all()
+
+        if not posts:
+            break
+
+        if not tags_only:
+            store_post_nouns(db, posts)
+        store_post_tags(db, posts)
+        bump_data_version(db, posts)
+        db.commit()
+
+        processed += len(posts)
+        last_id = posts[-1].id
+        logger.info(f"{processed}件処理しました")
+
+    logger.info(f"出現回数の再構築完了: 合計{processed}件")
+    return processed
+
+
+def main():
+    """メイン関数"""
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        build_post_nouns(db, args.influencer_id, args.batch_size, args.tags_only)
+    except Exception as e:  # pragma: no cover
+        logger.error(f"再構築中に予期しないエラーが発生: {str(e)}")  # pragma: no cover
+        db.rollback()  # pragma: no cover
+        sys.exit(1)  # pragma: no cover
+    finally:
+        db.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
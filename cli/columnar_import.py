@@ -0,0 +1,393 @@
+"""
+列指向形式（Parquet / Arrow IPC）のインポート
+レコードバッチ単位で読み込み、型変換をpyarrowでまとめて行います
+COPYモードではバッチをそのままCSVに書き出してステージングテーブルに投入するため、
+行ごとのPythonオブジェクトを作りません（pyarrowは使用時のみ必要）
+"""
+import io
+import logging
+from contextlib import closing
+from types import SimpleNamespace
+
+from sqlalchemy import text
+
+from app.models.database_models import InfluencerPost
+from app.services.tag_service import store_post_tags
+from app.services.text_analysis_service import store_post_nouns
+from cli.import_csv import (
+    COPY_COLUMNS,
+    MERGE_STAGING_SQL,
+    copy_to_staging,
+    flush_records,
+    refresh_rollups,
+)
+from cli.import_progress import (
+    ImportProgress,
+    clear_checkpoint,
+    load_checkpoint,
+    save_checkpoint,
+    stage,
+)
+
+logger = logging.getLogger(__name__)
+
+# 列指向形式ごとのマジックバイト（Arrow IPC ストリーム形式は継続マーカーで始まる）
+COLUMNAR_MAGIC_BYTES = {
+    "parquet": b"PAR1",
+    "arrow": b"ARROW1",
+    "arrow_stream": b"\xff\xff\xff\xff",
+}
+
+# 名詞の出現回数の保存に使うカラム
+_NOUN_COLUMNS = ["post_id", "influencer_id", "text"]
+# nullの場合にエラーとして除外するカラム
+_REQUIRED_COLUMNS = [
+    "influencer_id",
+    "post_id",
+    "shortcode",
+    "likes",
+    "comments",
+    "post_date",
+]
+
+
+def _import_pyarrow():
+    """pyarrowを読み込む（列指向形式を使う場合のみ必要）"""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError(
+            "Parquet / Arrow IPC ファイルの読み込みには pyarrow パッケージが必要です（pip install pyarrow）"
+        )
+    return pyarrow
+
+
+def detect_columnar_format(file_path):
+    """
+    先頭バイトから列指向形式を判定
+
+    Args:
+        file_path: ファイルのパス
+
+    Returns:
+        str: 列指向形式（parquet / arrow / arrow_stream）、それ以外の場合はNone
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(8)
+    for fmt, magic in COLUMNAR_MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return fmt
+    return None
+
+
+def _column_types(pa):
+    """インポート先のカラムごとの型"""
+    return {
+        "influencer_id": pa.int32(),
+        "post_id": pa.int64(),
+        "shortcode": pa.string(),
+        "likes": pa.int32(),
+        "comments": pa.int32(),
+        "thumbnail": pa.string(),
+        "text": pa.string(),
+        "post_date": pa.timestamp("us"),
+    }
+
+
+def read_column_names(file_path, fmt):
+    """
+    ファイルのスキーマからカラム名を取得（データは読み込まない）
+
+    Args:
+        file_path: ファイルのパス
+        fmt: 列指向形式（parquet / arrow / arrow_stream）
+
+    Returns:
+        list: カラム名のリスト
+    """
+    pa = _import_pyarrow()
+    if fmt == "parquet":
+        return pa.parquet.read_schema(file_path).names
+    with pa.memory_map(file_path, "r") as source:
+        if fmt == "arrow":
+            return pa.ipc.open_file(source).schema.names
+        return pa.ipc.open_stream(source).schema.names
+
+
+def iter_record_batches(file_path, fmt, batch_size, skip_rows=0):
+    """
+    ファイルをレコードバッチ単位で読み込むジェネレータ
+
+    Args:
+        file_path: ファイルのパス
+        fmt: 列指向形式（parquet / arrow / arrow_stream）
+        batch_size: 1バッチの最大行数
+        skip_rows: 読み飛ばす先頭の行数（再開時）
+
+    Yields:
+        pyarrow.RecordBatch: 必要なカラムのみを含むバッチ
+    """
+    pa = _import_pyarrow()
+    if fmt == "parquet":
+        # ParquetFile も close() で開いたファイルを閉じる
+        source = pa.parquet.ParquetFile(file_path)
+    else:
+        source = pa.memory_map(file_path, "r")
+    # 最後まで読まずに中断された場合（書き込みエラーなど）もファイルを閉じる
+    try:
+        yield from _iter_source_batches(pa, source, fmt, batch_size, skip_rows)
+    finally:
+        source.close()
+
+
+def _iter_source_batches(pa, source, fmt, batch_size, skip_rows):
+    """開いたファイルからレコードバッチを読み込み、バッチサイズごとに分割する"""
+    if fmt == "parquet":
+        # 読み飛ばす行を含む行グループは読み込まない
+        row_groups = []
+        for index in range(source.num_row_groups):
+            num_rows = source.metadata.row_group(index).num_rows
+            if skip_rows >= num_rows and not row_groups:
+                skip_rows -= num_rows
+                continue
+            row_groups.append(index)
+        if not row_groups:
+            return
+        batches = source.iter_batches(
+            batch_size=batch_size, row_groups=row_groups, columns=COPY_COLUMNS
+        )
+    elif fmt == "arrow":
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        batches = iter(pa.ipc.open_stream(source))
+
+    for batch in batches:
+        if skip_rows >= batch.num_rows:
+            skip_rows -= batch.num_rows
+            continue
+        batch = batch.slice(skip_rows)
+        skip_rows = 0
+        for start in range(0, batch.num_rows, batch_size):
+            yield batch.slice(start, batch_size)
+
+
+def _cast_column(pa, column, target_type):
+    """
+    カラムをインポート先の型に変換
+    変換できない値（数値でない文字列・範囲外の値など）がある場合のみ行ごとに変換し直し、
+    その行をnullにする
+
+    Args:
+        pa: pyarrow モジュール
+        column: pyarrow.Array
+        target_type: インポート先の型
+
+    Returns:
+        tuple: (変換済みの pyarrow.Array, 変換できなかった行のマスク（すべて変換できた場合はNone）)
+    """
+    try:
+        return pa.compute.cast(column, target_type), None
+    except pa.ArrowInvalid:
+        values = []
+        failed = []
+        for value in column:
+            try:
+                values.append(value.cast(target_type).as_py())
+                failed.append(False)
+            except pa.ArrowInvalid:
+                values.append(None)
+                failed.append(True)
+        return pa.array(values, target_type), pa.array(failed)
+
+
+def _and(pc, mask, other):
+    """行のマスクの論理積（maskがNoneの場合はotherをそのまま返す）"""
+    return other if mask is None else pc.and_(mask, other)
+
+
+def convert_batch(batch):
+    """
+    レコードバッチをインポート先の型にまとめて変換
+    必須カラムがnull、日付の形式が不正、または変換できない値を含む行はエラーとして除外する
+    （CSVと同じく不正な行のみを除外し、同じバッチの他の行はインポートする）
+
+    Args:
+        batch: pyarrow.RecordBatch
+
+    Returns:
+        tuple: (変換済みの pyarrow.Table, エラー行数)
+
+    Raises:
+        NotImplementedError: インポート先の型に変換できない型のカラムがある場合
+    """
+    pa = _import_pyarrow()
+    pc = pa.compute
+
+    columns = []
+    valid = None
+    for name, target_type in _column_types(pa).items():
+        column = batch.column(name)
+        if name == "post_date" and (
+            pa.types.is_string(column.type) or pa.types.is_large_string(column.type)
+        ):
+            column = pc.strptime(
+                column, format="%Y-%m-%d %H:%M:%S", unit="us", error_is_null=True
+            )
+        # タイムゾーン付きの日時はUTCとして扱う
+        column, failed = _cast_column(pa, column, target_type)
+        columns.append(column)
+        if failed is not None:
+            valid = _and(pc, valid, pc.invert(failed))
+    table = pa.Table.from_arrays(columns, names=COPY_COLUMNS)
+
+    for name in _REQUIRED_COLUMNS:
+        valid = _and(pc, valid, pc.is_valid(table[name]))
+    converted = table.filter(valid)
+    return converted, table.num_rows - converted.num_rows
+
+
+def commit_copy_table(db, table, row_count):
+    """
+    COPYモードのバッチ処理（列指向形式）
+    変換済みのテーブルをCSVに書き出してステージングテーブル経由でマージし、
+    新規投稿の名詞出現回数も同じトランザクションで保存する
+
+    Args:
+        db: データベースセッション
+        table: convert_batch で変換済みの pyarrow.Table
+        row_count: 処理した行数
+    """
+    if table.num_rows == 0:
+        return
+    pa = _import_pyarrow()
+    buffer = io.BytesIO()
+    # 空文字列をNULLと区別するため、null以外の値を全てクォートする
+    pa.csv.write_csv(
+        table,
+        buffer,
+        write_options=pa.csv.WriteOptions(
+            include_header=False, quoting_style="all_valid"
+        ),
+    )
+    buffer.seek(0)
+    copy_to_staging(db, buffer)
+    inserted_ids = [
+        post_id for (post_id,) in db.execute(text(MERGE_STAGING_SQL)).fetchall()
+    ]
+
+    # 実際に追加された投稿のみ形態素解析する（同一post_idは最初の行を使用）
+    inserted_posts = []
+    if inserted_ids:
+        inserted = table.select(_NOUN_COLUMNS).filter(
+            pa.compute.is_in(table["post_id"], value_set=pa.array(inserted_ids))
+        )
+        seen = set()
+        for row in inserted.to_pylist():
+            if row["post_id"] not in seen:
+                seen.add(row["post_id"])
+                inserted_posts.append(SimpleNamespace(**row))
+    store_post_nouns(db, inserted_posts)
+    store_post_tags(db, inserted_posts)
+
+    db.commit()
+    skipped = table.num_rows - len(inserted_posts)
+    logger.info(f"{row_count}件処理しました（追加: {len(inserted_posts)}件, スキップ: {skipped}件）")
+
+
+def write_table(db, table, row_count, mode):
+    """
+    インポート方式に応じて変換済みのテーブルをコミット
+    orm / upsert モードはORMインスタンスまたは行ごとの辞書が必要なため、ここで行に展開する
+
+    Args:
+        db: データベースセッション
+        table: convert_batch で変換済みの pyarrow.Table
+        row_count: 処理した行数
+        mode: インポート方式（orm / copy / upsert）
+    """
+    if mode == "copy":
+        commit_copy_table(db, table, row_count)
+        return
+    rows = table.to_pylist()
+    if mode == "orm":
+        rows = [InfluencerPost(**row) for row in rows]
+    flush_records(db, rows, row_count, mode)
+
+
+def process_columnar_file(file_path, db, batch_size, fmt, mode="orm", resume=False):
+    """
+    Parquet / Arrow IPC ファイルの内容を処理する
+    バッチをコミットするたびにチェックポイント（処理済みの行数）を保存する
+
+    Args:
+        file_path: ファイルのパス
+        db: データベースセッション
+        batch_size: バッチサイズ
+        fmt: 列指向形式（parquet / arrow / arrow_stream）
+        mode: インポート方式（orm / copy / upsert）
+        resume: チェックポイントから再開するかどうか
+
+    Returns:
+        bool: 処理成功/失敗
+    """
+    try:
+        column_names = read_column_names(file_path, fmt)
+        checkpoint = load_checkpoint(file_path, mode) if resume else None
+    except ValueError as e:
+        logger.error(str(e))
+        return False
+
+    missing_columns = [col for col in COPY_COLUMNS if col not in column_names]
+    if missing_columns:
+        logger.error(f"必須カラムが不足しています: {', '.join(missing_columns)}")
+        return False
+
+    row_count = 0
+    error_count = 0
+    influencer_ids = set()
+    if checkpoint is not None:
+        row_count = checkpoint["rows"]
+        influencer_ids = None
+        logger.info(f"チェックポイントから再開: {row_count}行目の次から")
+
+    # 入力のバイト数と行の対応が分からないため、進捗率は表示しない
+    progress = ImportProgress(None, start_rows=row_count)
+    # 書き込みエラーで中断した場合もすぐにファイルを閉じる
+    with closing(
+        iter_record_batches(file_path, fmt, batch_size, skip_rows=row_count)
+    ) as batches:
+        while True:
+            with stage(progress, "parse"):
+                batch = next(batches, None)
+            if batch is None:
+                break
+            with stage(progress, "convert"):
+                try:
+                    table, errors = convert_batch(batch)
+                except (ValueError, TypeError, NotImplementedError) as e:
+                    # インポート先の型に変換できない型のカラムを含むバッチは全行をエラーとして扱う
+                    logger.error(f"行{row_count + 1}以降のバッチの処理でデータエラー: {str(e)}")
+                    table, errors = None, batch.num_rows
+            row_count += batch.num_rows
+            error_count += errors
+            if table is not None:
+                if influencer_ids is not None:
+                    influencer_ids.update(table["influencer_id"].unique().to_pylist())
+                with stage(progress, "write"):
+                    write_table(db, table, row_count, mode)
+            save_checkpoint(file_path, mode, row_count, row_count)
+            progress.advance(batch.num_rows, 0)
+            progress.maybe_report()
+
+    # インポート完了後に対象インフルエンサーの集計値をまとめて更新
+    refresh_rollups(db, influencer_ids)
+    clear_checkpoint(file_path)
+
+    logger.info(f"インポート完了: 合計{row_count}件（エラー: {error_count}件）")
+    progress.summary()
+    return True
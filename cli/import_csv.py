@@ -4,16 +4,83 @@ CSVデータをPostgreSQLにインポートするCLIツール
 """
 import argparse
 import csv
+import io
 import logging
 import os
 import sys
 from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import text
 
 # ルートディレクトリをPython pathに追加
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 # 注意: このインポートはsys.pathの設定後に行う必要があるため、E402警告を無視します
 from app.database.connection import SessionLocal  # noqa: E402
+from app.database.repositories import (  # noqa: E402
+    InfluencerPostRepository,
+    InfluencerStatsRepository,
+)
 from app.models.database_models import InfluencerPost  # noqa: E402
+from app.services.tag_service import store_post_tags  # noqa: E402
+from app.services.text_analysis_service import store_post_nouns  # noqa: E402
+from cli.import_progress import (  # noqa: E402
+    ImportProgress,
+    clear_checkpoint,
+    load_checkpoint,
+    save_checkpoint,
+    stage,
+)
+from cli.input_source import STDIN, InputSource  # noqa: E402
+
+# 再開時にシークできない入力を読み飛ばす単位（バイト）
+SKIP_BLOCK_BYTES = 1024 * 1024
+
+# COPYで投入するカラム（CSVのカラム順と同じ）
+COPY_COLUMNS = [
+    "influencer_id",
+    "post_id",
+    "shortcode",
+    "likes",
+    "comments",
+    "thumbnail",
+    "text",
+    "post_date",
+]
+
+# COPYの投入先となるステージングテーブル（トランザクション終了時に自動削除）
+# ordinal はCOPYで投入した順に採番され、重複post_idのうち先頭の行を選ぶのに使う
+STAGING_TABLE = "influencer_posts_staging"
+
+CREATE_STAGING_SQL = f"""
+CREATE TEMP TABLE {STAGING_TABLE} (
+    ordinal BIGINT GENERATED ALWAYS AS IDENTITY,
+    influencer_id INTEGER NOT NULL,
+    post_id BIGINT NOT NULL,
+    shortcode VARCHAR(50) NOT NULL,
+    likes INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    thumbnail TEXT,
+    text TEXT,
+    post_date TIMESTAMP NOT NULL
+) ON COMMIT DROP
+"""
+
+COPY_SQL = (
+    f"COPY {STAGING_TABLE} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+)
+
+# ステージングから本テーブルへのマージ
+# 同一ファイル内の重複post_idは先頭の行にまとめ（ORMモード・名詞の保存と同じ行）、
+# 既存の投稿はスキップする
+MERGE_STAGING_SQL = f"""
+INSERT INTO influencer_posts ({', '.join(COPY_COLUMNS)})
+SELECT DISTINCT ON (post_id) {', '.join(COPY_COLUMNS)}
+FROM {STAGING_TABLE}
+ORDER BY post_id, ordinal
+ON CONFLICT (post_id) DO NOTHING
+RETURNING post_id
+"""
 
 # ロギング設定
 logging.basicConfig(
@@ -25,8 +92,31 @@ logger = logging.getLogger(__name__)
 def parse_args():
     """コマンドライン引数のパース"""
     parser = argparse.ArgumentParser(description="CSVファイルからインフルエンサー投稿データをインポート")
-    parser.add_argument("--file", required=True, help="インポートするCSVファイルのパス")
+    parser.add_argument(
+        "--file",
+        required=True,
+        help=(
+            "インポートするCSVファイルのパス（gzip / bzip2 / zstd 圧縮、"
+            'Parquet / Arrow IPC にも対応、"-" で標準入力）'
+        ),
+    )
     parser.add_argument("--batch-size", type=int, default=1000, help="一度にコミットするレコード数")
+    parser.add_argument(
+        "--mode",
+        choices=["orm", "copy", "upsert"],
+        default="orm",
+        help=(
+            "インポート方式（orm: ORMで一括保存, copy: COPY FROM STDINで高速投入, "
+            "upsert: 既存投稿は変更があった場合のみ更新）"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="チェックポイントが残っている場合、前回コミットした位置から再開する（copy / upsert モードのみ）",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="CSVの解析・型変換を行うワーカープロセス数")
+    parser.add_argument("--writers", type=int, default=1, help="データベースに書き込むスレッド（接続）数")
     return parser.parse_args()
 
 
@@ -48,6 +138,33 @@ def validate_csv_columns(reader, required_columns):
     return True
 
 
+def parse_row(row):
+    """
+    CSVの行を検証し、カラムごとの値に変換
+
+    Args:
+        row: CSVの1行分のデータ
+
+    Returns:
+        dict: 型変換済みのカラム値
+
+    Raises:
+        ValueError: 数値や日付の形式が不正な場合
+        KeyError: 必須カラムが存在しない場合
+    """
+    return {
+        "influencer_id": int(row["influencer_id"]),
+        "post_id": int(row["post_id"]),
+        "shortcode": row["shortcode"],
+        "likes": int(row["likes"]),
+        "comments": int(row["comments"]),
+        "thumbnail": row["thumbnail"],
+        "text": row["text"],
+        # 日付のパース
+        "post_date": datetime.strptime(row["post_date"], "%Y-%m-%d %H:%M:%S"),
+    }
+
+
 def create_record_from_row(row):
     """
     CSVの行からInfluencerPostレコードを作成
@@ -58,25 +175,13 @@ def create_record_from_row(row):
     Returns:
         InfluencerPost: モデルインスタンス
     """
-    # 日付のパース
-    post_date = datetime.strptime(row["post_date"], "%Y-%m-%d %H:%M:%S")
-
-    # モデルインスタンスの作成
-    return InfluencerPost(
-        influencer_id=int(row["influencer_id"]),
-        post_id=int(row["post_id"]),
-        shortcode=row["shortcode"],
-        likes=int(row["likes"]),
-        comments=int(row["comments"]),
-        thumbnail=row["thumbnail"],
-        text=row["text"],
-        post_date=post_date,
-    )
+    return InfluencerPost(**parse_row(row))
 
 
 def commit_records(db, records, row_count):
     """
     レコードのコミット処理
+    投稿と同じトランザクションで名詞出現回数も保存する
 
     Args:
         db: データベースセッション
@@ -88,12 +193,170 @@ def commit_records(db, records, row_count):
     """
     if records:
         db.bulk_save_objects(records)
+        store_post_nouns(db, records)
+        store_post_tags(db, records)
         db.commit()
         logger.info(f"{row_count}件処理しました")
     return []
 
 
-def process_csv_row(db, row, records, batch_size, row_count):
+def copy_rows_to_staging(db, rows):
+    """
+    検証済みの行をCOPY FROM STDINでステージングテーブルに投入
+    ステージングテーブルは現在のトランザクション内で作成し、コミット時に削除される
+
+    Args:
+        db: データベースセッション
+        rows: parse_row で変換済みの行のリスト
+    """
+    buffer = io.StringIO()
+    # 空文字列をNULLと区別するため全項目をクォートする
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    for row in rows:
+        writer.writerow([row[column] for column in COPY_COLUMNS])
+    buffer.seek(0)
+    copy_to_staging(db, buffer)
+
+
+def copy_to_staging(db, buffer):
+    """
+    COPY_COLUMNS の順に並んだCSV（ヘッダーなし）をステージングテーブルに投入
+
+    Args:
+        db: データベースセッション
+        buffer: CSVデータを読み出せるファイルオブジェクト（str / bytes）
+    """
+    db.execute(text(CREATE_STAGING_SQL))
+    # セッションと同じトランザクションの接続でpsycopg2のCOPYを実行
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(COPY_SQL, buffer)
+    finally:
+        cursor.close()
+
+
+def commit_copy_records(db, rows, row_count):
+    """
+    COPYモードのバッチ処理
+    ステージングテーブル経由で投稿をマージし、新規投稿の名詞出現回数も同じトランザクションで保存する
+
+    Args:
+        db: データベースセッション
+        rows: parse_row で変換済みの行のリスト
+        row_count: 処理した行数
+
+    Returns:
+        list: 空のリスト（コミット後にリセット）
+    """
+    if rows:
+        copy_rows_to_staging(db, rows)
+        inserted_ids = {
+            post_id for (post_id,) in db.execute(text(MERGE_STAGING_SQL)).fetchall()
+        }
+
+        # 実際に追加された投稿のみ形態素解析する
+        inserted_posts = []
+        for row in rows:
+            if row["post_id"] in inserted_ids:
+                inserted_posts.append(SimpleNamespace(**row))
+                inserted_ids.discard(row["post_id"])
+        store_post_nouns(db, inserted_posts)
+        store_post_tags(db, inserted_posts)
+
+        db.commit()
+        skipped = len(rows) - len(inserted_posts)
+        logger.info(f"{row_count}件処理しました（追加: {len(inserted_posts)}件, スキップ: {skipped}件）")
+    return []
+
+
+def commit_upsert_records(db, rows, row_count):
+    """
+    upsertモードのバッチ処理
+    post_id単位で追加・更新し、新規投稿とテキストが変わった投稿のみ名詞出現回数を保存し直す
+
+    Args:
+        db: データベースセッション
+        rows: parse_row で変換済みの行のリスト
+        row_count: 処理した行数
+
+    Returns:
+        list: 空のリスト（コミット後にリセット）
+    """
+    if rows:
+        # 同一バッチ内の重複post_idは後の行を優先（同じ行を1文で2回更新できないため）
+        unique_rows = list({row["post_id"]: row for row in rows}.values())
+
+        repository = InfluencerPostRepository(db)
+        existing_texts = repository.get_texts_by_post_ids(
+            [row["post_id"] for row in unique_rows]
+        )
+        written_ids = repository.upsert_posts(unique_rows)
+
+        noun_posts = [
+            SimpleNamespace(**row)
+            for row in unique_rows
+            if row["post_id"] in written_ids
+            and (
+                row["post_id"] not in existing_texts
+                or existing_texts[row["post_id"]] != row["text"]
+            )
+        ]
+        store_post_nouns(db, noun_posts)
+        store_post_tags(db, noun_posts)
+
+        db.commit()
+        inserted = len(written_ids - existing_texts.keys())
+        updated = len(written_ids) - inserted
+        unchanged = len(unique_rows) - len(written_ids)
+        logger.info(
+            f"{row_count}件処理しました"
+            f"（追加: {inserted}件, 更新: {updated}件, 変更なし: {unchanged}件）"
+        )
+    return []
+
+
+def refresh_rollups(db, influencer_ids):
+    """
+    インポートした投稿のインフルエンサーについて集計テーブルを更新
+
+    Args:
+        db: データベースセッション
+        influencer_ids: 投稿をインポートしたインフルエンサーIDの集合（Noneの場合は全件）
+    """
+    if influencer_ids is None:
+        # 中断前にコミットした投稿のインフルエンサーが分からない再開時は全件を再計算
+        InfluencerStatsRepository(db).refresh()
+        db.commit()
+        logger.info("集計テーブルを更新しました: 全インフルエンサー")
+        return
+    if not influencer_ids:
+        return
+    InfluencerStatsRepository(db).refresh(sorted(influencer_ids))
+    db.commit()
+    logger.info(f"集計テーブルを更新しました: {len(influencer_ids)}インフルエンサー")
+
+
+def flush_records(db, records, row_count, mode="orm"):
+    """
+    インポート方式に応じてバッチをコミット
+
+    Args:
+        db: データベースセッション
+        records: コミット対象のレコードリスト
+        row_count: 処理した行数
+        mode: インポート方式（orm / copy / upsert）
+
+    Returns:
+        list: 空のリスト（コミット後にリセット）
+    """
+    if mode == "copy":
+        return commit_copy_records(db, records, row_count)
+    if mode == "upsert":
+        return commit_upsert_records(db, records, row_count)
+    return commit_records(db, records, row_count)
+
+
+def process_csv_row(db, row, records, batch_size, row_count, mode="orm", progress=None):
     """
     CSVの1行を処理し、必要に応じてバッチ処理を行う
 
@@ -103,18 +366,24 @@ def process_csv_row(db, row, records, batch_size, row_count):
         records: 現在の処理中レコードリスト
         batch_size: バッチサイズ
         row_count: 現在の行番号
+        mode: インポート方式（orm / copy / upsert）
+        progress: 処理時間を計測する ImportProgress（省略可）
 
     Returns:
         list: 更新されたレコードリスト（バッチ処理後は空リスト）
     """
     try:
-        # レコード作成と追加
-        record = create_record_from_row(row)
-        records.append(record)
+        # レコード作成と追加（COPY・upsertモードではORMインスタンスを作らない）
+        with stage(progress, "convert"):
+            if mode in ("copy", "upsert"):
+                records.append(parse_row(row))
+            else:
+                records.append(create_record_from_row(row))
 
         # バッチサイズに達したらコミット
         if row_count % batch_size == 0:
-            return commit_records(db, records, row_count)
+            with stage(progress, "write"):
+                return flush_records(db, records, row_count, mode)
 
         return records
 
@@ -126,14 +395,69 @@ def process_csv_row(db, row, records, batch_size, row_count):
         raise  # pragma: no cover
 
 
-def process_csv_file(file_path, db, batch_size):
+class ByteOffsetLines:
+    """
+    バイナリストリームを1行ずつデコードして返し、読み込んだ位置（バイト数）を記録するイテレータ
+    csv.reader は必要な行だけを読むため、レコードを受け取った時点の offset がその次のレコードの先頭になる
+    圧縮ファイルや標準入力の場合、offset は展開後のデータ先頭からのバイト数になる
+    """
+
+    def __init__(self, f, encoding="utf-8"):
+        """
+        コンストラクタ
+
+        Args:
+            f: バイナリモードで開いたストリーム（先頭から読み込む）
+            encoding: 文字コード
+        """
+        self.f = f
+        self.encoding = encoding
+        self.offset = 0
+
+    def seek(self, offset):
+        """
+        指定したオフセットから読み込みを再開
+        シークできないストリーム（圧縮ファイル・標準入力）は指定位置まで読み飛ばす
+
+        Args:
+            offset: レコードの先頭オフセット
+
+        Raises:
+            ValueError: ストリームが指定位置より短い場合
+        """
+        if self.f.seekable():
+            self.f.seek(offset)
+            self.offset = offset
+            return
+        while self.offset < offset:
+            skipped = self.f.read(min(offset - self.offset, SKIP_BLOCK_BYTES))
+            if not skipped:
+                raise ValueError(f"入力が再開位置より短くなっています: {offset}")
+            self.offset += len(skipped)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode(self.encoding)
+
+
+def process_csv_file(file_path, db, batch_size, mode="orm", resume=False):
     """
     CSVファイルの内容を処理する
+    バッチをコミットするたびにチェックポイント（次に処理する位置と行数）を保存し、
+    resume が指定された場合はチェックポイントの位置から再開する
 
     Args:
         file_path: CSVファイルのパス
         db: データベースセッション
         batch_size: バッチサイズ
+        mode: インポート方式（orm / copy / upsert）
+        resume: チェックポイントから再開するかどうか
 
     Returns:
         bool: 処理成功/失敗
@@ -150,8 +474,18 @@ def process_csv_file(file_path, db, batch_size):
         "post_date",
     ]
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+    if resume and file_path == STDIN:
+        logger.error("標準入力からのインポートはチェックポイントから再開できません")
+        return False
+    try:
+        checkpoint = load_checkpoint(file_path, mode) if resume else None
+    except ValueError as e:
+        logger.error(str(e))
+        return False
+
+    with InputSource(file_path) as source:
+        lines = ByteOffsetLines(source.stream)
+        reader = csv.DictReader(lines)
 
         # ヘッダーバリデーション
         if not validate_csv_columns(reader, required_columns):
@@ -159,40 +493,106 @@ def process_csv_file(file_path, db, batch_size):
 
         records = []
         row_count = 0
+        influencer_ids = set()
+
+        if checkpoint is not None:
+            lines.seek(checkpoint["offset"])
+            row_count = checkpoint["rows"]
+            # 中断前にコミットした投稿のインフルエンサーも集計し直す
+            influencer_ids = None
+            logger.info(f"チェックポイントから再開: {row_count}行目の次から")
+
+        progress = ImportProgress(
+            source.total_bytes, start_offset=lines.offset, start_rows=row_count
+        )
+        committed_rows = row_count
 
         # 各行を処理
-        for row_count, row in enumerate(reader, 1):
-            records = process_csv_row(db, row, records, batch_size, row_count)
+        rows = iter(reader)
+        while True:
+            with stage(progress, "parse"):
+                row = next(rows, None)
+            if row is None:
+                break
+            row_count += 1
+            records = process_csv_row(
+                db, row, records, batch_size, row_count, mode, progress
+            )
+            if influencer_ids is not None:
+                try:
+                    influencer_ids.add(int(row["influencer_id"]))
+                except (ValueError, KeyError, TypeError):
+                    pass
+
+            # コミットされたら（エラー行以外のレコードが残っていなければ）位置を記録
+            if row_count % batch_size == 0 and not records:
+                if not source.is_stdin:
+                    save_checkpoint(file_path, mode, lines.offset, row_count)
+                progress.advance(row_count - committed_rows, lines.offset)
+                committed_rows = row_count
+                progress.maybe_report()
 
         # 残りのレコードをコミット
-        commit_records(db, records, row_count)
+        with stage(progress, "write"):
+            flush_records(db, records, row_count, mode)
+        progress.advance(row_count - committed_rows, lines.offset)
+
+        # インポート完了後に対象インフルエンサーの集計値をまとめて更新
+        refresh_rollups(db, influencer_ids)
+        if not source.is_stdin:
+            clear_checkpoint(file_path)
 
         logger.info(f"インポート完了: 合計{row_count}件")
+        progress.summary()
         return True
 
 
-def import_csv(file_path, batch_size=1000):
+def import_csv(
+    file_path, batch_size=1000, mode="orm", workers=1, writers=1, resume=False
+):
     """
     CSVファイルをデータベースにインポート
+    Parquet / Arrow IPC ファイルはレコードバッチ単位で処理し、
+    それ以外で workers または writers が2以上の場合は並列パイプラインで処理する
 
     Args:
         file_path: CSVファイルのパス
         batch_size: 一度にコミットするバッチサイズ
+        mode: インポート方式（orm / copy / upsert）
+        workers: CSVの解析・型変換を行うワーカープロセス数
+        writers: データベースに書き込むスレッド（接続）数
+        resume: チェックポイントから再開するかどうか
 
     Returns:
         bool: インポートの成功/失敗
     """
-    # ファイルの存在チェック
-    if not os.path.exists(file_path):
+    # ファイルの存在チェック（"-" は標準入力）
+    if file_path != STDIN and not os.path.exists(file_path):
         logger.error(f"ファイルが見つかりません: {file_path}")
         return False
 
-    logger.info(f"CSVファイルのインポートを開始: {file_path}")
+    logger.info(f"CSVファイルのインポートを開始: {file_path}（モード: {mode}）")
 
     db = SessionLocal()
     try:
-        return process_csv_file(file_path, db, batch_size)
-    except (IOError, csv.Error) as e:
+        # 列指向形式は必要な場合のみ読み込む（循環インポートの回避）
+        from cli.columnar_import import detect_columnar_format, process_columnar_file
+
+        fmt = detect_columnar_format(file_path) if file_path != STDIN else None
+        if fmt is not None:
+            logger.info(f"列指向形式として読み込みます: {fmt}")
+            return process_columnar_file(file_path, db, batch_size, fmt, mode, resume)
+        if workers > 1 or writers > 1:
+            # 並列パイプラインは必要な場合のみ読み込む（循環インポートの回避）
+            from cli.parallel_import import process_csv_file_parallel
+
+            return process_csv_file_parallel(
+                file_path, db, batch_size, mode, workers, writers, resume
+            )
+        return process_csv_file(file_path, db, batch_size, mode, resume)
+    except (IOError, csv.Error, ValueError, EOFError) as e:
+        # 途中で途切れた圧縮ファイル（EOFError）、壊れた圧縮データ・文字コードの誤り・
+        # 展開に必要なパッケージがない場合（ValueError）も読み込みエラーとして扱う
         logger.error(f"ファイル読み込み中にエラーが発生: {str(e)}")
         db.rollback()
         return False
@@ -207,7 +607,9 @@ def import_csv(file_path, batch_size=1000):
 def main():
     """メイン関数"""
     args = parse_args()
-    success = import_csv(args.file, args.batch_size)
+    success = import_csv(
+        args.file, args.batch_size, args.mode, args.workers, args.writers, args.resume
+    )
     sys.exit(0 if success else 1)
 
 
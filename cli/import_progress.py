@@ -0,0 +1,270 @@
+"""
+CSVインポートの進捗・スループットの報告と、再開用チェックポイントの管理
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# 進捗を報告する間隔（秒）
+PROGRESS_INTERVAL = float(os.getenv("IMPORT_PROGRESS_INTERVAL", "10"))
+# 計測する処理段階（解析・型変換・書き込み）
+STAGES = ("parse", "convert", "write")
+# 再開できるインポート方式（再開時はコミット済みのバッチが再投入されることがあるため、
+# 既存の投稿をスキップまたは更新する方式のみ）
+RESUMABLE_MODES = ("copy", "upsert")
+
+
+class ImportProgress:
+    """
+    インポートの進捗を集計し、スループット・残り時間・段階ごとの処理時間を報告する
+    並列パイプラインの書き込みスレッドからも更新されるためスレッドセーフ
+    """
+
+    def __init__(
+        self,
+        total_bytes,
+        start_offset=0,
+        start_rows=0,
+        interval=PROGRESS_INTERVAL,
+        clock=time.monotonic,
+    ):
+        """
+        コンストラクタ
+
+        Args:
+            total_bytes: 入力ファイルのサイズ（圧縮ファイル・標準入力など不明な場合はNone）
+            start_offset: 処理開始時のオフセット（再開時はチェックポイントの位置）
+            start_rows: 処理開始時の行数（再開時はチェックポイントの行数）
+            interval: 進捗を報告する間隔（秒）
+            clock: 経過時間の計測に使う関数
+        """
+        self.total_bytes = total_bytes
+        self.start_offset = start_offset
+        self.start_rows = start_rows
+        self.offset = start_offset
+        self.rows = start_rows
+        self.interval = interval
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._started = clock()
+        self._last_report = self._started
+
+    @contextmanager
+    def stage(self, name):
+        """
+        ブロックの処理時間を段階ごとに加算するコンテキストマネージャ
+
+        Args:
+            name: 処理段階（parse / convert / write）
+        """
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, self._clock() - started)
+
+    def add_stage_time(self, name, seconds):
+        """
+        段階ごとの処理時間を加算（ワーカープロセスで計測した時間の集計用）
+
+        Args:
+            name: 処理段階（parse / convert / write）
+            seconds: 処理時間（秒）
+        """
+        with self._lock:
+            self.stage_seconds[name] += seconds
+
+    def advance(self, rows, offset):
+        """
+        コミット済みの行数とオフセットを進める
+
+        Args:
+            rows: 新たにコミットした行数
+            offset: コミット済みの位置（ファイル先頭からのバイト数）
+        """
+        with self._lock:
+            self.rows += rows
+            self.offset = max(self.offset, offset)
+
+    def snapshot(self):
+        """
+        現在の進捗を取得
+
+        Returns:
+            dict: 行数・オフセット・行/秒・バイト/秒・進捗率・残り時間（秒）
+                （入力サイズが不明な場合、進捗率と残り時間はNone）
+        """
+        with self._lock:
+            elapsed = max(self._clock() - self._started, 1e-9)
+            rows = self.rows - self.start_rows
+            processed_bytes = self.offset - self.start_offset
+            bytes_per_sec = processed_bytes / elapsed
+            percent = None
+            eta_seconds = None
+            if self.total_bytes is not None:
+                remaining = max(self.total_bytes - self.offset, 0)
+                percent = (
+                    self.offset / self.total_bytes * 100 if self.total_bytes else 100.0
+                )
+                eta_seconds = remaining / bytes_per_sec if bytes_per_sec else None
+            return {
+                "rows": self.rows,
+                "offset": self.offset,
+                "elapsed_seconds": elapsed,
+                "rows_per_sec": rows / elapsed,
+                "bytes_per_sec": bytes_per_sec,
+                "percent": percent,
+                "eta_seconds": eta_seconds,
+                "stage_seconds": dict(self.stage_seconds),
+            }
+
+    def maybe_report(self):
+        """前回の報告から interval 秒以上経過していれば進捗を報告"""
+        now = self._clock()
+        if now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        self.report()
+
+    def report(self):
+        """進捗をログに出力"""
+        stats = self.snapshot()
+        eta = (
+            f"{stats['eta_seconds']:.0f}秒" if stats["eta_seconds"] is not None else "不明"
+        )
+        percent = (
+            f"{stats['percent']:.1f}%" if stats["percent"] is not None else "全体サイズ不明"
+        )
+        logger.info(
+            f"進捗: {stats['rows']}件 ({percent}), "
+            f"{stats['rows_per_sec']:.0f}行/秒, "
+            f"{stats['bytes_per_sec'] / 1024 / 1024:.2f}MB/秒, 残り約{eta}"
+        )
+
+    def summary(self):
+        """
+        最終結果（スループットと段階ごとの処理時間）をログに出力
+
+        Returns:
+            dict: snapshot() と同じ形式の最終結果
+        """
+        stats = self.snapshot()
+        stages = ", ".join(
+            f"{name}: {seconds:.2f}秒"
+            for name, seconds in stats["stage_seconds"].items()
+        )
+        logger.info(
+            f"インポート統計: {stats['rows'] - self.start_rows}件 / "
+            f"{stats['elapsed_seconds']:.2f}秒, "
+            f"{stats['rows_per_sec']:.0f}行/秒, "
+            f"{stats['bytes_per_sec'] / 1024 / 1024:.2f}MB/秒 "
+            f"（段階ごとの累積時間 {stages}）"
+        )
+        return stats
+
+
+def stage(progress, name):
+    """
+    progress が指定されている場合のみ処理時間を計測するコンテキストマネージャを返す
+
+    Args:
+        progress: ImportProgress または None
+        name: 処理段階（parse / convert / write）
+    """
+    if progress is None:
+        return nullcontext()
+    return progress.stage(name)
+
+
+def checkpoint_path(file_path):
+    """
+    チェックポイントファイルのパスを取得
+
+    Args:
+        file_path: CSVファイルのパス
+
+    Returns:
+        str: チェックポイントファイルのパス
+    """
+    return f"{file_path}.checkpoint"
+
+
+def save_checkpoint(file_path, mode, offset, rows):
+    """
+    コミット済みの位置をチェックポイントに保存（書き込み途中で中断しても壊れないよう置き換えで保存）
+
+    Args:
+        file_path: CSVファイルのパス
+        mode: インポート方式
+        offset: コミット済みの位置（次に処理するレコードの先頭オフセット）
+        rows: コミット済みの行数
+    """
+    stat = os.stat(file_path)
+    data = {
+        "file_size": stat.st_size,
+        "file_mtime_ns": stat.st_mtime_ns,
+        "mode": mode,
+        "offset": offset,
+        "rows": rows,
+        "updated_at": datetime.now().isoformat(),
+    }
+    path = checkpoint_path(file_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(file_path, mode):
+    """
+    チェックポイントを読み込む
+    ORMモードで作成したチェックポイントは copy / upsert モードで再開できる
+
+    Args:
+        file_path: CSVファイルのパス
+        mode: インポート方式
+
+    Returns:
+        dict: チェックポイント（存在しない場合はNone）
+
+    Raises:
+        ValueError: 再開できないインポート方式の場合、
+            またはファイルやインポート方式がチェックポイント作成時と異なる場合
+    """
+    if mode not in RESUMABLE_MODES:
+        raise ValueError(
+            f"{mode} モードでは再開できません（再投入した投稿がpost_idの一意制約に違反するため）。"
+            f"--mode {' または --mode '.join(RESUMABLE_MODES)} を指定してください"
+        )
+    path = checkpoint_path(file_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    stat = os.stat(file_path)
+    if data["file_size"] != stat.st_size or data["file_mtime_ns"] != stat.st_mtime_ns:
+        raise ValueError(f"チェックポイント作成後にファイルが変更されています: {file_path}")
+    # ORMモードで中断したインポートは copy / upsert で再開できる
+    if data["mode"] != mode and data["mode"] != "orm":
+        raise ValueError(f"チェックポイントのインポート方式が異なります: {data['mode']}")
+    return data
+
+
+def clear_checkpoint(file_path):
+    """
+    インポート完了後にチェックポイントを削除
+
+    Args:
+        file_path: CSVファイルのパス
+    """
+    path = checkpoint_path(file_path)
+    if os.path.exists(path):
+        os.remove(path)
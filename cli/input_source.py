@@ -0,0 +1,238 @@
+"""
+インポート対象の入力を開くユーティリティ
+圧縮ファイル（gzip / bzip2 / zstd）はマジックバイトで形式を判定してストリーミングで展開し、
+"-" が指定された場合は標準入力から読み込みます（いずれもメモリ使用量はファイルサイズに依存しません）
+"""
+import bz2
+import gzip
+import io
+import os
+import sys
+
+# 標準入力を表すファイル名
+STDIN = "-"
+
+# 圧縮形式ごとのマジックバイト
+MAGIC_BYTES = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+# 展開後の読み込みバッファサイズ
+_BUFFER_SIZE = 1024 * 1024
+
+
+def detect_codec(head):
+    """
+    先頭バイトから圧縮形式を判定
+
+    Args:
+        head: ファイルの先頭数バイト
+
+    Returns:
+        str: 圧縮形式（gzip / bz2 / zstd）、非圧縮の場合はNone
+    """
+    for codec, magic in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+# zstdの展開時に一度に読み込む圧縮データのサイズ
+_ZSTD_READ_SIZE = 128 * 1024
+# zstdフレーム・スキップ可能フレームのマジックナンバー（リトルエンディアン）
+_ZSTD_FRAME_MAGIC = 0xFD2FB528
+_ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+
+
+class _ZstdFrameTracker:
+    """
+    zstdの圧縮データを読み込みながらフレームの境界を追跡する（展開はしない）
+    zstandard の stream_reader は途中で途切れたストリームをエラーにしないため、
+    フレームヘッダーとブロックヘッダーだけを読んで、最後のフレームが完結しているかを判定する
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+        # 次に読むフィールドの種類とバイト数
+        self._state = "magic"
+        self._need = 4
+        self._buf = b""
+        # 読み飛ばすバイト数（ブロックの内容など）
+        self._skip = 0
+        self._checksum = 0
+
+    @property
+    def complete(self):
+        """読み込んだデータがフレームの境界で終わっているか"""
+        return self._state is None or (
+            self._state == "magic" and not self._buf and not self._skip
+        )
+
+    def read(self, size=-1):
+        data = self._raw.read(size)
+        if self._state is not None:
+            self._track(data)
+        return data
+
+    def _track(self, data):
+        """圧縮データのフィールドを読み、フレームの状態を進める"""
+        pos = 0
+        while pos < len(data) and self._state is not None:
+            if self._skip:
+                step = min(self._skip, len(data) - pos)
+                self._skip -= step
+                pos += step
+                continue
+            step = min(self._need - len(self._buf), len(data) - pos)
+            self._buf += data[pos : pos + step]
+            pos += step
+            if len(self._buf) == self._need:
+                field, self._buf = int.from_bytes(self._buf, "little"), b""
+                self._parse(field)
+
+    def _parse(self, field):
+        """読み終えたフィールドから、読み飛ばすバイト数と次に読むフィールドを決める"""
+        if self._state == "magic":
+            if field == _ZSTD_FRAME_MAGIC:
+                self._state, self._need = "descriptor", 1
+            elif field & 0xFFFFFFF0 == _ZSTD_SKIPPABLE_MAGIC:
+                self._state, self._need = "skippable", 4
+            else:
+                # 不正なデータは展開時にエラーになるため追跡をやめる
+                self._state = None
+        elif self._state == "skippable":
+            self._skip = field
+            self._state, self._need = "magic", 4
+        elif self._state == "descriptor":
+            single_segment = field >> 5 & 1
+            window_size = 0 if single_segment else 1
+            dict_id_size = (0, 1, 2, 4)[field & 3]
+            content_size = (single_segment, 2, 4, 8)[field >> 6]
+            self._checksum = 4 if field & 4 else 0
+            self._skip = window_size + dict_id_size + content_size
+            self._state, self._need = "block", 3
+        else:
+            last_block = field & 1
+            block_type = field >> 1 & 3
+            # RLEブロックは1バイトの値を繰り返す
+            self._skip = 1 if block_type == 1 else field >> 3
+            if last_block:
+                self._skip += self._checksum
+                self._state, self._need = "magic", 4
+
+
+class _ZstdReader(io.RawIOBase):
+    """
+    zstdのストリーミング展開（複数フレームの連結に対応）
+    展開は要求されたサイズ単位で行うため、圧縮率が高いフレームでもメモリ使用量は一定に保たれる
+    gzip / bz2 と同様に、途中で途切れたストリームは EOFError、壊れたデータは ValueError にする
+    """
+
+    def __init__(self, raw, zstandard):
+        self._zstandard = zstandard
+        self._tracker = _ZstdFrameTracker(raw)
+        self._reader = zstandard.ZstdDecompressor().stream_reader(
+            self._tracker,
+            read_size=_ZSTD_READ_SIZE,
+            read_across_frames=True,
+            closefd=False,
+        )
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            size = self._reader.readinto(buffer)
+        except self._zstandard.ZstdError as e:
+            raise ValueError(f"zstd圧縮データを展開できません: {e}")
+        if size == 0 and not self._tracker.complete:
+            raise EOFError(
+                "Compressed file ended before the end-of-stream marker was reached"
+            )
+        return size
+
+
+def _open_zstd(raw):
+    """zstdのストリーミング展開（zstandardパッケージは使用時のみ必要）"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(
+            "zstd圧縮ファイルの読み込みには zstandard パッケージが必要です" "（pip install zstandard）"
+        )
+    return io.BufferedReader(_ZstdReader(raw, zstandard), buffer_size=_BUFFER_SIZE)
+
+
+class InputSource:
+    """
+    インポート対象の入力（バイナリストリーム）
+    stream は展開後のデータを返し、read() / readline() に対応する
+    """
+
+    def __init__(self, file_path):
+        """
+        入力を開き、圧縮形式を判定する
+
+        Args:
+            file_path: ファイルのパス（"-" の場合は標準入力）
+
+        Raises:
+            ValueError: 圧縮形式に必要なパッケージがない場合
+        """
+        self.file_path = file_path
+        self.is_stdin = file_path == STDIN
+        if self.is_stdin:
+            raw = sys.stdin.buffer
+        else:
+            raw = open(file_path, "rb", buffering=_BUFFER_SIZE)
+        if not hasattr(raw, "peek"):
+            raw = io.BufferedReader(raw, buffer_size=_BUFFER_SIZE)
+        self._raw = raw
+
+        # peek は読み込み位置を進めないため、判定後も先頭から展開できる
+        self.codec = detect_codec(raw.peek(4)[:4])
+        if self.codec == "gzip":
+            self.stream = io.BufferedReader(
+                gzip.GzipFile(fileobj=raw, mode="rb"), buffer_size=_BUFFER_SIZE
+            )
+        elif self.codec == "bz2":
+            self.stream = io.BufferedReader(
+                bz2.BZ2File(raw, mode="rb"), buffer_size=_BUFFER_SIZE
+            )
+        elif self.codec == "zstd":
+            try:
+                self.stream = _open_zstd(raw)
+            except ValueError:
+                if not self.is_stdin:
+                    raw.close()
+                raise
+        else:
+            self.stream = raw
+
+    @property
+    def seekable(self):
+        """非圧縮の通常ファイルのみ任意の位置を直接読める（並列の範囲分割・再開に使用）"""
+        return not self.is_stdin and self.codec is None
+
+    @property
+    def total_bytes(self):
+        """展開後のサイズ（事前に分かる場合のみ。圧縮ファイルや標準入力はNone）"""
+        if not self.seekable:
+            return None
+        return os.path.getsize(self.file_path)
+
+    def close(self):
+        """入力を閉じる（標準入力は閉じない）"""
+        if self.stream is not self._raw:
+            self.stream.close()
+        if not self.is_stdin:
+            self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,649 @@
+"""
+CSVインポートの並列パイプライン
+ファイルをレコード境界に揃えたバイト範囲に分割し、ワーカープロセスで解析・型変換した行を
+有界キュー経由で1つ以上の書き込みスレッド（それぞれ独立したDB接続）に渡します
+圧縮ファイルや標準入力はシークできないため、メインプロセスが順に読み込んだブロックを
+レコード境界で区切ってワーカーに渡します
+"""
+import csv
+import io
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from app.database.connection import SessionLocal
+from app.database.repositories import InfluencerPostRepository
+from app.models.database_models import InfluencerPost
+from cli.import_csv import (
+    COPY_COLUMNS,
+    ByteOffsetLines,
+    flush_records,
+    parse_row,
+    refresh_rollups,
+    validate_csv_columns,
+)
+from cli.import_progress import (
+    ImportProgress,
+    clear_checkpoint,
+    load_checkpoint,
+    save_checkpoint,
+)
+from cli.input_source import STDIN, InputSource
+
+logger = logging.getLogger(__name__)
+
+# ワーカーに割り当てるバイト範囲の目安（メモリ使用量はおおよそ in-flight 数 × この値）
+CHUNK_BYTES = int(os.getenv("IMPORT_CHUNK_BYTES", str(8 * 1024 * 1024)))
+# レコード境界を探す際の読み込み単位
+_SCAN_BLOCK_BYTES = 1024 * 1024
+# 書き込みスレッドの停止を検知するためのキュー投入タイムアウト（秒）
+_PUT_TIMEOUT = 1.0
+
+
+def _count_quotes(file_path, start, end):
+    """
+    バイト範囲に含まれるダブルクォートの数を数える（ワーカープロセスで実行）
+
+    Args:
+        file_path: CSVファイルのパス
+        start: 開始オフセット
+        end: 終了オフセット
+
+    Returns:
+        int: ダブルクォートの数
+    """
+    count = 0
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(_SCAN_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            count += block.count(b'"')
+            remaining -= len(block)
+    return count
+
+
+def _align_to_record(f, offset, parity, file_size):
+    """
+    オフセット以降で最初のレコード境界（クォート外の改行の直後）を探す
+    RFC 4180 のCSVでは、先頭からのクォート数が偶数の位置にある改行だけがレコード区切りになる
+
+    Args:
+        f: バイナリモードで開いたファイル
+        offset: 探索開始オフセット
+        parity: データ先頭から offset までのクォート数の偶奇（0 または 1）
+        file_size: ファイルサイズ
+
+    Returns:
+        int: レコード境界のオフセット（見つからない場合はファイル末尾）
+    """
+    f.seek(offset)
+    position = offset
+    while True:
+        block = f.read(_SCAN_BLOCK_BYTES)
+        if not block:
+            return file_size
+        checked = 0
+        newline = block.find(b"\n")
+        while newline != -1:
+            parity = (parity + block.count(b'"', checked, newline)) % 2
+            checked = newline
+            if parity == 0:
+                return position + newline + 1
+            newline = block.find(b"\n", newline + 1)
+        parity = (parity + block.count(b'"', checked)) % 2
+        position += len(block)
+
+
+def _parse_chunk(file_path, start, end, start_parity, end_parity, fieldnames):
+    """
+    バイト範囲をレコード境界に揃えて解析し、型変換済みの行を返す（ワーカープロセスで実行）
+    隣接する範囲は同じ規則で境界を決めるため、各レコードはちょうど1つの範囲で処理される
+
+    Args:
+        file_path: CSVファイルのパス
+        start: 範囲の開始オフセット（データ先頭の場合はそのまま境界として扱う）
+        end: 範囲の終了オフセット（ファイル末尾の場合はそのまま境界として扱う）
+        start_parity: データ先頭から start までのクォート数の偶奇（Noneは境界確定済み）
+        end_parity: データ先頭から end までのクォート数の偶奇（Noneは境界確定済み）
+        fieldnames: CSVヘッダーのカラム名
+
+    Returns:
+        dict: 型変換済みの行・行数・エラー行数・インフルエンサーIDの集合・
+            揃えた終了オフセット・解析と型変換の処理時間
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        if start_parity is not None:
+            start = _align_to_record(f, start, start_parity, file_size)
+        if end_parity is not None:
+            end = _align_to_record(f, end, end_parity, file_size)
+        data = b""
+        if start < end:
+            f.seek(start)
+            data = f.read(end - start)
+    return _parse_block(data, start, fieldnames)
+
+
+def _parse_block(data, start, fieldnames):
+    """
+    レコード境界で区切られたバイト列を解析し、型変換済みの行を返す（ワーカープロセスで実行）
+
+    Args:
+        data: レコード境界で始まり、レコード境界で終わるバイト列
+        start: data の先頭オフセット
+        fieldnames: CSVヘッダーのカラム名
+
+    Returns:
+        dict: _parse_chunk と同じ形式の結果
+    """
+    started = time.perf_counter()
+    records = [
+        values
+        for values in csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+        if values
+    ]
+    parsed = time.perf_counter()
+
+    rows = []
+    error_count = 0
+    influencer_ids = set()
+    for row_number, values in enumerate(records, 1):
+        try:
+            if len(values) != len(fieldnames):
+                raise ValueError(f"カラム数が一致しません: {len(values)}")
+            row = parse_row(dict(zip(fieldnames, values)))
+        except (ValueError, KeyError) as e:
+            error_count += 1
+            logger.error(f"オフセット{start}以降の{row_number}行目の処理でデータエラー: {str(e)}")
+            continue
+        rows.append(row)
+        influencer_ids.add(row["influencer_id"])
+
+    return {
+        "rows": rows,
+        "row_count": len(records),
+        "error_count": error_count,
+        "influencer_ids": influencer_ids,
+        "end": start + len(data),
+        "parse_seconds": parsed - started,
+        "convert_seconds": time.perf_counter() - parsed,
+    }
+
+
+def split_byte_ranges(data_start, file_size, chunk_bytes=CHUNK_BYTES):
+    """
+    データ部分をおおよそ chunk_bytes ごとのバイト範囲に分割（境界はまだ揃えない）
+
+    Args:
+        data_start: ヘッダー直後のオフセット
+        file_size: ファイルサイズ
+        chunk_bytes: 範囲の大きさの目安
+
+    Returns:
+        list: (開始, 終了) オフセットのリスト
+    """
+    chunk_bytes = max(chunk_bytes, 1)
+    offsets = list(range(data_start, file_size, chunk_bytes)) + [file_size]
+    return [(offsets[i], offsets[i + 1]) for i in range(len(offsets) - 1)]
+
+
+def _last_record_boundary(data):
+    """
+    レコード境界で始まるバイト列の中で、最後のレコード境界（クォート外の改行の直後）を探す
+
+    Args:
+        data: レコード境界で始まるバイト列
+
+    Returns:
+        int: 最後のレコード境界の位置（見つからない場合は0）
+    """
+    parity = data.count(b'"') % 2
+    position = len(data)
+    while True:
+        newline = data.rfind(b"\n", 0, position)
+        if newline == -1:
+            return 0
+        # 改行より前にあるクォート数の偶奇
+        parity = (parity - data.count(b'"', newline, position)) % 2
+        if parity == 0:
+            return newline + 1
+        position = newline
+
+
+def read_blocks(stream, offset, chunk_bytes=CHUNK_BYTES):
+    """
+    シークできないストリームを順に読み込み、レコード境界で区切ったブロックを返すジェネレータ
+    ブロックの末尾に残った途中のレコードは次のブロックの先頭に持ち越す
+
+    Args:
+        stream: レコード境界の位置まで読み込んだバイナリストリーム
+        offset: 現在の読み込み位置（データ先頭からのバイト数）
+        chunk_bytes: 1回に読み込むバイト数の目安
+
+    Yields:
+        tuple: (ブロックの先頭オフセット, ブロックのバイト列)
+    """
+    carry = b""
+    while True:
+        block = stream.read(max(chunk_bytes, 1))
+        if not block:
+            if carry:
+                yield offset, carry
+            return
+        data = carry + block
+        boundary = _last_record_boundary(data)
+        carry = data[boundary:]
+        if boundary:
+            yield offset, data[:boundary]
+            offset += boundary
+
+
+def _range_tasks(pool, file_path, data_start, fieldnames):
+    """
+    通常のファイルをバイト範囲に分割し、各範囲の解析タスクを返すジェネレータ
+    範囲ごとのクォート数をワーカーで並列に数え、各範囲の先頭の偶奇を求めてから解析させる
+
+    Args:
+        pool: プロセスプール
+        file_path: CSVファイルのパス
+        data_start: 解析を開始するレコード境界のオフセット
+        fieldnames: CSVヘッダーのカラム名
+
+    Yields:
+        tuple: (ワーカーで実行する関数, 引数のタプル)
+    """
+    ranges = split_byte_ranges(data_start, os.path.getsize(file_path))
+    # 各範囲の先頭までのクォート数の偶奇（データ先頭は0）
+    quote_counts = list(
+        pool.map(
+            _count_quotes,
+            [file_path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+        )
+    )
+    parities = [0]
+    for count in quote_counts:
+        parities.append((parities[-1] + count) % 2)
+
+    for index, (start, end) in enumerate(ranges):
+        yield _parse_chunk, (
+            file_path,
+            start,
+            end,
+            None if index == 0 else parities[index],
+            None if index == len(ranges) - 1 else parities[index + 1],
+            fieldnames,
+        )
+
+
+def _block_tasks(stream, data_start, fieldnames):
+    """
+    シークできないストリームをブロックに区切り、各ブロックの解析タスクを返すジェネレータ
+
+    Args:
+        stream: レコード境界の位置まで読み込んだバイナリストリーム
+        data_start: 現在の読み込み位置
+        fieldnames: CSVヘッダーのカラム名
+
+    Yields:
+        tuple: (ワーカーで実行する関数, 引数のタプル)
+    """
+    for start, data in read_blocks(stream, data_start, CHUNK_BYTES):
+        yield _parse_block, (data, start, fieldnames)
+
+
+def _create_pool(workers):
+    """解析用のプロセスプールを作成"""
+    # CLIから起動されるスレッドを持つ親プロセスからのforkを避けるためspawnを使用
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _to_records(rows, mode):
+    """
+    書き込み方式に応じてバッチを変換
+    並行する書き込みスレッド間でのロック順序を揃えるため post_id 順に並べる（安定ソート）
+
+    Args:
+        rows: 型変換済みの行のリスト
+        mode: インポート方式（orm / copy / upsert）
+
+    Returns:
+        list: flush_records に渡すレコードリスト
+    """
+    rows = sorted(rows, key=lambda row: row["post_id"])
+    if mode == "orm":
+        return [InfluencerPost(**row) for row in rows]
+    return rows
+
+
+class _CommitTracker:
+    """
+    書き込みスレッドのコミット完了を範囲ごとに追跡し、先頭から連続してコミット済みになった
+    範囲の終端をチェックポイントとして保存する（書き込みスレッドが複数でも再開位置は常に安全）
+    """
+
+    def __init__(self, file_path, mode, progress, start_rows):
+        """
+        コンストラクタ
+
+        Args:
+            file_path: CSVファイルのパス（Noneの場合はチェックポイントを保存しない）
+            mode: インポート方式
+            progress: 進捗を集計する ImportProgress
+            start_rows: 処理開始時の行数（再開時はチェックポイントの行数）
+        """
+        self.file_path = file_path
+        self.mode = mode
+        self.progress = progress
+        self.committed_rows = start_rows
+        self._lock = threading.Lock()
+        # ファイル書き込み中に範囲の登録を待たせないよう、保存は別のロックで直列化する
+        self._save_lock = threading.Lock()
+        self._saved_offset = -1
+        self._chunks = {}
+        self._next_index = 0
+
+    def register(self, index, batches, row_count, end):
+        """
+        範囲の解析結果を登録（範囲の順に呼び出す）
+
+        Args:
+            index: 範囲の番号
+            batches: 書き込みキューに投入するバッチ数
+            row_count: 範囲の行数（エラー行を含む）
+            end: 範囲の終了オフセット（次のレコードの先頭）
+        """
+        with self._lock:
+            self._chunks[index] = {"remaining": batches, "rows": row_count, "end": end}
+            committed = self._advance()
+        self._save(committed)
+
+    def batch_done(self, index):
+        """
+        バッチのコミット完了を記録
+
+        Args:
+            index: バッチが属する範囲の番号
+        """
+        with self._lock:
+            self._chunks[index]["remaining"] -= 1
+            committed = self._advance()
+        self._save(committed)
+
+    def _advance(self):
+        """
+        先頭から連続してコミット済みの範囲まで進める（_lock を保持して呼び出す）
+
+        Returns:
+            tuple: 進んだ場合は (終了オフセット, コミット済みの行数)、進まなかった場合はNone
+        """
+        committed = None
+        while self._chunks.get(self._next_index, {}).get("remaining") == 0:
+            chunk = self._chunks.pop(self._next_index)
+            self._next_index += 1
+            self.committed_rows += chunk["rows"]
+            self.progress.advance(chunk["rows"], chunk["end"])
+            committed = (chunk["end"], self.committed_rows)
+        return committed
+
+    def _save(self, committed):
+        """
+        チェックポイントを保存（後から保存された古い位置で上書きしない）
+
+        Args:
+            committed: _advance の戻り値
+        """
+        if committed is None:
+            return
+        offset, rows = committed
+        with self._save_lock:
+            if offset <= self._saved_offset:
+                return
+            if self.file_path is not None:
+                save_checkpoint(self.file_path, self.mode, offset, rows)
+            self._saved_offset = offset
+        self.progress.maybe_report()
+
+
+class _WriterPool:
+    """
+    有界キューからバッチを受け取り、独立したDBセッションで書き込むスレッド群
+    """
+
+    def __init__(self, writers, mode, queue_size, tracker):
+        """
+        コンストラクタ
+
+        Args:
+            writers: 書き込みスレッド数
+            mode: インポート方式（orm / copy / upsert）
+            queue_size: キューに保持するバッチ数の上限
+            tracker: コミット完了を記録する _CommitTracker
+        """
+        self.mode = mode
+        self.tracker = tracker
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.failed = threading.Event()
+        self.error = None
+        self._lock = threading.Lock()
+        self._written = 0
+        self._threads = [
+            threading.Thread(target=self._run, name=f"import-writer-{i}", daemon=True)
+            for i in range(writers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        """書き込みスレッドの本体"""
+        db = SessionLocal()
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                if self.failed.is_set():
+                    continue
+                index, rows = item
+                with self._lock:
+                    self._written += len(rows)
+                    written = self._written
+                with self.tracker.progress.stage("write"):
+                    flush_records(db, _to_records(rows, self.mode), written, self.mode)
+                self.tracker.batch_done(index)
+        except Exception as e:
+            db.rollback()
+            self.error = e
+            self.failed.set()
+            logger.error(f"書き込み中にエラーが発生: {str(e)}")
+            # 残りのバッチを破棄して送り手のブロックを解除
+            while self.queue.get() is not None:
+                pass
+        finally:
+            db.close()
+
+    def put(self, index, rows):
+        """
+        バッチをキューに投入（キューが満杯の間はブロックする）
+
+        Args:
+            index: バッチが属する範囲の番号
+            rows: 型変換済みの行のリスト
+
+        Raises:
+            Exception: 書き込みスレッドでエラーが発生していた場合
+        """
+        while True:
+            if self.failed.is_set():
+                raise self.error
+            try:
+                self.queue.put((index, rows), timeout=_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """
+        全スレッドに終了を通知して待機
+
+        Raises:
+            Exception: 書き込みスレッドでエラーが発生していた場合
+        """
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def process_csv_file_parallel(
+    file_path, db, batch_size, mode="orm", workers=1, writers=1, resume=False
+):
+    """
+    CSVファイルを並列パイプラインで処理する
+    1. 範囲ごとのクォート数をワーカーで並列に数え、各範囲の先頭の偶奇を求める
+       （圧縮ファイル・標準入力の場合はメインプロセスがレコード境界で区切ったブロックを渡す）
+    2. ワーカーが範囲をレコード境界に揃えて解析・型変換する
+    3. 結果をバッチに分けて有界キューに投入し、書き込みスレッドがコミットする
+    先頭から連続してコミット済みになった範囲の終端をチェックポイントとして保存する
+
+    Args:
+        file_path: CSVファイルのパス（"-" の場合は標準入力）
+        db: データベースセッション（集計テーブルの更新に使用）
+        batch_size: バッチサイズ
+        mode: インポート方式（orm / copy / upsert）
+        workers: 解析ワーカープロセス数
+        writers: 書き込みスレッド（DB接続）数
+        resume: チェックポイントから再開するかどうか
+
+    Returns:
+        bool: 処理成功/失敗
+    """
+    if resume and file_path == STDIN:
+        logger.error("標準入力からのインポートはチェックポイントから再開できません")
+        return False
+    try:
+        checkpoint = load_checkpoint(file_path, mode) if resume else None
+    except ValueError as e:
+        logger.error(str(e))
+        return False
+
+    with InputSource(file_path) as source:
+        lines = ByteOffsetLines(source.stream)
+        reader = csv.DictReader([next(lines, "")])
+        if not validate_csv_columns(reader, COPY_COLUMNS):
+            return False
+        fieldnames = reader.fieldnames
+
+        row_count = 0
+        influencer_ids = set()
+        if checkpoint is not None:
+            # チェックポイントはレコード境界なので、そこからのクォート数の偶奇は0から数えられる
+            lines.seek(checkpoint["offset"])
+            row_count = checkpoint["rows"]
+            influencer_ids = None
+            logger.info(f"チェックポイントから再開: {row_count}行目の次から")
+        data_start = lines.offset
+
+        progress = ImportProgress(
+            source.total_bytes, start_offset=data_start, start_rows=row_count
+        )
+        tracker = _CommitTracker(
+            None if source.is_stdin else file_path, mode, progress, row_count
+        )
+        error_count = 0
+        writer_pool = _WriterPool(
+            max(writers, 1), mode, queue_size=max(writers, 1) * 2, tracker=tracker
+        )
+        with _create_pool(max(workers, 1)) as pool:
+            try:
+                if source.seekable:
+                    tasks = _range_tasks(pool, file_path, data_start, fieldnames)
+                else:
+                    tasks = _block_tasks(source.stream, data_start, fieldnames)
+
+                # 結果を受け取る順序を保ちつつ、同時に処理する範囲の数を制限する
+                pending = deque()
+                max_in_flight = max(workers, 1) * 2
+                for index, (func, args) in enumerate(tasks):
+                    pending.append((index, pool.submit(func, *args)))
+                    if len(pending) >= max_in_flight:
+                        error_count += _drain_one(
+                            pending, writer_pool, tracker, batch_size, influencer_ids
+                        )
+                while pending:
+                    error_count += _drain_one(
+                        pending, writer_pool, tracker, batch_size, influencer_ids
+                    )
+            finally:
+                writer_pool.close()
+
+    if writers > 1:
+        advance_data_version(db, influencer_ids)
+    # インポート完了後に対象インフルエンサーの集計値をまとめて更新
+    refresh_rollups(db, influencer_ids)
+    if file_path != STDIN:
+        clear_checkpoint(file_path)
+
+    logger.info(f"インポート完了: 合計{tracker.committed_rows}件（エラー: {error_count}件）")
+    progress.summary()
+    return True
+
+
+def advance_data_version(db, influencer_ids):
+    """
+    全ての書き込みスレッドのコミット後に、インポートしたインフルエンサーのデータバージョンを進める
+    updated_at はトランザクションの開始時刻のため、複数の書き込みスレッドでは開始の早い
+    トランザクションが後からコミットされると、その投稿のデータバージョンが進まず、
+    それより前にキャッシュした分析結果（キャッシュキー・ETag）が使われ続けてしまう
+
+    Args:
+        db: データベースセッション
+        influencer_ids: 対象インフルエンサーIDの集合（Noneの場合は全インフルエンサー）
+    """
+    InfluencerPostRepository(db).touch_latest_posts(
+        None if influencer_ids is None else sorted(influencer_ids)
+    )
+    db.commit()
+
+
+def _drain_one(pending, writer_pool, tracker, batch_size, influencer_ids):
+    """
+    最も古い範囲の解析結果を受け取り、バッチに分けて書き込みキューに投入
+
+    Args:
+        pending: (範囲の番号, Future) の両端キュー
+        writer_pool: 書き込みスレッド群
+        tracker: コミット完了を記録する _CommitTracker
+        batch_size: バッチサイズ
+        influencer_ids: 対象インフルエンサーIDの集合（Noneの場合は収集しない）
+
+    Returns:
+        int: 範囲のエラー行数
+    """
+    index, future = pending.popleft()
+    result = future.result()
+    tracker.progress.add_stage_time("parse", result["parse_seconds"])
+    tracker.progress.add_stage_time("convert", result["convert_seconds"])
+    if influencer_ids is not None:
+        influencer_ids.update(result["influencer_ids"])
+
+    rows = result["rows"]
+    batches = [rows[i : i + batch_size] for i in range(0, len(rows), batch_size)]
+    # バッチを投入する前に登録し、コミット完了の記録と競合しないようにする
+    tracker.register(index, len(batches), result["row_count"], result["end"])
+    for batch in batches:
+        writer_pool.put(index, batch)
+    return result["error_count"]
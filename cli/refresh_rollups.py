@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+投稿データから集計テーブル（ランキング用のロールアップ）を再構築するCLIツール
+集計テーブルの導入前にインポートされたデータの初期構築や、手動でのデータ修正後に使用
+"""
+import argparse
+import logging
+import os
+import sys
+
+# ルートディレクトリをPython pathに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# 注意: このインポートはsys.pathの設定後に行う必要があるため、E402警告を無視します
+from app.database.connection import SessionLocal  # noqa: E402
+from app.database.repositories import InfluencerStatsRepository  # noqa: E402
+
+# ロギング設定
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """コマンドライン引数のパース"""
+    parser = argparse.ArgumentParser(description="投稿データから集計テーブルを再構築")
+    parser.add_argument(
+        "--influencer-id",
+        type=int,
+        action="append",
+        dest="influencer_ids",
+        help="対象のインフルエンサーID（複数指定可、省略時は全件）",
+    )
+    return parser.parse_args()
+
+
+def refresh_rollups(db, influencer_ids=None):
+    """
+    集計テーブルを再計算してコミット
+
+    Args:
+        db: データベースセッション
+        influencer_ids: 対象のインフルエンサーID（Noneの場合は全件）
+    """
+    InfluencerStatsRepository(db).refresh(influencer_ids)
+    db.commit()
+    logger.info("集計テーブルの再構築完了")
+
+
+def main():
+    """メイン関数"""
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        refresh_rollups(db, args.influencer_ids)
+    except Exception as e:  # pragma: no cover
+        logger.error(f"再構築中に予期しないエラーが発生: {str(e)}")  # pragma: no cover
+        db.rollback()  # pragma: no cover
+        sys.exit(1)  # pragma: no cover
+    finally:
+        db.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
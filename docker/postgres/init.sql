@@ -16,6 +16,12 @@ CREATE TABLE IF NOT EXISTS influencer_posts (
 -- インフルエンサーIDに対するインデックス（頻繁に検索・集計に使用されるため）
 CREATE INDEX IF NOT EXISTS idx_influencer_posts_influencer_id ON influencer_posts (influencer_id);
 
+-- インフルエンサーごとの最終更新日時に対するインデックス（キャッシュのデータバージョン判定に使用）
+CREATE INDEX IF NOT EXISTS idx_influencer_posts_influencer_updated ON influencer_posts (influencer_id, updated_at);
+
+-- 全体の最終更新日時に対するインデックス（全インフルエンサーのタグ集計のデータバージョン判定に使用）
+CREATE INDEX IF NOT EXISTS idx_influencer_posts_updated ON influencer_posts (updated_at);
+
 -- 投稿日時に対するインデックス（日付範囲での検索・ソートに使用）
 CREATE INDEX IF NOT EXISTS idx_influencer_posts_post_date ON influencer_posts (post_date);
 
@@ -39,3 +45,78 @@ CREATE TRIGGER set_updated_at
 BEFORE UPDATE ON influencer_posts
 FOR EACH ROW
 EXECUTE FUNCTION update_updated_at_column();
+
+-- 投稿IDの一意制約（モデル定義の unique=True に合わせる）
+CREATE UNIQUE INDEX IF NOT EXISTS idx_influencer_posts_post_id ON influencer_posts (post_id);
+
+-- 投稿ごとの名詞出現回数テーブル（インポート時に形態素解析した結果を保存）
+CREATE TABLE IF NOT EXISTS influencer_post_nouns (
+    id SERIAL PRIMARY KEY,
+    post_id BIGINT NOT NULL REFERENCES influencer_posts (post_id) ON DELETE CASCADE,
+    influencer_id INT NOT NULL,
+    word TEXT NOT NULL,
+    count INT NOT NULL DEFAULT 1
+);
+
+-- 投稿単位での入れ替えに使用
+CREATE INDEX IF NOT EXISTS idx_influencer_post_nouns_post_id ON influencer_post_nouns (post_id);
+
+-- インフルエンサー単位のキーワード集計に使用
+CREATE INDEX IF NOT EXISTS idx_influencer_post_nouns_influencer_word ON influencer_post_nouns (influencer_id, word);
+
+-- 投稿ごとのハッシュタグ・メンション出現回数テーブル（インポート時に正規表現で抽出した結果を保存）
+CREATE TABLE IF NOT EXISTS influencer_post_tags (
+    id SERIAL PRIMARY KEY,
+    post_id BIGINT NOT NULL REFERENCES influencer_posts (post_id) ON DELETE CASCADE,
+    influencer_id INT NOT NULL,
+    tag_type VARCHAR(10) NOT NULL,
+    tag TEXT NOT NULL,
+    count INT NOT NULL DEFAULT 1
+);
+
+-- 投稿単位での入れ替えに使用
+CREATE INDEX IF NOT EXISTS idx_influencer_post_tags_post_id ON influencer_post_tags (post_id);
+
+-- インフルエンサー単位・全体のタグ集計に使用
+CREATE INDEX IF NOT EXISTS idx_influencer_post_tags_influencer_type_tag ON influencer_post_tags (influencer_id, tag_type, tag);
+CREATE INDEX IF NOT EXISTS idx_influencer_post_tags_type_tag ON influencer_post_tags (tag_type, tag);
+
+-- インフルエンサーごとの集計値テーブル（ランキング用のロールアップ、インポート時に更新）
+CREATE TABLE IF NOT EXISTS influencer_stats (
+    influencer_id INT PRIMARY KEY,
+    sum_likes BIGINT NOT NULL DEFAULT 0,
+    sum_comments BIGINT NOT NULL DEFAULT 0,
+    post_count INT NOT NULL DEFAULT 0,
+    avg_likes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    avg_comments DOUBLE PRECISION NOT NULL DEFAULT 0,
+    median_likes DOUBLE PRECISION,
+    last_post_date TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 中央値カラムの追加前に作成されたテーブル向け（追加後に python -m cli.refresh_rollups で再計算する）
+ALTER TABLE influencer_stats ADD COLUMN IF NOT EXISTS median_likes DOUBLE PRECISION;
+
+-- ランキング（平均値の降順 + ID順）をインデックス順に読み出すためのインデックス
+CREATE INDEX IF NOT EXISTS idx_influencer_stats_avg_likes ON influencer_stats (avg_likes DESC, influencer_id);
+CREATE INDEX IF NOT EXISTS idx_influencer_stats_avg_comments ON influencer_stats (avg_comments DESC, influencer_id);
+
+-- 集計値の最終更新日時に対するインデックス（ランキングのデータバージョン判定に使用）
+CREATE INDEX IF NOT EXISTS idx_influencer_stats_updated ON influencer_stats (updated_at);
+
+-- インフルエンサーごと・投稿日ごとの集計値テーブル（期間指定ランキング用のロールアップ、インポート時に更新）
+CREATE TABLE IF NOT EXISTS influencer_daily_stats (
+    influencer_id INT NOT NULL,
+    day DATE NOT NULL,
+    sum_likes BIGINT NOT NULL DEFAULT 0,
+    sum_comments BIGINT NOT NULL DEFAULT 0,
+    post_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (influencer_id, day)
+);
+
+-- 期間内の日別集計値をテーブルを読まずにインデックスのみで合計するためのインデックス
+CREATE INDEX IF NOT EXISTS idx_influencer_daily_stats_day ON influencer_daily_stats (day, influencer_id) INCLUDE (sum_likes, sum_comments, post_count);
+
+-- 日別集計値の最終更新日時に対するインデックス（期間指定ランキングのデータバージョン判定に使用）
+CREATE INDEX IF NOT EXISTS idx_influencer_daily_stats_updated ON influencer_daily_stats (updated_at);
@@ -1,12 +1,26 @@
 """
 APIテスト用のフィクスチャ設定ファイル
 """
-import pytest
-from unittest.mock import MagicMock
-from fastapi.testclient import TestClient
-from app.main import app
-from app.database.connection import get_db
-from app.models.schemas import KeywordCount
+import os
+
+# クエリ数のヘッダーはデフォルトで無効のため、テストではアプリのインポート前に有効にする
+os.environ.setdefault("DB_QUERY_COUNT_HEADER", "True")
+
+import pytest  # noqa: E402
+from unittest.mock import MagicMock  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from app.main import app  # noqa: E402
+from app.database.connection import get_db  # noqa: E402
+from app.dependencies.cache_utils import cache  # noqa: E402
+from app.models.schemas import KeywordCount  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """テスト間でキャッシュ（レスポンスキャッシュを含む）を共有しないようにクリア"""
+    cache.clear()
+    yield
+    cache.clear()
 
 
 @pytest.fixture
@@ -2,7 +2,9 @@
 analytics.pyのテスト
 APIルーターのテストを行う
 """
-from unittest.mock import patch
+from datetime import datetime
+from unittest.mock import ANY, patch
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
 from app.main import app
@@ -10,16 +12,24 @@ from app.main import app
 client = TestClient(app)
 
 
+DATA_VERSION = datetime(2023, 1, 1, 12, 0, 0)
+
+
+@patch(
+    "app.routers.analytics.text_analysis_service.get_influencer_data_version",
+    return_value=DATA_VERSION,
+)
 class TestAnalyticsEndpoints:
     @patch("app.routers.analytics.text_analysis_service.get_influencer_keywords")
     def test_get_influencer_keywords_success(
-        self, mock_get_keywords, api_test_client, mock_keywords
+        self, mock_get_keywords, mock_version, api_test_client, mock_keywords
     ):
         """インフルエンサーキーワード分析エンドポイントの正常系テスト"""
         # サービスメソッドをモック - KeywordCountオブジェクトをディクショナリに変換
-        mock_get_keywords.return_value = [
-            {"word": kw.word, "count": kw.count} for kw in mock_keywords
-        ]
+        mock_get_keywords.return_value = {
+            "keywords": [{"word": kw.word, "count": kw.count} for kw in mock_keywords],
+            "total_analyzed_posts": 15,
+        }
 
         # APIリクエスト
         response = api_test_client.get("/api/v1/analytics/1/keywords?limit=10")
@@ -31,11 +41,33 @@ class TestAnalyticsEndpoints:
         assert len(data["keywords"]) == 3
         assert data["keywords"][0]["word"] == "インスタグラム"
         assert data["keywords"][0]["count"] == 10
-        assert "total_analyzed_posts" in data
+        assert data["total_analyzed_posts"] == 15
+
+    @patch("app.dependencies.utils.FAST_JSON_RESPONSE", True)
+    @patch("app.routers.analytics.text_analysis_service.get_influencer_keywords")
+    def test_get_influencer_keywords_fast_json_response(
+        self, mock_get_keywords, mock_version, api_test_client, mock_db_session
+    ):
+        """高速レスポンスモードでは検証を省いてorjsonでシリアライズするテスト"""
+        mock_get_keywords.return_value = {
+            "keywords": [{"word": "カフェ", "count": 3}],
+            "total_analyzed_posts": 15,
+        }
+
+        response = api_test_client.get("/api/v1/analytics/1/keywords?limit=10")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "keywords": [{"word": "カフェ", "count": 3}],
+            "total_analyzed_posts": 15,
+        }
+        assert "etag" in response.headers
+        # 投稿数はサービスが返すため、ルーターではデータベースに問い合わせない
+        mock_db_session.query.assert_not_called()
 
     @patch("app.routers.analytics.text_analysis_service.get_influencer_keywords")
     def test_get_influencer_keywords_exception(
-        self, mock_get_keywords, api_test_client
+        self, mock_get_keywords, mock_version, api_test_client
     ):
         """インフルエンサーキーワード分析エンドポイントの一般例外処理テスト"""
         # 一般例外を発生させる（60-61行目のカバレッジ向上）
@@ -48,6 +80,41 @@ class TestAnalyticsEndpoints:
         assert response.status_code == 500
         assert "Error analyzing keywords" in response.json()["detail"]
 
+    @patch("app.routers.analytics.text_analysis_service.get_influencer_keywords")
+    def test_get_influencer_keywords_conditional_get(
+        self, mock_get_keywords, mock_version, api_test_client, mock_keywords
+    ):
+        """データ未更新時に集計せず304を返すテスト"""
+        mock_get_keywords.return_value = {
+            "keywords": [{"word": kw.word, "count": kw.count} for kw in mock_keywords],
+            "total_analyzed_posts": 15,
+        }
+
+        response = api_test_client.get("/api/v1/analytics/1/keywords?limit=10")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert "last-modified" in response.headers
+        mock_get_keywords.assert_called_once_with(ANY, 1, 10, data_version=DATA_VERSION)
+
+        mock_get_keywords.reset_mock()
+        response = api_test_client.get(
+            "/api/v1/analytics/1/keywords?limit=10",
+            headers={"If-None-Match": f'W/{etag}, "other"'},
+        )
+        assert response.status_code == 304
+        mock_get_keywords.assert_not_called()
+
+    def test_get_influencer_keywords_not_found(self, mock_version, api_test_client):
+        """存在しないインフルエンサーでは404がそのまま返るテスト"""
+        mock_version.side_effect = HTTPException(
+            status_code=404, detail="Influencer with ID 999 not found"
+        )
+
+        response = api_test_client.get("/api/v1/analytics/999/keywords")
+
+        assert response.status_code == 404
+        assert "not found" in response.json()["detail"]
+
     # """
     # # エンゲージメントキーワード分析エンドポイントの例外処理テスト
     # # エンゲージメントキーワード分析エンドポイントのValueError処理テスト
@@ -114,7 +181,9 @@ class TestAnalyticsEndpoints:
     #     assert response.status_code == 500  # 現在の実装では500エラーが返る
 
     @patch("app.routers.analytics.text_analysis_service.get_influencer_keywords")
-    def test_get_influencer_keywords_general_exception(self, mock_get_keywords):
+    def test_get_influencer_keywords_general_exception(
+        self, mock_get_keywords, mock_version
+    ):
         """インフルエンサーのキーワード取得で一般的な例外が発生した場合のテスト"""
         # 一般的な例外を発生させるモック
         mock_get_keywords.side_effect = Exception("一般的なエラー")
@@ -148,3 +217,142 @@ class TestAnalyticsEndpoints:
     #     assert response.status_code == 200
     #     data = response.json()
     #     assert data["total_analyzed_posts"] == 100  # デフォルト値が使われる
+
+
+class TestTagEndpoints:
+    @patch("app.routers.analytics.tag_service.get_top_tags")
+    @patch("app.routers.analytics.InfluencerPostRepository")
+    def test_get_top_tags(self, mock_repository, mock_get_tags, api_test_client):
+        """全インフルエンサーのタグ集計エンドポイントのテスト（条件付きGETを含む）"""
+        repository = mock_repository.return_value
+        repository.get_latest_update_time.return_value = DATA_VERSION
+        mock_get_tags.return_value = {
+            "tags": [{"tag": "cafe", "count": 3}],
+            "total_analyzed_posts": 42,
+        }
+
+        response = api_test_client.get("/api/v1/analytics/tags?tag_type=mention")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "tag_type": "mention",
+            "tags": [{"tag": "cafe", "count": 3}],
+            "total_analyzed_posts": 42,
+        }
+        mock_get_tags.assert_called_once_with(ANY, "mention", DATA_VERSION, limit=20)
+
+        mock_get_tags.reset_mock()
+        response = api_test_client.get(
+            "/api/v1/analytics/tags?tag_type=mention",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert response.status_code == 304
+        mock_get_tags.assert_not_called()
+
+        # 同じデータバージョンではキャッシュしたボディを返し、集計しない
+        response = api_test_client.get("/api/v1/analytics/tags?tag_type=mention")
+        assert response.status_code == 200
+        assert response.json()["total_analyzed_posts"] == 42
+        mock_get_tags.assert_not_called()
+        repository.count_posts.assert_not_called()
+
+    @patch("app.routers.analytics.InfluencerPostRepository")
+    def test_get_top_tags_no_posts(self, mock_repository, api_test_client):
+        """投稿がない場合は空の結果を返すテスト"""
+        mock_repository.return_value.get_latest_update_time.return_value = None
+
+        response = api_test_client.get("/api/v1/analytics/tags")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "tag_type": "hashtag",
+            "tags": [],
+            "total_analyzed_posts": 0,
+        }
+
+    def test_get_top_tags_invalid_type(self, api_test_client):
+        """不正なタグの種別は422になるテスト"""
+        response = api_test_client.get("/api/v1/analytics/tags?tag_type=keyword")
+
+        assert response.status_code == 422
+
+    @patch("app.routers.analytics.tag_service.get_top_tags")
+    @patch("app.routers.analytics.InfluencerPostRepository")
+    def test_get_top_tags_exception(
+        self, mock_repository, mock_get_tags, api_test_client
+    ):
+        """タグ集計で例外が発生した場合は500を返すテスト"""
+        mock_repository.return_value.get_latest_update_time.return_value = DATA_VERSION
+        mock_get_tags.side_effect = Exception("集計エラー")
+
+        response = api_test_client.get("/api/v1/analytics/tags")
+
+        assert response.status_code == 500
+        assert "Error analyzing tags" in response.json()["detail"]
+
+    @patch("app.routers.analytics.tag_service.get_top_tags")
+    @patch("app.routers.analytics.InfluencerPostRepository")
+    def test_get_top_tags_http_exception(
+        self, mock_repository, mock_get_tags, api_test_client
+    ):
+        """集計中のHTTPExceptionは500に変換せずそのまま返すテスト"""
+        mock_repository.return_value.get_latest_update_time.return_value = DATA_VERSION
+        mock_get_tags.side_effect = HTTPException(status_code=503, detail="混雑中")
+
+        response = api_test_client.get("/api/v1/analytics/tags")
+
+        assert response.status_code == 503
+        assert response.json()["detail"] == "混雑中"
+
+    @patch("app.routers.analytics.tag_service.get_top_tags")
+    @patch(
+        "app.routers.analytics.text_analysis_service.get_influencer_data_version",
+        return_value=DATA_VERSION,
+    )
+    def test_get_influencer_tags(self, mock_version, mock_get_tags, api_test_client):
+        """インフルエンサー単位のタグ集計エンドポイントのテスト（条件付きGETを含む）"""
+        mock_get_tags.return_value = {
+            "tags": [{"tag": "ootd", "count": 2}],
+            "total_analyzed_posts": 7,
+        }
+
+        response = api_test_client.get("/api/v1/analytics/3/tags?limit=5")
+
+        assert response.status_code == 200
+        assert response.json()["tags"] == [{"tag": "ootd", "count": 2}]
+        assert response.json()["total_analyzed_posts"] == 7
+        mock_get_tags.assert_called_once_with(
+            ANY, "hashtag", DATA_VERSION, influencer_id=3, limit=5
+        )
+
+        mock_get_tags.reset_mock()
+        response = api_test_client.get(
+            "/api/v1/analytics/3/tags?limit=5",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert response.status_code == 304
+        mock_get_tags.assert_not_called()
+
+        response = api_test_client.get("/api/v1/analytics/3/tags?limit=5")
+        assert response.status_code == 200
+        assert response.json()["tags"] == [{"tag": "ootd", "count": 2}]
+        mock_get_tags.assert_not_called()
+
+    @patch("app.routers.analytics.tag_service.get_top_tags")
+    @patch(
+        "app.routers.analytics.text_analysis_service.get_influencer_data_version",
+        return_value=DATA_VERSION,
+    )
+    def test_get_influencer_tags_errors(
+        self, mock_version, mock_get_tags, api_test_client
+    ):
+        """存在しないインフルエンサーは404、集計エラーは500を返すテスト"""
+        mock_get_tags.side_effect = Exception("集計エラー")
+        response = api_test_client.get("/api/v1/analytics/3/tags")
+        assert response.status_code == 500
+
+        mock_version.side_effect = HTTPException(
+            status_code=404, detail="Influencer with ID 3 not found"
+        )
+        response = api_test_client.get("/api/v1/analytics/3/tags")
+        assert response.status_code == 404
@@ -0,0 +1,513 @@
+"""
+非同期DBパス（非同期リポジトリ・サービス・ルーター）のテスト
+"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.database.connection import get_async_db
+from app.database.repositories import (
+    AsyncInfluencerPostRepository,
+    AsyncInfluencerStatsRepository,
+)
+from app.dependencies.cache_utils import AsyncSingleFlight, SimpleCache
+from app.routers import async_analytics, async_influencer
+from app.services import influencer_service, text_analysis_service
+
+DATA_VERSION = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def async_db():
+    """非同期セッションのモック"""
+    db = MagicMock()
+    db.scalar = AsyncMock()
+    # execute の結果（Result）は同期メソッド all() を持つ
+    db.execute = AsyncMock(return_value=MagicMock())
+    return db
+
+
+@pytest.fixture
+def async_client(async_db):
+    """非同期ルーターのみを登録したテスト用クライアント"""
+    app = FastAPI()
+    app.include_router(async_influencer.router, prefix="/api/v1/influencers")
+    app.include_router(async_analytics.router, prefix="/api/v1/analytics")
+
+    async def override_get_async_db():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as client:
+        yield client
+
+
+class TestAsyncRepositories:
+    def test_post_repository(self, async_db):
+        """投稿リポジトリの非同期メソッドがセッションを await すること"""
+        repository = AsyncInfluencerPostRepository(async_db)
+
+        async_db.scalar.return_value = DATA_VERSION
+        assert asyncio.run(repository.get_latest_update_time(1)) == DATA_VERSION
+        assert asyncio.run(repository.get_latest_update_time()) == DATA_VERSION
+
+        async_db.scalar.return_value = None
+        assert asyncio.run(repository.count_posts(1)) == 0
+
+        rows = [SimpleNamespace(word="カフェ", count=3)]
+        async_db.execute.return_value.all.return_value = rows
+        assert asyncio.run(repository.get_keyword_counts(1, 100)) == rows
+
+    def test_stats_repository(self, async_db):
+        """集計リポジトリの非同期メソッドがセッションを await すること"""
+        repository = AsyncInfluencerStatsRepository(async_db)
+
+        async_db.scalar.return_value = DATA_VERSION
+        assert asyncio.run(repository.get_latest_update_time()) == DATA_VERSION
+
+        rows = [SimpleNamespace(influencer_id=1, avg_likes=10.0, total_posts=2)]
+        async_db.execute.return_value.all.return_value = rows
+        assert asyncio.run(repository.get_top_by_likes(5)) == rows
+        assert asyncio.run(repository.get_top_by_comments(5)) == rows
+        assert asyncio.run(repository.get_top_by_likes(5, (10.0, 1))) == rows
+        assert asyncio.run(repository.get_top_by_comments(5, (10.0, 1))) == rows
+        assert async_db.execute.await_count == 4
+        # 続きの取得はキーセット条件で絞り込む
+        stmt = async_db.execute.await_args[0][0]
+        assert "influencer_stats.influencer_id >" in str(stmt)
+
+        period = (datetime(2024, 1, 1).date(), DATA_VERSION.date())
+        assert asyncio.run(repository.get_top_in_period("likes", period, 5)) == rows
+        assert "influencer_daily_stats" in str(async_db.execute.await_args[0][0])
+        assert asyncio.run(repository.get_latest_daily_update_time()) == DATA_VERSION
+
+        assert asyncio.run(repository.get_ranking("posts", 1.0, 5)) == rows
+        assert "influencer_stats.post_count" in str(async_db.execute.await_args[0][0])
+
+
+class TestAsyncServices:
+    @patch("app.services.influencer_service.AsyncInfluencerStatsRepository")
+    def test_rankings(self, mock_repo_class):
+        """ランキングの非同期版が同期版と同じ形式で返すこと"""
+        repository = mock_repo_class.return_value
+        repository.get_latest_update_time = AsyncMock(return_value=DATA_VERSION)
+        repository.get_top_by_likes = AsyncMock(
+            return_value=[SimpleNamespace(influencer_id=1, avg_likes=10, total_posts=2)]
+        )
+        repository.get_top_by_comments = AsyncMock(
+            return_value=[
+                SimpleNamespace(influencer_id=2, avg_comments=3, total_posts=4)
+            ]
+        )
+        db = MagicMock()
+
+        assert (
+            asyncio.run(influencer_service.get_ranking_data_version_async(db))
+            == DATA_VERSION
+        )
+        assert asyncio.run(
+            influencer_service.get_top_influencers_by_likes_async(db, 5)
+        ) == [{"influencer_id": 1, "avg_value": 10.0, "total_posts": 2}]
+        assert asyncio.run(
+            influencer_service.get_top_influencers_by_comments_async(db, 5)
+        ) == [{"influencer_id": 2, "avg_value": 3.0, "total_posts": 4}]
+
+        cursor = influencer_service.encode_ranking_cursor(10.0, 1)
+        asyncio.run(
+            influencer_service.get_top_influencers_by_likes_async(db, 5, cursor)
+        )
+        repository.get_top_by_likes.assert_awaited_with(5, (10.0, 1))
+        asyncio.run(
+            influencer_service.get_top_influencers_by_comments_async(db, 5, cursor)
+        )
+        repository.get_top_by_comments.assert_awaited_with(5, (10.0, 1))
+
+        # 期間指定の場合は日別集計値から取得し、日別集計値の更新日時も含めて判定する
+        period = (datetime(2024, 1, 1).date(), DATA_VERSION.date())
+        repository.get_latest_daily_update_time = AsyncMock(return_value=None)
+        assert (
+            asyncio.run(influencer_service.get_ranking_data_version_async(db, period))
+            == DATA_VERSION
+        )
+        repository.get_top_in_period = AsyncMock(
+            return_value=[SimpleNamespace(influencer_id=3, avg_likes=5, total_posts=1)]
+        )
+        assert asyncio.run(
+            influencer_service.get_top_influencers_by_likes_async(db, 5, None, period)
+        ) == [{"influencer_id": 3, "avg_value": 5.0, "total_posts": 1}]
+        repository.get_top_in_period = AsyncMock(
+            return_value=[
+                SimpleNamespace(influencer_id=3, avg_comments=2, total_posts=1)
+            ]
+        )
+        assert asyncio.run(
+            influencer_service.get_top_influencers_by_comments_async(
+                db, 5, None, period
+            )
+        ) == [{"influencer_id": 3, "avg_value": 2.0, "total_posts": 1}]
+        repository.get_top_in_period.assert_awaited_once_with(
+            "comments", period, 5, None
+        )
+
+    @patch("app.services.influencer_service.AsyncInfluencerStatsRepository")
+    def test_metrics_ranking(self, mock_repo_class):
+        """指標別ランキングの非同期版が同期版と同じ形式で返すこと"""
+        repository = mock_repo_class.return_value
+        repository.get_ranking = AsyncMock(
+            return_value=[
+                SimpleNamespace(
+                    influencer_id=1,
+                    value=2,
+                    total_posts=2,
+                    avg_likes=10,
+                    avg_comments=3,
+                    median_likes=None,
+                )
+            ]
+        )
+
+        result = asyncio.run(
+            influencer_service.get_influencer_ranking_async(MagicMock(), "posts", 5)
+        )
+
+        assert result == [
+            {
+                "influencer_id": 1,
+                "value": 2.0,
+                "total_posts": 2,
+                "avg_likes": 10.0,
+                "avg_comments": 3.0,
+                "engagement": 13.0,
+                "median_likes": None,
+            }
+        ]
+        repository.get_ranking.assert_awaited_once_with("posts", 1.0, 5, None, None)
+
+    @patch("app.services.text_analysis_service.cache", new_callable=SimpleCache)
+    @patch("app.services.text_analysis_service.AsyncInfluencerPostRepository")
+    def test_keywords(self, mock_repo_class, _cache):
+        """キーワード分析の非同期版が上位100件と投稿数をキャッシュしてlimitで切り出すこと"""
+        repository = mock_repo_class.return_value
+        repository.get_latest_update_time = AsyncMock(return_value=DATA_VERSION)
+        repository.get_keyword_counts = AsyncMock(
+            return_value=[
+                SimpleNamespace(word="カフェ", count=3),
+                SimpleNamespace(word="旅行", count=2),
+            ]
+        )
+        repository.count_posts = AsyncMock(return_value=5)
+        db = MagicMock()
+
+        result = asyncio.run(
+            text_analysis_service.get_influencer_keywords_async(db, 1, 1)
+        )
+        assert result == {
+            "keywords": [{"word": "カフェ", "count": 3}],
+            "total_analyzed_posts": 5,
+        }
+
+        # 2回目はキャッシュから返す
+        result = asyncio.run(
+            text_analysis_service.get_influencer_keywords_async(
+                db, 1, 2, data_version=DATA_VERSION
+            )
+        )
+        assert len(result["keywords"]) == 2
+        repository.get_keyword_counts.assert_awaited_once_with(1, 100)
+        repository.count_posts.assert_awaited_once_with(1)
+
+    @patch("app.services.text_analysis_service.AsyncInfluencerPostRepository")
+    def test_data_version_not_found(self, mock_repo_class):
+        """投稿がない場合は404を返すこと"""
+        mock_repo_class.return_value.get_latest_update_time = AsyncMock(
+            return_value=None
+        )
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(
+                text_analysis_service.get_influencer_data_version_async(MagicMock(), 9)
+            )
+        assert exc_info.value.status_code == 404
+
+
+class TestAsyncSingleFlight:
+    def test_concurrent_calls_are_coalesced(self):
+        """同時に来た呼び出しが1回の計算に集約されること"""
+        flights = AsyncSingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def main():
+            results = await asyncio.gather(
+                *(flights.do("k", compute) for _ in range(5))
+            )
+            assert not flights.in_flight("k")
+            return results
+
+        assert asyncio.run(main()) == ["value"] * 5
+        assert calls == 1
+
+    def test_exception_is_shared(self):
+        """計算中の例外が待機中の呼び出し元にも伝播すること"""
+        flights = AsyncSingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def main():
+            return await asyncio.gather(
+                flights.do("k", compute),
+                flights.do("k", compute),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(main())
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_leader_cancellation(self):
+        """実行元がキャンセルされた場合、待機側が新しい実行元として計算し直すこと"""
+        flights = AsyncSingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def main():
+            leader = asyncio.ensure_future(flights.do("k", compute))
+            await asyncio.sleep(0)
+            waiters = [
+                asyncio.ensure_future(flights.do("k", compute)) for _ in range(2)
+            ]
+            await asyncio.sleep(0)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            results = await asyncio.gather(*waiters)
+            assert not flights.in_flight("k")
+            return results
+
+        # 待機側はキャンセルされず、再計算も1回に集約される
+        assert asyncio.run(main()) == ["value", "value"]
+        assert calls == 2
+
+    def test_waiter_cancellation(self):
+        """待機側のキャンセルは実行元と他の待機側に影響しないこと"""
+        flights = AsyncSingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def main():
+            leader = asyncio.ensure_future(flights.do("k", compute))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(flights.do("k", compute))
+            other = asyncio.ensure_future(flights.do("k", compute))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            return await leader, await other
+
+        assert asyncio.run(main()) == ("value", "value")
+
+    def test_aget_or_compute_serves_stale_while_in_flight(self):
+        """再計算中は期限切れの古い値を返すこと"""
+        cache = SimpleCache()
+        cache.set("k", "old", ttl_seconds=0, stale_seconds=60)
+
+        async def main():
+            started = asyncio.Event()
+
+            async def compute():
+                started.set()
+                await asyncio.sleep(0.01)
+                return "new"
+
+            leader = asyncio.ensure_future(
+                cache.aget_or_compute("k", compute, ttl_seconds=60, stale_seconds=60)
+            )
+            await started.wait()
+            stale = await cache.aget_or_compute(
+                "k", compute, ttl_seconds=60, stale_seconds=60
+            )
+            return stale, await leader
+
+        assert asyncio.run(main()) == ("old", "new")
+        assert cache.get("k") == "new"
+
+
+class TestAsyncRouters:
+    @patch("app.routers.async_influencer.influencer_service")
+    def test_likes_ranking(self, mock_service, async_client):
+        """非同期版いいね数ランキングとETagによる304"""
+        mock_service.get_ranking_data_version_async = AsyncMock(
+            return_value=DATA_VERSION
+        )
+        mock_service.get_top_influencers_by_likes_async = AsyncMock(
+            return_value=[{"influencer_id": 1, "avg_value": 10.0, "total_posts": 2}]
+        )
+        mock_service.get_next_ranking_cursor = (
+            influencer_service.get_next_ranking_cursor
+        )
+
+        response = async_client.get("/api/v1/influencers/ranking/likes?limit=5")
+        assert response.status_code == 200
+        assert response.json()[0]["influencer_id"] == 1
+        assert "x-next-cursor" not in response.headers
+
+        response = async_client.get(
+            "/api/v1/influencers/ranking/likes?limit=5",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        assert response.status_code == 304
+        mock_service.get_top_influencers_by_likes_async.assert_awaited_once()
+
+        # 同じデータバージョンではキャッシュしたボディを返す
+        response = async_client.get("/api/v1/influencers/ranking/likes?limit=5")
+        assert response.json()[0]["influencer_id"] == 1
+        mock_service.get_top_influencers_by_likes_async.assert_awaited_once()
+
+        # ページが埋まっている場合は次のページのカーソルを返す
+        response = async_client.get("/api/v1/influencers/ranking/likes?limit=1")
+        assert response.headers["x-next-cursor"] == (
+            influencer_service.encode_ranking_cursor(10.0, 1)
+        )
+
+    @patch("app.routers.async_influencer.influencer_service")
+    def test_comments_ranking(self, mock_service, async_client):
+        """非同期版コメント数ランキングとETagによる304"""
+        mock_service.get_ranking_data_version_async = AsyncMock(
+            return_value=DATA_VERSION
+        )
+        mock_service.get_top_influencers_by_comments_async = AsyncMock(
+            return_value=[{"influencer_id": 2, "avg_value": 3.0, "total_posts": 4}]
+        )
+        mock_service.get_next_ranking_cursor = (
+            influencer_service.get_next_ranking_cursor
+        )
+
+        response = async_client.get("/api/v1/influencers/ranking/comments?limit=1")
+        assert response.headers["x-next-cursor"] == (
+            influencer_service.encode_ranking_cursor(3.0, 2)
+        )
+
+        response = async_client.get("/api/v1/influencers/ranking/comments")
+        assert response.status_code == 200
+        assert response.json()[0]["avg_value"] == 3.0
+
+        response = async_client.get(
+            "/api/v1/influencers/ranking/comments",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        assert response.status_code == 304
+
+        response = async_client.get("/api/v1/influencers/ranking/comments")
+        assert response.json()[0]["avg_value"] == 3.0
+        assert mock_service.get_top_influencers_by_comments_async.await_count == 2
+
+    @patch("app.routers.async_influencer.influencer_service")
+    def test_metrics_ranking(self, mock_service, async_client):
+        """非同期版指標別ランキングとETagによる304"""
+        mock_service.ENGAGEMENT_COMMENT_WEIGHT = 1.0
+        mock_service.get_ranking_data_version_async = AsyncMock(
+            return_value=DATA_VERSION
+        )
+        mock_service.get_influencer_ranking_async = AsyncMock(
+            return_value=[
+                {
+                    "influencer_id": 1,
+                    "value": 13.0,
+                    "total_posts": 2,
+                    "avg_likes": 10.0,
+                    "avg_comments": 3.0,
+                    "engagement": 13.0,
+                    "median_likes": 10.0,
+                }
+            ]
+        )
+        mock_service.get_next_ranking_cursor = (
+            influencer_service.get_next_ranking_cursor
+        )
+
+        response = async_client.get("/api/v1/influencers/ranking?limit=1")
+        assert response.status_code == 200
+        assert response.json()[0]["engagement"] == 13.0
+        assert response.headers["x-next-cursor"] == (
+            influencer_service.encode_ranking_cursor(13.0, 1)
+        )
+
+        response = async_client.get(
+            "/api/v1/influencers/ranking?limit=1",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        assert response.status_code == 304
+        mock_service.get_influencer_ranking_async.assert_awaited_once()
+
+        response = async_client.get("/api/v1/influencers/ranking?limit=1")
+        assert response.headers["x-next-cursor"] == (
+            influencer_service.encode_ranking_cursor(13.0, 1)
+        )
+        mock_service.get_influencer_ranking_async.assert_awaited_once()
+
+    @patch("app.routers.async_analytics.text_analysis_service")
+    def test_keywords(self, mock_service, async_client, async_db):
+        """非同期版キーワード分析とETagによる304"""
+        mock_service.get_influencer_data_version_async = AsyncMock(
+            return_value=DATA_VERSION
+        )
+        mock_service.get_influencer_keywords_async = AsyncMock(
+            return_value={
+                "keywords": [{"word": "カフェ", "count": 3}],
+                "total_analyzed_posts": 7,
+            }
+        )
+
+        response = async_client.get("/api/v1/analytics/1/keywords?limit=5")
+        assert response.status_code == 200
+        assert response.json() == {
+            "keywords": [{"word": "カフェ", "count": 3}],
+            "total_analyzed_posts": 7,
+        }
+
+        response = async_client.get(
+            "/api/v1/analytics/1/keywords?limit=5",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        assert response.status_code == 304
+
+        # キャッシュしたボディを返し、投稿数はルーターで数えない
+        response = async_client.get("/api/v1/analytics/1/keywords?limit=5")
+        assert response.json()["total_analyzed_posts"] == 7
+        mock_service.get_influencer_keywords_async.assert_awaited_once()
+        async_db.scalar.assert_not_called()
+
+    @patch("app.routers.async_analytics.text_analysis_service")
+    def test_keywords_errors(self, mock_service, async_client):
+        """404はそのまま返し、その他の例外は500に変換すること"""
+        mock_service.get_influencer_data_version_async = AsyncMock(
+            side_effect=HTTPException(status_code=404, detail="not found")
+        )
+        response = async_client.get("/api/v1/analytics/9/keywords")
+        assert response.status_code == 404
+
+        mock_service.get_influencer_data_version_async = AsyncMock(
+            side_effect=RuntimeError("db down")
+        )
+        response = async_client.get("/api/v1/analytics/9/keywords")
+        assert response.status_code == 500
+        assert "db down" in response.json()["detail"]
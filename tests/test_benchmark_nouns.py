@@ -0,0 +1,59 @@
+"""
+cli/benchmark_nouns.py のテスト
+"""
+from unittest import mock
+
+import pytest
+
+from cli.benchmark_nouns import (
+    build_corpus,
+    legacy_extract_nouns,
+    load_corpus,
+    main,
+    run_benchmark,
+)
+
+
+class TestCorpus:
+    def test_build_corpus(self):
+        """同じシードからは同じキャプションが生成されるテスト"""
+        corpus = build_corpus(20, seed=1)
+
+        assert len(corpus) == 20
+        assert corpus == build_corpus(20, seed=1)
+        assert any("#" in caption for caption in corpus)
+
+    def test_load_corpus(self, tmp_path):
+        """CSVファイルの text カラムのうち空でないものを読み込むテスト"""
+        path = tmp_path / "posts.csv"
+        path.write_text('post_id,text\n1,"1行目\n2行目"\n2,\n', encoding="utf-8")
+
+        assert load_corpus(str(path)) == ["1行目\n2行目"]
+
+
+class TestRunBenchmark:
+    def test_run_benchmark(self):
+        """旧実装と同じ結果になり、トークン/秒を返すテスト"""
+        result = run_benchmark(build_corpus(5), repeat=1)
+
+        assert result["texts"] == 5
+        assert result["tokens"] > 0
+        assert result["before_tokens_per_sec"] > 0
+        assert result["after_tokens_per_sec"] > 0
+        assert legacy_extract_nouns("") == []
+
+    def test_mismatch(self):
+        """抽出結果が旧実装と異なる場合はエラーになるテスト"""
+        with mock.patch("cli.benchmark_nouns.extract_nouns", return_value=["違い"]):
+            with pytest.raises(ValueError):
+                run_benchmark(["今日は東京に行きました"], repeat=1)
+
+    def test_main(self, caplog):
+        """メイン関数で計測結果がログに出力されるテスト"""
+        with mock.patch(
+            "sys.argv", ["benchmark_nouns.py", "--size", "3", "--repeat", "1"]
+        ):
+            with caplog.at_level("INFO"):
+                main()
+
+        assert "トークン/秒" in caplog.text
@@ -0,0 +1,99 @@
+"""
+cli/benchmark_responses.py のテスト
+"""
+import builtins
+from unittest import mock
+
+import pytest
+
+from app.database.query_counter import QueryCountMiddleware
+from cli.benchmark_responses import (
+    build_app,
+    build_data,
+    main,
+    percentile,
+    run_benchmark,
+)
+
+
+class TestBenchmarkResponses:
+    def test_build_data(self):
+        """同じシードからは同じデータが生成されるテスト"""
+        data = build_data(5, seed=1)
+
+        assert len(data["rankings"]) == 5
+        assert len(data["metrics"]) == 5
+        assert len(data["keywords"]["keywords"]) == 5
+        assert data["keywords"]["total_analyzed_posts"] == 5
+        assert data == build_data(5, seed=1)
+
+    def test_build_app_counts_queries(self):
+        """クエリ数の計測を有効にしたアプリで計測するテスト"""
+        app, _ = build_app(build_data(1))
+
+        assert [m.cls for m in app.user_middleware] == [QueryCountMiddleware]
+
+    def test_percentile(self):
+        """最近傍法でパーセンタイルを求めるテスト"""
+        samples = [float(i) for i in range(1, 101)]
+
+        assert percentile(samples, 0.5) == 50.0
+        assert percentile(samples, 0.99) == 99.0
+        assert percentile([3.0], 0.99) == 3.0
+
+    def test_run_benchmark(self):
+        """全てのモードで同じレスポンスになり、p50 / p99 を返すテスト"""
+        results = run_benchmark(requests=3, limit=5)
+
+        assert set(results) == {"ranking_likes", "ranking", "keywords"}
+        for result in results.values():
+            for mode in ("standard", "fast", "cached"):
+                assert 0 < result[f"{mode}_p50_ms"] <= result[f"{mode}_p99_ms"]
+
+    def test_mismatch(self):
+        """モードによってレスポンスが異なる場合はエラーになるテスト"""
+        with mock.patch(
+            "cli.benchmark_responses.build_data",
+            return_value={
+                "rankings": [],
+                "metrics": [],
+                "keywords": {"keywords": [], "total_analyzed_posts": 0},
+            },
+        ):
+            with mock.patch(
+                "app.dependencies.utils.ORJSONResponse.render", return_value=b"[1]"
+            ):
+                with pytest.raises(ValueError, match="異なります"):
+                    run_benchmark(requests=1, limit=1)
+
+    def test_error_status(self):
+        """200以外が返る場合はエラーになるテスト"""
+        with mock.patch(
+            "cli.benchmark_responses.ENDPOINTS", {"missing": "/missing?limit={limit}"}
+        ):
+            with pytest.raises(ValueError, match="404"):
+                run_benchmark(requests=1, limit=1)
+
+    def test_without_orjson(self):
+        """orjsonがない場合はインストール方法を含むエラーになるテスト"""
+        real_import = builtins.__import__
+
+        def fake_import(name, *args, **kwargs):
+            if name == "orjson":
+                raise ImportError(name)
+            return real_import(name, *args, **kwargs)
+
+        with mock.patch("builtins.__import__", side_effect=fake_import):
+            with pytest.raises(ValueError, match="pip install orjson"):
+                run_benchmark(requests=1, limit=1)
+
+    def test_main(self, caplog):
+        """メイン関数で計測結果がログに出力されるテスト"""
+        with mock.patch(
+            "sys.argv",
+            ["benchmark_responses.py", "--requests", "2", "--limit", "3"],
+        ):
+            with caplog.at_level("INFO"):
+                main()
+
+        assert "p99" in caplog.text
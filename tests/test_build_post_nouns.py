@@ -0,0 +1,185 @@
+"""
+cli/build_post_nouns.py のテスト
+"""
+from datetime import datetime
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.connection import get_db
+from app.models.base import Base
+from app.models.database_models import (
+    InfluencerPost,
+    InfluencerPostNoun,
+    InfluencerPostTag,
+)
+from app.routers import analytics
+from cli.build_post_nouns import (
+    build_post_nouns,
+    bump_data_version,
+    main,
+    parse_args,
+)
+
+
+class TestParseArgs:
+    def test_parse_args_default(self):
+        """デフォルト値でのコマンドライン引数パースのテスト"""
+        with mock.patch("sys.argv", ["build_post_nouns.py"]):
+            args = parse_args()
+            assert args.influencer_id is None
+            assert args.batch_size == 1000
+            assert args.tags_only is False
+
+
+class TestBuildPostNouns:
+    def test_build_in_batches(self):
+        """IDの昇順にバッチ処理され、バッチごとにコミットされるテスト"""
+        mock_db = mock.MagicMock()
+        first_batch = [
+            mock.MagicMock(id=1, post_id=10, influencer_id=1, text="a"),
+            mock.MagicMock(id=2, post_id=11, influencer_id=1, text="b"),
+        ]
+        second_batch = [mock.MagicMock(id=5, post_id=12, influencer_id=2, text="c")]
+        query = mock_db.query.return_value.filter.return_value
+        query.order_by.return_value.limit.return_value.all.side_effect = [
+            first_batch,
+            second_batch,
+            [],
+        ]
+
+        with mock.patch("cli.build_post_nouns.store_post_nouns") as mock_store:
+            with mock.patch("cli.build_post_nouns.store_post_tags") as mock_store_tags:
+                with mock.patch("cli.build_post_nouns.bump_data_version") as mock_bump:
+                    processed = build_post_nouns(mock_db, batch_size=2)
+
+        assert processed == 3
+        # コミット前にバッチごとにデータバージョンを進める
+        assert mock_bump.call_args_list == mock_store.call_args_list
+        assert mock_store.call_args_list == [
+            mock.call(mock_db, first_batch),
+            mock.call(mock_db, second_batch),
+        ]
+        assert mock_store_tags.call_args_list == mock_store.call_args_list
+        assert mock_db.commit.call_count == 2
+
+    def test_build_tags_only(self):
+        """tags_only の場合は形態素解析せずタグのみ保存し直すテスト"""
+        mock_db = mock.MagicMock()
+        batch = [mock.MagicMock(id=1, post_id=10, influencer_id=1, text="#a")]
+        query = mock_db.query.return_value.filter.return_value
+        query.order_by.return_value.limit.return_value.all.side_effect = [batch, []]
+
+        with mock.patch("cli.build_post_nouns.store_post_nouns") as mock_store:
+            with mock.patch("cli.build_post_nouns.store_post_tags") as mock_store_tags:
+                assert build_post_nouns(mock_db, tags_only=True) == 1
+
+        mock_store.assert_not_called()
+        mock_store_tags.assert_called_once_with(mock_db, batch)
+
+    def test_build_single_influencer(self):
+        """インフルエンサーIDを指定した場合に絞り込みが追加されるテスト"""
+        mock_db = mock.MagicMock()
+        query = mock_db.query.return_value.filter.return_value
+        query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = (
+            []
+        )
+
+        with mock.patch("cli.build_post_nouns.store_post_nouns") as mock_store:
+            processed = build_post_nouns(mock_db, influencer_id=3)
+
+        assert processed == 0
+        query.filter.assert_called_once()
+        mock_store.assert_not_called()
+
+
+def test_bump_data_version():
+    """再構築した投稿の updated_at だけを進めるテスト"""
+    mock_db = mock.MagicMock()
+    posts = [mock.MagicMock(id=1), mock.MagicMock(id=5)]
+
+    bump_data_version(mock_db, posts)
+
+    mock_db.query.assert_called_once_with(InfluencerPost)
+    criterion = mock_db.query.return_value.filter.call_args[0][0]
+    assert criterion.right.value == [1, 5]
+    values = mock_db.query.return_value.filter.return_value.update.call_args
+    assert list(values[0][0]) == [InfluencerPost.updated_at]
+    assert values[1] == {"synchronize_session": False}
+
+
+def test_rebuild_refreshes_cached_keywords():
+    """名詞の抽出設定を変えて再構築すると、キャッシュ済みの結果・ETagが置き換わるテスト"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            InfluencerPost.__table__,
+            InfluencerPostNoun.__table__,
+            InfluencerPostTag.__table__,
+        ],
+    )
+    session_factory = sessionmaker(bind=engine)
+    # 変更前の設定でインポート時に保存された名詞
+    with session_factory() as db:
+        db.add(
+            InfluencerPost(
+                influencer_id=1,
+                post_id=1,
+                shortcode="code1",
+                text="さん カフェ カフェ",
+                post_date=datetime(2024, 1, 1),
+                updated_at=datetime(2024, 1, 2),
+            )
+        )
+        db.add(InfluencerPostNoun(post_id=1, influencer_id=1, word="カフェ", count=2))
+        db.add(InfluencerPostNoun(post_id=1, influencer_id=1, word="さん", count=1))
+        db.commit()
+
+    def override_get_db():
+        with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(analytics.router, prefix="/api/v1/analytics")
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    path = "/api/v1/analytics/1/keywords?limit=5"
+
+    first = client.get(path)
+    assert [kw["word"] for kw in first.json()["keywords"]] == ["カフェ", "さん"]
+
+    # ストップワードを追加した設定で再構築
+    with mock.patch(
+        "app.services.text_analysis_service.extract_keywords",
+        side_effect=lambda text: [w for w in text.split() if w != "さん"],
+    ), session_factory() as db:
+        build_post_nouns(db)
+
+    # 再構築前のETagでは304にならず、キャッシュ済みの結果も返さない
+    response = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+    assert response.status_code == 200
+    assert response.json()["keywords"] == [{"word": "カフェ", "count": 2}]
+    engine.dispose()
+
+
+class TestMain:
+    def test_main_success(self):
+        """メイン関数の成功パターンテスト"""
+        with mock.patch("sys.argv", ["build_post_nouns.py", "--influencer-id", "3"]):
+            with mock.patch("cli.build_post_nouns.SessionLocal") as mock_session:
+                with mock.patch("cli.build_post_nouns.build_post_nouns") as mock_build:
+                    with mock.patch("sys.exit") as mock_exit:
+                        main()
+
+                        mock_build.assert_called_once_with(
+                            mock_session.return_value, 3, 1000, False
+                        )
+                        mock_session.return_value.close.assert_called_once()
+                        mock_exit.assert_called_once_with(0)
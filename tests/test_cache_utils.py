@@ -0,0 +1,290 @@
+"""
+キャッシュユーティリティのテスト
+"""
+import threading
+import time
+
+import pytest
+from unittest.mock import patch
+
+from app.dependencies.cache_utils import (
+    SimpleCache,
+    SingleFlight,
+    estimate_size,
+    get_cache_key,
+)
+
+
+class TestSimpleCache:
+    def test_get_set_and_expiry(self):
+        """保存した値の取得と有効期限切れのテスト"""
+        cache = SimpleCache()
+        with patch("app.dependencies.cache_utils.time.time", return_value=1000.0):
+            cache.set("a", [1, 2, 3], ttl_seconds=10)
+            assert cache.get("a") == [1, 2, 3]
+
+        with patch("app.dependencies.cache_utils.time.time", return_value=1011.0):
+            assert cache.get("a") is None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["expirations"] == 1
+        assert stats["entries"] == 0
+        assert stats["bytes"] == 0
+
+    def test_lru_eviction_by_entries(self):
+        """エントリ数の上限を超えた場合に最も古く参照されたものが追い出されるテスト"""
+        cache = SimpleCache(max_entries=2, policy="lru")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_lfu_eviction_by_entries(self):
+        """LFUでは参照回数が最も少ないエントリが追い出されるテスト"""
+        cache = SimpleCache(max_entries=2, policy="lfu")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+        # 挿入直後のキー以外に最小頻度のキーがない場合は次に少ない頻度から追い出す
+        cache = SimpleCache(max_entries=2, policy="lfu")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.set("b", 2)
+        cache.get("b")
+        cache.get("b")
+        cache.set("c", 3)
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+    def test_lfu_overwrite_keeps_frequency(self):
+        """LFUでは上書きしても参照回数を引き継ぎ、追い出し候補にならないテスト"""
+        cache = SimpleCache(max_entries=2, policy="lfu")
+        cache.set("hot", 1)
+        cache.get("hot")
+        cache.get("hot")
+        cache.set("cold", 2)
+        cache.get("cold")
+        # 参照回数の多いエントリを更新（データ更新後の再計算など）
+        cache.set("hot", 10)
+        cache.set("new", 3)
+
+        assert cache.get("cold") is None
+        assert cache.get("hot") == 10
+        assert cache.get("new") == 3
+
+        # 最小頻度のエントリを上書きした後も最小頻度を正しく辿る
+        cache = SimpleCache(max_entries=2, policy="lfu")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.set("b", 2)
+        cache.get("b")
+        cache.get("b")
+        cache.set("a", 10)
+        cache.set("c", 3)
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+    def test_eviction_by_bytes(self):
+        """推定バイト数の上限を超えた場合の追い出しテスト"""
+        value = "x" * 1000
+        limit = (estimate_size("a") + estimate_size(value)) * 2
+        cache = SimpleCache(max_bytes=limit)
+        cache.set("a", value)
+        cache.set("b", value)
+        cache.set("c", value)
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["bytes"] <= limit
+        assert cache.get("a") is None
+
+        # 単体で上限を超える値はキャッシュしない
+        cache.set("big", "x" * limit)
+        assert cache.get("big") is None
+
+    def test_periodic_sweep(self):
+        """一定間隔で期限切れエントリがまとめて削除されるテスト"""
+        cache = SimpleCache(sweep_interval=30)
+        with patch("app.dependencies.cache_utils.time.time", return_value=1000.0):
+            cache._next_sweep = 1030.0
+            cache.set("a", 1, ttl_seconds=5)
+            cache.set("b", 2, ttl_seconds=5)
+            cache.set("c", 3, ttl_seconds=100)
+
+        # 別のキーへのアクセスで期限切れエントリが掃除される
+        with patch("app.dependencies.cache_utils.time.time", return_value=1031.0):
+            assert cache.get("c") == 3
+
+        stats = cache.stats()
+        assert stats["entries"] == 1
+        assert stats["expirations"] == 2
+
+    def test_invalidate_and_clear(self):
+        """無効化と全削除のテスト"""
+        cache = SimpleCache(policy="lfu")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate("a")
+        cache.invalidate("missing")
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+        cache.clear()
+        assert cache.get("b") is None
+        assert cache.stats()["bytes"] == 0
+
+    def test_invalid_policy(self):
+        """不正な追い出し方式でエラーになるテスト"""
+        with pytest.raises(ValueError):
+            SimpleCache(policy="fifo")
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_result(self):
+        """同時に呼ばれた計算が1回に集約され、結果が共有されるテスト"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "result"
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(flight.do("k", compute))
+        )
+        leader.start()
+        started.wait(5)
+        assert flight.in_flight("k")
+
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.do("k", compute)))
+            for _ in range(3)
+        ]
+        for follower in followers:
+            follower.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        assert len(calls) == 1
+        assert results == ["result"] * 4
+        assert not flight.in_flight("k")
+
+    def test_error_is_shared(self):
+        """計算中の例外が待機中の呼び出し元にも伝播するテスト"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                flight.do("k", compute)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call)
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        assert errors == ["boom", "boom"]
+
+
+class TestGetOrCompute:
+    def test_compute_once_then_cached(self):
+        """初回のみ計算し、以降はキャッシュから返すテスト"""
+        cache = SimpleCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return [1]
+
+        assert cache.get_or_compute("k", compute) == [1]
+        assert cache.get_or_compute("k", compute) == [1]
+        assert len(calls) == 1
+
+    def test_stale_while_revalidate(self):
+        """再計算中は古い値を返し、再計算は1回だけ行われるテスト"""
+        cache = SimpleCache()
+        with patch("app.dependencies.cache_utils.time.time", return_value=1000.0):
+            cache.set("k", "old", ttl_seconds=10, stale_seconds=60)
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(5)
+            return "new"
+
+        results = []
+        with patch("app.dependencies.cache_utils.time.time", return_value=1020.0):
+            # 新鮮期限切れのため通常の取得ではミスになる
+            assert cache.get("k") is None
+
+            leader = threading.Thread(
+                target=lambda: results.append(
+                    cache.get_or_compute("k", compute, ttl_seconds=10, stale_seconds=60)
+                )
+            )
+            leader.start()
+            started.wait(5)
+
+            # 再計算中の呼び出し元には古い値が返る
+            assert (
+                cache.get_or_compute("k", compute, ttl_seconds=10, stale_seconds=60)
+                == "old"
+            )
+            release.set()
+            leader.join(5)
+
+            assert results == ["new"]
+            assert cache.get("k") == "new"
+        assert cache.stats()["stale_hits"] == 1
+
+    def test_stale_expired_entry_is_removed(self):
+        """古い値を返せる期間も過ぎたエントリは取得できないテスト"""
+        cache = SimpleCache()
+        with patch("app.dependencies.cache_utils.time.time", return_value=1000.0):
+            cache.set("k", "old", ttl_seconds=10, stale_seconds=5)
+        with patch("app.dependencies.cache_utils.time.time", return_value=1016.0):
+            assert cache.get_stale("k") is None
+
+
+def test_get_cache_key():
+    """キャッシュキー生成のテスト（パラメータ順に依存しない）"""
+    assert get_cache_key("p", b=2, a=1) == get_cache_key("p", a=1, b=2) == "p:a:1_b:2"
@@ -0,0 +1,375 @@
+"""
+cli/columnar_import.py のテスト
+"""
+import builtins
+import os
+from datetime import datetime, timezone
+from unittest import mock
+
+import pytest
+
+from cli.columnar_import import (
+    _import_pyarrow,
+    commit_copy_table,
+    convert_batch,
+    detect_columnar_format,
+    iter_record_batches,
+    process_columnar_file,
+    write_table,
+)
+from cli.import_csv import COPY_COLUMNS, COPY_SQL, import_csv
+from cli.import_progress import checkpoint_path, load_checkpoint
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def _table(count=10, start=1):
+    """データレイクと同じ型付きの投稿テーブル"""
+    post_ids = list(range(start, start + count))
+    return pa.table(
+        {
+            "influencer_id": pa.array([post_id % 2 + 1 for post_id in post_ids]),
+            "post_id": pa.array(post_ids, pa.int64()),
+            "shortcode": [f"code{post_id}" for post_id in post_ids],
+            "likes": pa.array([100] * count, pa.int32()),
+            "comments": pa.array([5] * count, pa.int32()),
+            "thumbnail": [None] * count,
+            "text": [f'投稿,"{post_id}"\n2行目' for post_id in post_ids],
+            "post_date": pa.array(
+                [datetime(2023, 1, 1, 12, 0, 0)] * count, pa.timestamp("ms")
+            ),
+            "extra": ["使わないカラム"] * count,
+        }
+    )
+
+
+@pytest.fixture
+def parquet_file(tmp_path):
+    """3行ずつの行グループに分かれたParquetファイル"""
+    path = tmp_path / "posts.parquet"
+    pq.write_table(_table(), path, row_group_size=3)
+    return str(path)
+
+
+@pytest.fixture
+def arrow_file(tmp_path):
+    """4行ずつのレコードバッチに分かれたArrow IPCファイル"""
+    path = tmp_path / "posts.arrow"
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, _table().schema) as writer:
+            writer.write_table(_table(), max_chunksize=4)
+    return str(path)
+
+
+def _post_ids(batches):
+    return [post_id for batch in batches for post_id in batch["post_id"].to_pylist()]
+
+
+class TestReadBatches:
+    def test_detect_columnar_format(self, parquet_file, arrow_file, tmp_path):
+        """マジックバイトから列指向形式を判定するテスト"""
+        stream_path = tmp_path / "posts.arrows"
+        with pa.OSFile(str(stream_path), "wb") as sink:
+            with pa.ipc.new_stream(sink, _table().schema) as writer:
+                writer.write_table(_table())
+        csv_path = tmp_path / "posts.csv"
+        csv_path.write_text("influencer_id,post_id\n", encoding="utf-8")
+
+        assert detect_columnar_format(parquet_file) == "parquet"
+        assert detect_columnar_format(arrow_file) == "arrow"
+        assert detect_columnar_format(str(stream_path)) == "arrow_stream"
+        assert detect_columnar_format(str(csv_path)) is None
+        assert _post_ids(iter_record_batches(str(stream_path), "arrow_stream", 4)) == (
+            list(range(1, 11))
+        )
+
+    @pytest.mark.parametrize("skip_rows", [0, 2, 3, 7, 10])
+    def test_parquet_batches(self, parquet_file, skip_rows):
+        """行グループ単位で読み飛ばし、バッチサイズ以下で返すテスト"""
+        batches = list(iter_record_batches(parquet_file, "parquet", 2, skip_rows))
+
+        assert _post_ids(batches) == list(range(skip_rows + 1, 11))
+        assert all(batch.num_rows <= 2 for batch in batches)
+        assert all(batch.schema.names == COPY_COLUMNS for batch in batches)
+
+    @pytest.mark.parametrize("fmt", ["arrow", "arrow_stream"])
+    def test_source_closed(self, tmp_path, arrow_file, fmt):
+        """途中で読み込みをやめた場合もメモリマップしたファイルを閉じるテスト"""
+        path = arrow_file
+        if fmt == "arrow_stream":
+            path = str(tmp_path / "posts.arrows")
+            with pa.OSFile(path, "wb") as sink:
+                with pa.ipc.new_stream(sink, _table().schema) as writer:
+                    writer.write_table(_table(), max_chunksize=4)
+        real_memory_map = pa.memory_map
+        sources = []
+
+        def memory_map(*args):
+            sources.append(real_memory_map(*args))
+            return sources[-1]
+
+        with mock.patch.object(pa, "memory_map", side_effect=memory_map):
+            batches = iter_record_batches(path, fmt, 2)
+            next(batches)
+            assert not sources[0].closed
+            batches.close()
+
+        assert sources[0].closed
+
+    def test_arrow_batches(self, arrow_file):
+        """レコードバッチをバッチサイズごとに分割するテスト"""
+        batches = list(iter_record_batches(arrow_file, "arrow", 3, skip_rows=5))
+
+        assert _post_ids(batches) == list(range(6, 11))
+        assert [batch.num_rows for batch in batches] == [3, 2]
+
+
+class TestConvertBatch:
+    def test_typed_columns(self):
+        """型付きのカラムをインポート先の型に変換するテスト"""
+        batch = _table(2).select(COPY_COLUMNS).to_batches()[0]
+
+        table, errors = convert_batch(batch)
+
+        assert errors == 0
+        assert table.schema.field("influencer_id").type == pa.int32()
+        assert table.schema.field("post_date").type == pa.timestamp("us")
+        assert table.to_pylist()[0]["post_date"] == datetime(2023, 1, 1, 12, 0, 0)
+
+    def test_string_columns(self):
+        """文字列のカラムを変換し、不正な日付や必須項目のnullを除外するテスト"""
+        batch = pa.record_batch(
+            {
+                "influencer_id": ["1", "2", "3"],
+                "post_id": ["10", None, "12"],
+                "shortcode": ["a", "b", "c"],
+                "likes": ["1", "2", "3"],
+                "comments": ["0", "0", "0"],
+                "thumbnail": ["", "", ""],
+                "text": ["", "b", "c"],
+                "post_date": ["2023-01-01 12:00:00", "2023-01-01 12:00:00", "不正"],
+            }
+        )
+
+        table, errors = convert_batch(batch)
+
+        assert errors == 2
+        assert table.to_pylist() == [
+            {
+                "influencer_id": 1,
+                "post_id": 10,
+                "shortcode": "a",
+                "likes": 1,
+                "comments": 0,
+                "thumbnail": "",
+                "text": "",
+                "post_date": datetime(2023, 1, 1, 12, 0, 0),
+            }
+        ]
+
+    def test_timezone_converted_to_utc(self):
+        """タイムゾーン付きの日時はUTCに揃えるテスト"""
+        table = _table(1).select(COPY_COLUMNS)
+        tz_dates = pa.array(
+            [datetime(2023, 1, 1, 21, 0, 0, tzinfo=timezone.utc)],
+            pa.timestamp("us", tz="Asia/Tokyo"),
+        )
+        batch = table.set_column(7, "post_date", tz_dates).to_batches()[0]
+
+        converted, _ = convert_batch(batch)
+
+        assert converted["post_date"].to_pylist() == [datetime(2023, 1, 1, 21, 0, 0)]
+
+    def test_invalid_number(self):
+        """数値に変換できない値・範囲外の値を含む行だけを除外するテスト"""
+        batch = _table(4).select(COPY_COLUMNS).to_batches()[0]
+        batch = batch.set_column(3, "likes", pa.array(["1", "多い", "3", "4"]))
+        batch = batch.set_column(
+            4, "comments", pa.array([0, 0, 2**40, 0], pa.int64())
+        )
+
+        table, errors = convert_batch(batch)
+
+        assert errors == 2
+        assert table["post_id"].to_pylist() == [1, 4]
+        assert table["likes"].to_pylist() == [1, 4]
+        assert table.schema.field("likes").type == pa.int32()
+
+    def test_unsupported_type(self):
+        """インポート先の型に変換できない型のカラムはエラーになるテスト"""
+        batch = _table(1).select(COPY_COLUMNS).to_batches()[0]
+        batch = batch.set_column(3, "likes", pa.array([[1]]))
+
+        with pytest.raises(NotImplementedError):
+            convert_batch(batch)
+
+
+class TestWriteTable:
+    def test_commit_copy_table(self):
+        """変換済みのテーブルをCOPYで投入し、追加された投稿のみ名詞を保存するテスト"""
+        mock_db = mock.MagicMock()
+        cursor = mock_db.connection.return_value.connection.cursor.return_value
+        copied = []
+        cursor.copy_expert.side_effect = lambda sql, buffer: copied.append(
+            (sql, buffer.read())
+        )
+        mock_db.execute.return_value.fetchall.return_value = [(1,)]
+        table, _ = convert_batch(_table(2).select(COPY_COLUMNS).to_batches()[0])
+
+        with mock.patch("cli.columnar_import.store_post_nouns") as mock_store:
+            with mock.patch("cli.columnar_import.store_post_tags") as mock_store_tags:
+                commit_copy_table(mock_db, table, 2)
+
+        sql, data = copied[0]
+        assert sql == COPY_SQL
+        # null以外は全てクォートされ、テキスト中の改行やクォートもCSVとして正しく書き出される
+        assert data.decode("utf-8").splitlines()[:2] == [
+            '"2","1","code1","100","5",,"投稿,""1""',
+            '2行目","2023-01-01 12:00:00.000000"',
+        ]
+        posts = mock_store.call_args[0][1]
+        assert [(post.post_id, post.influencer_id) for post in posts] == [(1, 2)]
+        assert mock_store_tags.call_args[0][1] == posts
+        mock_db.commit.assert_called_once()
+
+    def test_commit_copy_table_empty(self):
+        """空のテーブルは何もしないテスト"""
+        mock_db = mock.MagicMock()
+        table, _ = convert_batch(_table(1).select(COPY_COLUMNS).to_batches()[0])
+
+        commit_copy_table(mock_db, table.slice(0, 0), 0)
+
+        mock_db.commit.assert_not_called()
+
+    @pytest.mark.parametrize("mode", ["orm", "upsert"])
+    def test_row_modes(self, mode):
+        """orm / upsert モードは行に展開して既存の書き込み処理に渡すテスト"""
+        table, _ = convert_batch(_table(2).select(COPY_COLUMNS).to_batches()[0])
+
+        with mock.patch("cli.columnar_import.flush_records") as mock_flush:
+            write_table(mock.MagicMock(), table, 2, mode)
+
+        records = mock_flush.call_args[0][1]
+        assert mock_flush.call_args[0][3] == mode
+        if mode == "orm":
+            assert [record.post_id for record in records] == [1, 2]
+        else:
+            assert records[0]["post_date"] == datetime(2023, 1, 1, 12, 0, 0)
+
+
+class TestProcessColumnarFile:
+    def test_process_and_resume(self, parquet_file):
+        """バッチごとにチェックポイントを保存し、中断後に再開できるテスト"""
+        written = []
+
+        def failing_write(db, table, row_count, mode):
+            if row_count > 4:
+                raise RuntimeError("接続断")
+            written.extend(table["post_id"].to_pylist())
+
+        with mock.patch("cli.columnar_import.write_table", side_effect=failing_write):
+            with pytest.raises(RuntimeError):
+                process_columnar_file(
+                    parquet_file, mock.MagicMock(), 2, "parquet", "copy"
+                )
+        assert load_checkpoint(parquet_file, "copy")["rows"] == 4
+
+        written.clear()
+        mock_db = mock.MagicMock()
+        with mock.patch(
+            "cli.columnar_import.write_table",
+            side_effect=lambda db, table, row_count, mode: written.extend(
+                table["post_id"].to_pylist()
+            ),
+        ):
+            with mock.patch("cli.columnar_import.refresh_rollups") as mock_refresh:
+                assert process_columnar_file(
+                    parquet_file, mock_db, 2, "parquet", "copy", resume=True
+                )
+
+        assert written == list(range(5, 11))
+        mock_refresh.assert_called_once_with(mock_db, None)
+        assert not os.path.exists(checkpoint_path(parquet_file))
+
+    def test_invalid_row_is_skipped(self, tmp_path, caplog):
+        """変換できない値を含む行だけをエラーとして数え、同じバッチの他の行は処理するテスト"""
+        path = tmp_path / "posts.parquet"
+        table = _table(4).select(COPY_COLUMNS)
+        likes = pa.array(["1", "多い", "3", "4"])
+        pq.write_table(table.set_column(3, "likes", likes), path)
+
+        with mock.patch("cli.columnar_import.write_table") as mock_write:
+            with mock.patch("cli.columnar_import.refresh_rollups") as mock_refresh:
+                with caplog.at_level("INFO", logger="cli.columnar_import"):
+                    assert process_columnar_file(
+                        str(path), mock.MagicMock(), 4, "parquet"
+                    )
+
+        written = [
+            call[0][1]["post_id"].to_pylist() for call in mock_write.call_args_list
+        ]
+        assert written == [[1, 3, 4]]
+        assert mock_refresh.call_args[0][1] == {1, 2}
+        assert "合計4件（エラー: 1件）" in caplog.text
+
+    def test_invalid_batch_is_skipped(self, tmp_path):
+        """変換できない型のカラムを含むバッチはエラーとして数え、残りのバッチは処理するテスト"""
+        path = tmp_path / "posts.parquet"
+        pq.write_table(_table(4).select(COPY_COLUMNS), path)
+
+        results = iter([NotImplementedError("Unsupported cast")])
+
+        def fake_convert(batch):
+            error = next(results, None)
+            if error is not None:
+                raise error
+            return convert_batch(batch)
+
+        with mock.patch("cli.columnar_import.convert_batch", side_effect=fake_convert):
+            with mock.patch("cli.columnar_import.write_table") as mock_write:
+                with mock.patch("cli.columnar_import.refresh_rollups"):
+                    assert process_columnar_file(
+                        str(path), mock.MagicMock(), 2, "parquet"
+                    )
+
+        written = [
+            call[0][1]["post_id"].to_pylist() for call in mock_write.call_args_list
+        ]
+        assert written == [[3, 4]]
+
+    def test_missing_columns(self, tmp_path):
+        """必須カラムが不足している場合は失敗するテスト"""
+        path = tmp_path / "posts.parquet"
+        pq.write_table(_table().select(["influencer_id", "post_id"]), path)
+
+        assert process_columnar_file(str(path), mock.MagicMock(), 2, "parquet") is False
+
+    def test_without_pyarrow(self, parquet_file):
+        """pyarrowがない場合はインストール方法を含むエラーで失敗するテスト"""
+        real_import = builtins.__import__
+
+        def fake_import(name, *args, **kwargs):
+            if name.startswith("pyarrow"):
+                raise ImportError(name)
+            return real_import(name, *args, **kwargs)
+
+        with mock.patch("builtins.__import__", side_effect=fake_import):
+            with pytest.raises(ValueError, match="pip install pyarrow"):
+                _import_pyarrow()
+            assert (
+                process_columnar_file(parquet_file, mock.MagicMock(), 2, "parquet")
+                is False
+            )
+
+    def test_import_csv_dispatch(self, parquet_file):
+        """import_csv がParquetファイルを列指向形式として処理するテスト"""
+        with mock.patch("cli.import_csv.SessionLocal") as mock_session:
+            with mock.patch(
+                "cli.columnar_import.process_columnar_file", return_value=True
+            ) as mock_process:
+                assert import_csv(parquet_file, 500, "copy", workers=4) is True
+
+        mock_process.assert_called_once_with(
+            parquet_file, mock_session.return_value, 500, "parquet", "copy", False
+        )
@@ -16,7 +16,17 @@ from cli.import_csv import (
     process_csv_file,
     import_csv,
     main,
+    refresh_rollups,
+    parse_row,
+    copy_rows_to_staging,
+    commit_copy_records,
+    commit_upsert_records,
+    COPY_SQL,
+    CREATE_STAGING_SQL,
+    MERGE_STAGING_SQL,
+    COPY_COLUMNS,
 )
+from cli.import_progress import checkpoint_path, load_checkpoint, save_checkpoint
 from app.models.database_models import InfluencerPost
 
 
@@ -27,6 +37,18 @@ class TestParseArgs:
             args = parse_args()
             assert args.file == "test.csv"
             assert args.batch_size == 1000  # デフォルト値
+            assert args.mode == "orm"  # デフォルト値
+            assert args.workers == 1  # デフォルト値
+            assert args.writers == 1  # デフォルト値
+            assert args.resume is False  # デフォルト値
+
+    def test_parse_args_copy_mode(self):
+        """COPYモード指定でのコマンドライン引数パースのテスト"""
+        with mock.patch(
+            "sys.argv", ["import_csv.py", "--file", "test.csv", "--mode", "copy"]
+        ):
+            args = parse_args()
+            assert args.mode == "copy"
 
     def test_parse_args_custom_batch_size(self):
         """カスタムバッチサイズでのコマンドライン引数パースのテスト"""
@@ -154,7 +176,13 @@ class TestCommitRecords:
         mock_db = mock.MagicMock()
         mock_records = [mock.MagicMock(), mock.MagicMock()]
 
-        result = commit_records(mock_db, mock_records, 100)
+        with mock.patch("cli.import_csv.store_post_nouns") as mock_store_nouns:
+            with mock.patch("cli.import_csv.store_post_tags") as mock_store_tags:
+                result = commit_records(mock_db, mock_records, 100)
+
+            # 名詞・タグの出現回数も同じトランザクションで保存されることを確認
+            mock_store_nouns.assert_called_once_with(mock_db, mock_records)
+            mock_store_tags.assert_called_once_with(mock_db, mock_records)
 
         # データベースのbulk_save_objectsとcommitが呼ばれたことを確認
         mock_db.bulk_save_objects.assert_called_once_with(mock_records)
@@ -176,6 +204,209 @@ class TestCommitRecords:
         assert result == []
 
 
+VALID_ROW = {
+    "influencer_id": "1",
+    "post_id": "123",
+    "shortcode": "abc123",
+    "likes": "100",
+    "comments": "50",
+    "thumbnail": "",
+    "text": "Test post text",
+    "post_date": "2023-01-01 12:00:00",
+}
+
+
+class TestCopyMode:
+    def test_parse_row(self):
+        """行データが型変換済みの辞書になるテスト"""
+        values = parse_row(VALID_ROW)
+
+        assert values["influencer_id"] == 1
+        assert values["post_id"] == 123
+        assert values["thumbnail"] == ""
+        assert values["post_date"] == datetime(2023, 1, 1, 12, 0, 0)
+
+    def test_copy_rows_to_staging(self):
+        """ステージングテーブル作成後にCOPY FROM STDINで投入するテスト"""
+        mock_db = mock.MagicMock()
+        cursor = mock_db.connection.return_value.connection.cursor.return_value
+
+        copy_rows_to_staging(mock_db, [parse_row(VALID_ROW)])
+
+        assert "CREATE TEMP TABLE" in str(mock_db.execute.call_args[0][0])
+        sql, buffer = cursor.copy_expert.call_args[0]
+        assert sql == COPY_SQL
+        # 空文字列がNULLにならないよう全項目がクォートされていること
+        assert buffer.getvalue() == (
+            '"1","123","abc123","100","50","","Test post text",'
+            '"2023-01-01 12:00:00"\r\n'
+        )
+        cursor.close.assert_called_once()
+
+    def test_commit_copy_records(self):
+        """マージで追加された投稿のみ名詞を保存してコミットするテスト"""
+        mock_db = mock.MagicMock()
+        mock_db.execute.return_value.fetchall.return_value = [(123,)]
+        rows = [parse_row(VALID_ROW), parse_row({**VALID_ROW, "post_id": "456"})]
+
+        with mock.patch("cli.import_csv.copy_rows_to_staging") as mock_copy:
+            with mock.patch("cli.import_csv.store_post_nouns") as mock_store_nouns:
+                with mock.patch("cli.import_csv.store_post_tags") as mock_store_tags:
+                    result = commit_copy_records(mock_db, rows, 2)
+
+        mock_copy.assert_called_once_with(mock_db, rows)
+        stored = mock_store_nouns.call_args[0][1]
+        assert [post.post_id for post in stored] == [123]
+        assert stored[0].text == "Test post text"
+        assert mock_store_tags.call_args[0][1] == stored
+        mock_db.commit.assert_called_once()
+        assert result == []
+
+    def test_commit_copy_records_duplicate_post_id(self):
+        """重複post_idはマージと名詞の保存のどちらも先頭の行を使うテスト"""
+        mock_db = mock.MagicMock()
+        mock_db.execute.return_value.fetchall.return_value = [(123,)]
+        rows = [
+            parse_row(VALID_ROW),
+            parse_row({**VALID_ROW, "text": "Updated text"}),
+        ]
+
+        with mock.patch("cli.import_csv.copy_rows_to_staging"):
+            with mock.patch("cli.import_csv.store_post_nouns") as mock_store_nouns:
+                with mock.patch("cli.import_csv.store_post_tags"):
+                    commit_copy_records(mock_db, rows, 2)
+
+        stored = mock_store_nouns.call_args[0][1]
+        assert [post.text for post in stored] == ["Test post text"]
+        # ステージングテーブルは投入順に採番し、post_idごとに最初の行を残す
+        assert "GENERATED ALWAYS AS IDENTITY" in CREATE_STAGING_SQL
+        assert "ORDER BY post_id, ordinal" in MERGE_STAGING_SQL
+
+    def test_commit_copy_records_empty(self):
+        """レコードがない場合は何もしないテスト"""
+        mock_db = mock.MagicMock()
+
+        assert commit_copy_records(mock_db, [], 0) == []
+        mock_db.execute.assert_not_called()
+        mock_db.commit.assert_not_called()
+
+    def test_process_row_copy_mode(self):
+        """COPYモードではORMインスタンスを作らずバッチをCOPYでコミットするテスト"""
+        mock_db = mock.MagicMock()
+
+        result = process_csv_row(mock_db, VALID_ROW, [], 10, 5, "copy")
+        assert result == [parse_row(VALID_ROW)]
+
+        with mock.patch(
+            "cli.import_csv.commit_copy_records", return_value=[]
+        ) as mock_commit:
+            result = process_csv_row(mock_db, VALID_ROW, [], 10, 10, "copy")
+
+        mock_commit.assert_called_once_with(mock_db, [parse_row(VALID_ROW)], 10)
+        assert result == []
+
+
+class TestUpsertMode:
+    def test_parse_args_upsert_mode(self):
+        """upsertモード指定でのコマンドライン引数パースのテスト"""
+        with mock.patch(
+            "sys.argv", ["import_csv.py", "--file", "test.csv", "--mode", "upsert"]
+        ):
+            assert parse_args().mode == "upsert"
+
+    def test_commit_upsert_records(self):
+        """新規投稿とテキストが変わった投稿のみ名詞を保存し直すテスト"""
+        mock_db = mock.MagicMock()
+        rows = [
+            parse_row({**VALID_ROW, "post_id": "1", "text": "古いテキスト"}),
+            # 同一バッチ内の重複は後の行が優先される
+            parse_row({**VALID_ROW, "post_id": "1", "text": "新しいテキスト"}),
+            parse_row({**VALID_ROW, "post_id": "2", "likes": "999"}),
+            parse_row({**VALID_ROW, "post_id": "3"}),
+            parse_row({**VALID_ROW, "post_id": "4"}),
+        ]
+
+        with mock.patch("cli.import_csv.InfluencerPostRepository") as mock_repo_class:
+            repository = mock_repo_class.return_value
+            # 1, 2, 3 は既存。3 は変更なし、4 は新規
+            repository.get_texts_by_post_ids.return_value = {
+                1: "古いテキスト",
+                2: "Test post text",
+                3: "Test post text",
+            }
+            repository.upsert_posts.return_value = {1, 2, 4}
+
+            with mock.patch("cli.import_csv.store_post_nouns") as mock_store_nouns:
+                with mock.patch("cli.import_csv.store_post_tags") as mock_store_tags:
+                    result = commit_upsert_records(mock_db, rows, 5)
+
+        repository.get_texts_by_post_ids.assert_called_once_with([1, 2, 3, 4])
+        upserted = repository.upsert_posts.call_args[0][0]
+        assert [row["post_id"] for row in upserted] == [1, 2, 3, 4]
+        assert upserted[0]["text"] == "新しいテキスト"
+
+        # いいね数のみ変わった投稿2は形態素解析し直さない
+        stored = mock_store_nouns.call_args[0][1]
+        assert [post.post_id for post in stored] == [1, 4]
+        assert mock_store_tags.call_args[0][1] == stored
+        mock_db.commit.assert_called_once()
+        assert result == []
+
+    def test_commit_upsert_records_empty(self):
+        """レコードがない場合は何もしないテスト"""
+        mock_db = mock.MagicMock()
+
+        with mock.patch("cli.import_csv.InfluencerPostRepository") as mock_repo_class:
+            assert commit_upsert_records(mock_db, [], 0) == []
+
+        mock_repo_class.assert_not_called()
+        mock_db.commit.assert_not_called()
+
+    def test_process_row_upsert_mode(self):
+        """upsertモードではバッチをupsertでコミットするテスト"""
+        mock_db = mock.MagicMock()
+
+        with mock.patch(
+            "cli.import_csv.commit_upsert_records", return_value=[]
+        ) as mock_commit:
+            result = process_csv_row(mock_db, VALID_ROW, [], 10, 10, "upsert")
+
+        mock_commit.assert_called_once_with(mock_db, [parse_row(VALID_ROW)], 10)
+        assert result == []
+
+
+class TestRefreshRollups:
+    def test_refresh_touched_influencers(self):
+        """インポート対象のインフルエンサーの集計値のみ更新するテスト"""
+        mock_db = mock.MagicMock()
+
+        with mock.patch("cli.import_csv.InfluencerStatsRepository") as mock_repo:
+            refresh_rollups(mock_db, {3, 1})
+
+        mock_repo.return_value.refresh.assert_called_once_with([1, 3])
+        mock_db.commit.assert_called_once()
+
+    def test_refresh_all_influencers(self):
+        """対象が不明な場合（再開時）は全インフルエンサーを更新するテスト"""
+        mock_db = mock.MagicMock()
+
+        with mock.patch("cli.import_csv.InfluencerStatsRepository") as mock_repo:
+            refresh_rollups(mock_db, None)
+
+        mock_repo.return_value.refresh.assert_called_once_with()
+        mock_db.commit.assert_called_once()
+
+    def test_refresh_without_influencers(self):
+        """インポート対象がない場合は何もしないテスト"""
+        mock_db = mock.MagicMock()
+
+        with mock.patch("cli.import_csv.InfluencerStatsRepository") as mock_repo:
+            refresh_rollups(mock_db, set())
+
+        mock_repo.assert_not_called()
+        mock_db.commit.assert_not_called()
+
+
 class TestProcessCsvRow:
     def test_process_row_normal(self):
         """通常の行処理のテスト"""
@@ -294,7 +525,11 @@ class TestProcessCsvFile:
                 # process_csv_rowが呼ばれるたびに空リストを返す設定
                 mock_process_row.return_value = []
 
-                result = process_csv_file(mock_csv_file, mock_db, 10)
+                with mock.patch("cli.import_csv.refresh_rollups") as mock_refresh:
+                    result = process_csv_file(mock_csv_file, mock_db, 10)
+
+                    # インポート完了後に対象インフルエンサーの集計値が更新されることを確認
+                    mock_refresh.assert_called_once_with(mock_db, {1})
 
                 # 処理が成功し、True が返されることを確認
                 assert result is True
@@ -312,6 +547,110 @@ class TestProcessCsvFile:
             assert result is False
 
 
+class TestResume:
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        """5行のCSVファイル（テキストに改行を含む）"""
+        path = tmp_path / "posts.csv"
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COPY_COLUMNS)
+            writer.writeheader()
+            for post_id in range(1, 6):
+                writer.writerow(
+                    {**VALID_ROW, "post_id": str(post_id), "text": f"1行目\n{post_id}"}
+                )
+        return str(path)
+
+    def test_resume_from_checkpoint(self, csv_path):
+        """中断後に --resume でコミット済みの次の行から再開するテスト"""
+        written = []
+
+        def failing_flush(db, records, row_count, mode):
+            if len(written) >= 2:
+                raise RuntimeError("接続断")
+            written.extend(record["post_id"] for record in records)
+            return []
+
+        with mock.patch("cli.import_csv.flush_records", side_effect=failing_flush):
+            with pytest.raises(RuntimeError):
+                process_csv_file(csv_path, mock.MagicMock(), 2, "copy")
+
+        # 最初のバッチ（2行）のみコミット済み
+        checkpoint = load_checkpoint(csv_path, "copy")
+        assert checkpoint["rows"] == 2
+        assert written == [1, 2]
+
+        written.clear()
+        mock_db = mock.MagicMock()
+        with mock.patch(
+            "cli.import_csv.flush_records",
+            side_effect=lambda db, records, row_count, mode: written.extend(
+                record["post_id"] for record in records
+            )
+            or [],
+        ):
+            with mock.patch("cli.import_csv.refresh_rollups") as mock_refresh:
+                assert process_csv_file(csv_path, mock_db, 2, "copy", resume=True)
+
+        assert written == [3, 4, 5]
+        # 中断前にコミットした分も含めて全件の集計値を更新する
+        mock_refresh.assert_called_once_with(mock_db, None)
+        assert not os.path.exists(checkpoint_path(csv_path))
+
+    def test_resume_without_checkpoint(self, csv_path):
+        """チェックポイントがない場合は先頭から処理するテスト"""
+        with mock.patch("cli.import_csv.flush_records", return_value=[]):
+            with mock.patch("cli.import_csv.refresh_rollups") as mock_refresh:
+                assert process_csv_file(csv_path, mock.MagicMock(), 2, "copy", True)
+
+        assert mock_refresh.call_args[0][1] == {1}
+
+    def test_resume_with_changed_mode(self, csv_path):
+        """チェックポイントと異なるインポート方式では再開しないテスト"""
+        save_checkpoint(csv_path, "copy", 10, 1)
+
+        assert process_csv_file(csv_path, mock.MagicMock(), 2, "upsert", True) is False
+
+    def test_resume_after_partially_committed_batch(self, csv_path):
+        """チェックポイント保存前に中断した場合、ORMモードでは再開せず copy で再投入するテスト"""
+        committed = []
+
+        def flush(db, records, row_count, mode):
+            committed.extend(
+                record.post_id if mode == "orm" else record["post_id"]
+                for record in records
+            )
+            return []
+
+        # 2つ目のバッチのコミット後、チェックポイントの保存前に中断
+        real_save = save_checkpoint
+
+        def failing_save(file_path, mode, offset, rows):
+            if rows > 2:
+                raise RuntimeError("中断")
+            real_save(file_path, mode, offset, rows)
+
+        with mock.patch("cli.import_csv.flush_records", side_effect=flush):
+            with mock.patch("cli.import_csv.save_checkpoint", side_effect=failing_save):
+                with pytest.raises(RuntimeError):
+                    process_csv_file(csv_path, mock.MagicMock(), 2, "orm")
+        assert committed == [1, 2, 3, 4]
+        assert load_checkpoint(csv_path, "copy")["rows"] == 2
+
+        # ORMモードでは再投入した投稿が一意制約に違反するため再開しない
+        with mock.patch("cli.import_csv.flush_records") as mock_flush:
+            assert process_csv_file(csv_path, mock.MagicMock(), 2, "orm", True) is False
+        mock_flush.assert_not_called()
+
+        # copy モードではコミット済みのバッチも再投入し、既存の投稿はマージでスキップされる
+        committed.clear()
+        with mock.patch("cli.import_csv.flush_records", side_effect=flush):
+            with mock.patch("cli.import_csv.refresh_rollups"):
+                assert process_csv_file(csv_path, mock.MagicMock(), 2, "copy", True)
+        assert committed == [3, 4, 5]
+        assert not os.path.exists(checkpoint_path(csv_path))
+
+
 class TestImportCsv:
     def test_import_nonexistent_file(self):
         """存在しないファイルのインポート失敗テスト"""
@@ -332,10 +671,29 @@ class TestImportCsv:
                 # インポートが成功し、True が返されることを確認
                 assert result is True
                 # process_csv_fileが呼ばれたことを確認
-                mock_process.assert_called_once_with(mock_csv_file, mock_db, 1000)
+                mock_process.assert_called_once_with(
+                    mock_csv_file, mock_db, 1000, "orm", False
+                )
                 # DBセッションがクローズされたことを確認
                 mock_db.close.assert_called_once()
 
+    def test_import_parallel(self, mock_csv_file):
+        """ワーカー数・書き込み数の指定時は並列パイプラインで処理するテスト"""
+        with mock.patch("cli.import_csv.SessionLocal") as mock_session:
+            mock_db = mock.MagicMock()
+            mock_session.return_value = mock_db
+
+            with mock.patch(
+                "cli.parallel_import.process_csv_file_parallel", return_value=True
+            ) as mock_process:
+                result = import_csv(mock_csv_file, 500, "copy", workers=4, writers=2)
+
+            assert result is True
+            mock_process.assert_called_once_with(
+                mock_csv_file, mock_db, 500, "copy", 4, 2, False
+            )
+            mock_db.close.assert_called_once()
+
     def test_import_io_error(self, mock_csv_file):
         """IOエラー発生時の処理テスト"""
         with mock.patch("cli.import_csv.SessionLocal") as mock_session:
@@ -362,6 +720,10 @@ class TestMain:
             mock_args = mock.MagicMock()
             mock_args.file = "test.csv"
             mock_args.batch_size = 1000
+            mock_args.mode = "orm"
+            mock_args.workers = 1
+            mock_args.writers = 1
+            mock_args.resume = False
             mock_parse_args.return_value = mock_args
 
             with mock.patch(
@@ -371,7 +733,9 @@ class TestMain:
                     main()
 
                     # import_csvが正しい引数で呼ばれたことを確認
-                    mock_import.assert_called_once_with("test.csv", 1000)
+                    mock_import.assert_called_once_with(
+                        "test.csv", 1000, "orm", 1, 1, False
+                    )
                     # 成功時に終了コード0で終了することを確認
                     mock_exit.assert_called_once_with(0)
 
@@ -381,6 +745,10 @@ class TestMain:
             mock_args = mock.MagicMock()
             mock_args.file = "test.csv"
             mock_args.batch_size = 1000
+            mock_args.mode = "orm"
+            mock_args.workers = 1
+            mock_args.writers = 1
+            mock_args.resume = False
             mock_parse_args.return_value = mock_args
 
             with mock.patch(
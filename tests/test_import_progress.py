@@ -0,0 +1,159 @@
+"""
+cli/import_progress.py のテスト
+"""
+import json
+import os
+
+import pytest
+
+from cli.import_progress import (
+    ImportProgress,
+    checkpoint_path,
+    clear_checkpoint,
+    load_checkpoint,
+    save_checkpoint,
+    stage,
+)
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestImportProgress:
+    def test_snapshot(self):
+        """行/秒・バイト/秒・進捗率・残り時間の計算テスト"""
+        clock = FakeClock()
+        progress = ImportProgress(1000, start_offset=100, start_rows=10, clock=clock)
+
+        clock.now += 2
+        progress.advance(40, 300)
+        stats = progress.snapshot()
+
+        assert stats["rows"] == 50
+        assert stats["rows_per_sec"] == 20
+        assert stats["bytes_per_sec"] == 100
+        assert stats["percent"] == 30
+        assert stats["eta_seconds"] == 7
+
+    def test_eta_unknown_before_progress(self):
+        """まだ何も処理していない場合の残り時間は不明"""
+        progress = ImportProgress(1000, clock=FakeClock())
+
+        assert progress.snapshot()["eta_seconds"] is None
+        assert ImportProgress(0, clock=FakeClock()).snapshot()["percent"] == 100
+
+    def test_unknown_total_bytes(self, caplog):
+        """入力サイズが不明な場合は進捗率と残り時間を出さないテスト"""
+        clock = FakeClock()
+        progress = ImportProgress(None, clock=clock)
+
+        clock.now += 2
+        progress.advance(10, 400)
+        stats = progress.snapshot()
+
+        assert stats["percent"] is None
+        assert stats["eta_seconds"] is None
+        assert stats["bytes_per_sec"] == 200
+        with caplog.at_level("INFO"):
+            progress.report()
+        assert "全体サイズ不明" in caplog.text
+        assert "残り約不明" in caplog.text
+
+    def test_stage_timing(self):
+        """段階ごとの処理時間が加算されるテスト"""
+        clock = FakeClock()
+        progress = ImportProgress(1000, clock=clock)
+
+        with progress.stage("parse"):
+            clock.now += 1.5
+        with pytest.raises(RuntimeError):
+            with stage(progress, "write"):
+                clock.now += 2
+                raise RuntimeError("失敗しても時間は加算される")
+        progress.add_stage_time("convert", 0.5)
+
+        assert progress.snapshot()["stage_seconds"] == {
+            "parse": 1.5,
+            "convert": 0.5,
+            "write": 2,
+        }
+
+    def test_stage_without_progress(self):
+        """progressがNoneの場合は何も計測しないテスト"""
+        with stage(None, "parse"):
+            pass
+
+    def test_maybe_report_interval(self, caplog):
+        """報告間隔が経過した場合のみ進捗をログに出力するテスト"""
+        clock = FakeClock()
+        progress = ImportProgress(1000, interval=10, clock=clock)
+
+        with caplog.at_level("INFO", logger="cli.import_progress"):
+            clock.now += 5
+            progress.maybe_report()
+            assert "進捗" not in caplog.text
+
+            progress.advance(10, 500)
+            clock.now += 5
+            progress.maybe_report()
+            assert "進捗: 10件 (50.0%)" in caplog.text
+            assert "残り約10秒" in caplog.text
+
+            progress.summary()
+            assert "インポート統計: 10件" in caplog.text
+
+
+class TestCheckpoint:
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        path = tmp_path / "data.csv"
+        path.write_text("header\nrow\n", encoding="utf-8")
+        return str(path)
+
+    def test_save_load_clear(self, csv_path):
+        """チェックポイントの保存・読み込み・削除のテスト"""
+        assert load_checkpoint(csv_path, "copy") is None
+
+        save_checkpoint(csv_path, "copy", 7, 1)
+        checkpoint = load_checkpoint(csv_path, "copy")
+        assert checkpoint["offset"] == 7
+        assert checkpoint["rows"] == 1
+        assert not os.path.exists(checkpoint_path(csv_path) + ".tmp")
+
+        clear_checkpoint(csv_path)
+        assert not os.path.exists(checkpoint_path(csv_path))
+        # 存在しない場合も例外にならない
+        clear_checkpoint(csv_path)
+
+    def test_file_changed(self, csv_path):
+        """チェックポイント作成後にファイルが変わった場合はエラー"""
+        save_checkpoint(csv_path, "copy", 7, 1)
+        with open(csv_path, "a", encoding="utf-8") as f:
+            f.write("row\n")
+
+        with pytest.raises(ValueError):
+            load_checkpoint(csv_path, "copy")
+
+    def test_mode_changed(self, csv_path):
+        """インポート方式が異なる場合はエラー"""
+        save_checkpoint(csv_path, "copy", 7, 1)
+        with open(checkpoint_path(csv_path), encoding="utf-8") as f:
+            assert json.load(f)["mode"] == "copy"
+
+        with pytest.raises(ValueError):
+            load_checkpoint(csv_path, "upsert")
+
+    def test_orm_mode_not_resumable(self, csv_path):
+        """ORMモードでは再開できず、ORMモードで作成したチェックポイントは copy / upsert で再開できる"""
+        save_checkpoint(csv_path, "orm", 7, 1)
+
+        with pytest.raises(ValueError, match="--mode copy または --mode upsert"):
+            load_checkpoint(csv_path, "orm")
+        assert load_checkpoint(csv_path, "upsert")["rows"] == 1
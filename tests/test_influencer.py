@@ -1,5 +1,8 @@
 import pytest
-from unittest.mock import patch
+from datetime import date, datetime
+from unittest.mock import ANY, patch
+
+from app.services import influencer_service
 
 
 @pytest.fixture
@@ -60,9 +63,13 @@ class TestInfluencerEndpoints:
     #     # 404エラーが返ることを確認
     #     assert response.status_code == 404
 
+    @patch(
+        "app.routers.influencer.influencer_service.get_ranking_data_version",
+        return_value=datetime(2023, 1, 1, 12, 0, 0),
+    )
     @patch("app.routers.influencer.influencer_service.get_top_influencers_by_likes")
     def test_get_likes_ranking(
-        self, mock_likes_ranking, api_test_client, mock_ranking_data
+        self, mock_likes_ranking, mock_version, api_test_client, mock_ranking_data
     ):
         """いいね数ランキング取得エンドポイントのテスト"""
         # モックの設定
@@ -82,9 +89,13 @@ class TestInfluencerEndpoints:
         # モックが正しく呼び出されたことを確認
         mock_likes_ranking.assert_called_once()
 
+    @patch(
+        "app.routers.influencer.influencer_service.get_ranking_data_version",
+        return_value=datetime(2023, 1, 1, 12, 0, 0),
+    )
     @patch("app.routers.influencer.influencer_service.get_top_influencers_by_comments")
     def test_get_comments_ranking(
-        self, mock_comments_ranking, api_test_client, mock_ranking_data
+        self, mock_comments_ranking, mock_version, api_test_client, mock_ranking_data
     ):
         """コメント数ランキング取得エンドポイントのテスト"""
         # モックの設定
@@ -103,3 +114,231 @@ class TestInfluencerEndpoints:
 
         # モックが正しく呼び出されたことを確認
         mock_comments_ranking.assert_called_once()
+
+        # 同じデータバージョンではキャッシュしたボディを返し、ランキングを取得しない
+        cached = api_test_client.get("/api/v1/influencers/ranking/comments?limit=3")
+        assert cached.json() == data
+        assert cached.headers["etag"] == response.headers["etag"]
+        assert cached.headers["x-next-cursor"] == response.headers["x-next-cursor"]
+        mock_comments_ranking.assert_called_once()
+
+    @patch(
+        "app.routers.influencer.influencer_service.get_ranking_data_version",
+        return_value=datetime(2023, 1, 1, 12, 0, 0),
+    )
+    @patch("app.routers.influencer.influencer_service.get_top_influencers_by_likes")
+    def test_ranking_conditional_get(
+        self, mock_likes_ranking, mock_version, api_test_client, mock_ranking_data
+    ):
+        """ETag / Last-Modified による条件付きGETのテスト"""
+        mock_likes_ranking.return_value = mock_ranking_data
+
+        # 初回はETagとLast-Modifiedが返る
+        response = api_test_client.get("/api/v1/influencers/ranking/likes?limit=3")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert response.headers["last-modified"] == "Sun, 01 Jan 2023 12:00:00 GMT"
+
+        # 同じETagを送ると集計せずに304が返る
+        mock_likes_ranking.reset_mock()
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking/likes?limit=3",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        mock_likes_ranking.assert_not_called()
+
+        # 最終更新日時以降の If-Modified-Since でも304が返る
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking/likes?limit=3",
+            headers={"If-Modified-Since": "Sun, 01 Jan 2023 12:00:00 GMT"},
+        )
+        assert response.status_code == 304
+
+        # limitが異なればETagも異なる
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking/likes?limit=5",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 200
+
+        # データが更新されると再集計される
+        mock_version.return_value = datetime(2023, 1, 2)
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking/likes?limit=3",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    @patch(
+        "app.routers.influencer.influencer_service.get_ranking_data_version",
+        return_value=None,
+    )
+    @patch("app.routers.influencer.influencer_service.get_top_influencers_by_comments")
+    def test_comments_ranking_conditional_get(
+        self, mock_comments_ranking, mock_version, api_test_client
+    ):
+        """集計値がない場合もETagで304を返せるテスト（Last-Modifiedなし）"""
+        mock_comments_ranking.return_value = []
+
+        response = api_test_client.get("/api/v1/influencers/ranking/comments")
+        assert response.status_code == 200
+        assert "last-modified" not in response.headers
+
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking/comments",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert response.status_code == 304
+
+    @patch(
+        "app.routers.influencer.influencer_service.get_ranking_data_version",
+        return_value=datetime(2023, 1, 1, 12, 0, 0),
+    )
+    @patch("app.routers.influencer.influencer_service.get_top_influencers_by_likes")
+    def test_ranking_pagination(
+        self, mock_likes_ranking, mock_version, api_test_client, mock_ranking_data
+    ):
+        """ページが埋まっている場合は X-Next-Cursor を返し、カーソルで続きを取得するテスト"""
+        mock_likes_ranking.return_value = mock_ranking_data
+
+        response = api_test_client.get("/api/v1/influencers/ranking/likes?limit=3")
+        assert response.status_code == 200
+        cursor = response.headers["x-next-cursor"]
+        first_etag = response.headers["etag"]
+
+        # 最後のページ（件数がlimit未満）ではカーソルを返さない
+        mock_likes_ranking.return_value = mock_ranking_data[:1]
+        response = api_test_client.get(
+            f"/api/v1/influencers/ranking/likes?limit=3&cursor={cursor}",
+            headers={"If-None-Match": first_etag},
+        )
+        assert response.status_code == 200
+        assert "x-next-cursor" not in response.headers
+        mock_likes_ranking.assert_called_with(ANY, 3, cursor, None)
+
+    @patch(
+        "app.routers.influencer.influencer_service.get_ranking_data_version",
+        return_value=datetime(2023, 1, 1, 12, 0, 0),
+    )
+    def test_ranking_invalid_cursor(self, mock_version, api_test_client):
+        """不正なカーソルは400になるテスト"""
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking/comments?cursor=invalid"
+        )
+
+        assert response.status_code == 400
+
+    @patch(
+        "app.routers.influencer.influencer_service.get_ranking_data_version",
+        return_value=datetime(2023, 1, 1, 12, 0, 0),
+    )
+    @patch("app.routers.influencer.influencer_service.get_top_influencers_by_comments")
+    def test_ranking_with_period(
+        self, mock_comments_ranking, mock_version, api_test_client, mock_ranking_data
+    ):
+        """期間を指定すると集計期間をサービスに渡し、ETagも期間ごとに変わるテスト"""
+        mock_comments_ranking.return_value = mock_ranking_data
+
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking/comments?since=2023-01-01&until=2023-01-31"
+        )
+        assert response.status_code == 200
+        period = (date(2023, 1, 1), date(2023, 1, 31))
+        mock_version.assert_called_with(ANY, period)
+        mock_comments_ranking.assert_called_with(ANY, 10, None, period)
+
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking/comments?since=2023-01-01&until=2023-02-28",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize(
+        "query",
+        ["window=7d&since=2023-01-01", "since=2023-02-01&until=2023-01-01"],
+    )
+    def test_ranking_invalid_period(self, query, api_test_client):
+        """期間の指定が不正な場合は400になるテスト"""
+        response = api_test_client.get(f"/api/v1/influencers/ranking/likes?{query}")
+
+        assert response.status_code == 400
+
+    def test_ranking_invalid_window(self, api_test_client):
+        """未対応の直近期間は422になるテスト"""
+        response = api_test_client.get("/api/v1/influencers/ranking/likes?window=1y")
+
+        assert response.status_code == 422
+
+    @patch(
+        "app.routers.influencer.influencer_service.get_ranking_data_version",
+        return_value=datetime(2023, 1, 1, 12, 0, 0),
+    )
+    @patch("app.routers.influencer.influencer_service.get_influencer_ranking")
+    def test_metrics_ranking(self, mock_ranking, mock_version, api_test_client):
+        """指標別ランキングが全指標を返し、ランキングの指標の値でカーソルを作るテスト"""
+        mock_ranking.return_value = [
+            {
+                "influencer_id": 1,
+                "value": 1620.75,
+                "total_posts": 20,
+                "avg_likes": 1500.5,
+                "avg_comments": 120.25,
+                "engagement": 1620.75,
+                "median_likes": 1400.0,
+            }
+        ]
+
+        response = api_test_client.get("/api/v1/influencers/ranking?limit=1")
+        assert response.status_code == 200
+        assert response.json() == mock_ranking.return_value
+        mock_ranking.assert_called_once_with(ANY, "engagement", 1, None, None)
+        assert response.headers["x-next-cursor"] == (
+            influencer_service.encode_ranking_cursor(1620.75, 1)
+        )
+
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking?limit=1",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert response.status_code == 304
+
+        # 指標が変わるとETagも変わる
+        response = api_test_client.get(
+            "/api/v1/influencers/ranking?metric=posts&limit=1&window=7d",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert response.status_code == 200
+        assert mock_ranking.call_args[0][1] == "posts"
+        assert mock_ranking.call_args[0][4] is not None
+
+    def test_metrics_ranking_invalid_metric(self, api_test_client):
+        """未対応の指標は422になるテスト"""
+        response = api_test_client.get("/api/v1/influencers/ranking?metric=shares")
+
+        assert response.status_code == 422
+
+    @patch("app.dependencies.utils.FAST_JSON_RESPONSE", True)
+    @patch(
+        "app.routers.influencer.influencer_service.get_ranking_data_version",
+        return_value=datetime(2023, 1, 1, 12, 0, 0),
+    )
+    @patch("app.routers.influencer.influencer_service.get_top_influencers_by_likes")
+    def test_ranking_fast_json_response(
+        self, mock_likes_ranking, mock_version, api_test_client, mock_ranking_data
+    ):
+        """高速レスポンスモードでも同じ内容とヘッダーを返すテスト"""
+        mock_likes_ranking.return_value = mock_ranking_data
+
+        response = api_test_client.get("/api/v1/influencers/ranking/likes?limit=3")
+
+        assert response.status_code == 200
+        assert response.json() == mock_ranking_data
+        assert response.headers["x-next-cursor"] == (
+            influencer_service.encode_ranking_cursor(800.75, 3)
+        )
+        assert response.headers["cache-control"] == "no-cache"
+        assert "etag" in response.headers
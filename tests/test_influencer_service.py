@@ -1,10 +1,24 @@
 import pytest
-from unittest.mock import MagicMock
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
 from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from app.database.repositories.influencer_stats_repository import (
+    metrics_ranking_statement,
+    period_ranking_statement,
+    ranking_after,
+)
+from app.models.database_models import InfluencerStats
 from app.services.influencer_service import (
+    decode_ranking_cursor,
+    encode_ranking_cursor,
+    get_influencer_ranking,
     get_influencer_stats,
+    get_next_ranking_cursor,
     get_top_influencers_by_likes,
     get_top_influencers_by_comments,
+    get_ranking_data_version,
+    resolve_ranking_period,
 )
 
 
@@ -67,22 +81,24 @@ class TestInfluencerService:
             MagicMock(influencer_id=3, avg_likes=200.0, total_posts=30),
         ]
 
-        # クエリビルダーのモック
+        # クエリビルダーのモック（集計テーブルを読むためGROUP BYは不要）
         query_mock = MagicMock()
-        group_mock = MagicMock()
         order_mock = MagicMock()
         limit_mock = MagicMock()
 
         # モックチェーンの設定
         mock_db_session.query.return_value = query_mock
-        query_mock.group_by.return_value = group_mock
-        group_mock.order_by.return_value = order_mock
+        query_mock.order_by.return_value = order_mock
         order_mock.limit.return_value = limit_mock
         limit_mock.all.return_value = mock_results
 
         # テスト実行
         result = get_top_influencers_by_likes(mock_db_session, 3)
 
+        # 投稿テーブルの集計は行わない
+        query_mock.group_by.assert_not_called()
+        order_mock.limit.assert_called_once_with(3)
+
         # 結果検証
         assert len(result) == 3
         assert result[0]["influencer_id"] == 1
@@ -98,16 +114,14 @@ class TestInfluencerService:
             MagicMock(influencer_id=2, avg_comments=30.0, total_posts=10),
         ]
 
-        # クエリビルダーのモック
+        # クエリビルダーのモック（集計テーブルを読むためGROUP BYは不要）
         query_mock = MagicMock()
-        group_mock = MagicMock()
         order_mock = MagicMock()
         limit_mock = MagicMock()
 
         # モックチェーンの設定
         mock_db_session.query.return_value = query_mock
-        query_mock.group_by.return_value = group_mock
-        group_mock.order_by.return_value = order_mock
+        query_mock.order_by.return_value = order_mock
         order_mock.limit.return_value = limit_mock
         limit_mock.all.return_value = mock_results
 
@@ -119,3 +133,302 @@ class TestInfluencerService:
         assert result[0]["influencer_id"] == 3
         assert result[0]["avg_value"] == 50.0
         assert result[0]["total_posts"] == 25
+
+    def test_get_ranking_data_version(self, mock_db_session):
+        """ランキングのデータバージョン（集計テーブルの最終更新日時）取得テスト"""
+        version = datetime(2023, 1, 1)
+        mock_db_session.query.return_value.scalar.return_value = version
+
+        assert get_ranking_data_version(mock_db_session) == version
+
+
+class TestRankingCursor:
+    @pytest.mark.parametrize(
+        "avg_value, influencer_id", [(1500.5, 1), (0.1 + 0.2, 42), (0.0, 7)]
+    )
+    def test_round_trip(self, avg_value, influencer_id):
+        """カーソルから平均値とIDが誤差なく復元されるテスト"""
+        cursor = encode_ranking_cursor(avg_value, influencer_id)
+
+        assert "=" not in cursor
+        assert decode_ranking_cursor(cursor) == (avg_value, influencer_id)
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "!!!",
+            "bm90LWpzb24",  # JSONではない
+            encode_ranking_cursor("1.0", 1),
+            encode_ranking_cursor(1.0, 1.5),
+            encode_ranking_cursor(True, 1),
+        ],
+    )
+    def test_invalid_cursor(self, cursor):
+        """不正なカーソルは400になるテスト"""
+        with pytest.raises(HTTPException) as excinfo:
+            decode_ranking_cursor(cursor)
+
+        assert excinfo.value.status_code == 400
+
+    def test_get_next_ranking_cursor(self):
+        """ページが埋まっている場合のみ最後の行から次のカーソルを作成するテスト"""
+        rankings = [
+            {"influencer_id": 3, "avg_value": 200.0, "total_posts": 1},
+            {"influencer_id": 5, "avg_value": 150.5, "total_posts": 2},
+        ]
+
+        cursor = get_next_ranking_cursor(rankings, 2)
+
+        assert decode_ranking_cursor(cursor) == (150.5, 5)
+        assert get_next_ranking_cursor(rankings, 3) is None
+        assert get_next_ranking_cursor([], 10) is None
+
+    def test_ranking_after(self):
+        """キーセット条件がインデックスの範囲読み出しになる形で生成されるテスト"""
+        condition = ranking_after(InfluencerStats.avg_likes, (150.5, 5))
+
+        sql = str(
+            condition.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+        assert sql == (
+            "influencer_stats.avg_likes <= 150.5 AND "
+            "(influencer_stats.avg_likes < 150.5 OR influencer_stats.influencer_id > 5)"
+        )
+
+    @pytest.mark.parametrize(
+        "func, value_column",
+        [
+            (get_top_influencers_by_likes, "avg_likes"),
+            (get_top_influencers_by_comments, "avg_comments"),
+        ],
+    )
+    def test_ranking_with_cursor(self, func, value_column, mock_db_session):
+        """カーソルを指定すると続きの位置から取得するテスト"""
+        query = mock_db_session.query.return_value
+        query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
+            MagicMock(influencer_id=9, total_posts=1, **{value_column: 10.0})
+        ]
+
+        result = func(mock_db_session, 2, encode_ranking_cursor(150.5, 5))
+
+        query.filter.assert_called_once()
+        query.filter.return_value.order_by.return_value.limit.assert_called_once_with(2)
+        assert result == [{"influencer_id": 9, "avg_value": 10.0, "total_posts": 1}]
+
+
+class TestRankingPeriod:
+    TODAY = date(2024, 3, 31)
+
+    @pytest.mark.parametrize(
+        "window, since, until, expected",
+        [
+            (None, None, None, None),
+            ("7d", None, None, (date(2024, 3, 25), TODAY)),
+            ("30d", None, None, (date(2024, 3, 2), TODAY)),
+            (None, date(2024, 1, 1), None, (date(2024, 1, 1), TODAY)),
+            (None, None, date(2024, 1, 31), (date.min, date(2024, 1, 31))),
+            (None, date(2024, 1, 1), date(2024, 1, 1), (date(2024, 1, 1),) * 2),
+        ],
+    )
+    def test_resolve_ranking_period(self, window, since, until, expected):
+        """直近期間・開始日・終了日から集計期間を決定するテスト"""
+        assert resolve_ranking_period(window, since, until, self.TODAY) == expected
+
+    @pytest.mark.parametrize(
+        "window, since, until",
+        [
+            ("7d", date(2024, 1, 1), None),
+            ("1y", None, None),
+            (None, date(2024, 2, 1), date(2024, 1, 1)),
+        ],
+    )
+    def test_invalid_period(self, window, since, until):
+        """window と since / until の同時指定や逆転した期間は400になるテスト"""
+        with pytest.raises(HTTPException) as excinfo:
+            resolve_ranking_period(window, since, until, self.TODAY)
+
+        assert excinfo.value.status_code == 400
+
+    def test_resolve_ranking_period_default_today(self):
+        """基準日の省略時はUTCの今日までを集計するテスト"""
+        since, until = resolve_ranking_period("7d")
+
+        assert (until - since).days == 6
+
+    @patch("app.services.influencer_service.InfluencerStatsRepository")
+    def test_get_ranking_data_version_with_period(self, mock_repo, mock_db_session):
+        """期間指定の場合は日別集計値の更新日時も含めて最新の日時を返すテスト"""
+        period = (date(2024, 3, 25), self.TODAY)
+        mock_db_session.query.return_value.scalar.return_value = datetime(2024, 1, 1)
+        daily = mock_repo.return_value.get_latest_daily_update_time
+
+        daily.return_value = datetime(2024, 2, 1)
+        assert get_ranking_data_version(mock_db_session, period) == datetime(2024, 2, 1)
+
+        daily.return_value = None
+        assert get_ranking_data_version(mock_db_session, period) == datetime(2024, 1, 1)
+
+        mock_db_session.query.return_value.scalar.return_value = None
+        assert get_ranking_data_version(mock_db_session, period) is None
+
+    @pytest.mark.parametrize(
+        "func, metric",
+        [
+            (get_top_influencers_by_likes, "likes"),
+            (get_top_influencers_by_comments, "comments"),
+        ],
+    )
+    @patch("app.services.influencer_service.InfluencerStatsRepository")
+    def test_ranking_in_period(self, mock_repo, func, metric, mock_db_session):
+        """期間指定の場合は日別集計値から期間内の平均値でランキングするテスト"""
+        period = (date(2024, 3, 25), self.TODAY)
+        mock_repo.return_value.get_top_in_period.return_value = [
+            MagicMock(influencer_id=4, total_posts=3, **{f"avg_{metric}": 12.5})
+        ]
+
+        result = func(mock_db_session, 5, None, period)
+
+        mock_repo.return_value.get_top_in_period.assert_called_once_with(
+            metric, period, 5, None
+        )
+        assert result == [{"influencer_id": 4, "avg_value": 12.5, "total_posts": 3}]
+
+    def test_period_ranking_statement(self):
+        """期間指定ランキングが日別集計値の期間内の行のみを合計するテスト"""
+        stmt = period_ranking_statement(
+            "likes", (date(2024, 3, 25), self.TODAY), 10, (150.5, 5)
+        )
+
+        sql = " ".join(
+            str(
+                stmt.compile(
+                    dialect=postgresql.dialect(),
+                    compile_kwargs={"literal_binds": True},
+                )
+            ).split()
+        )
+        assert "FROM influencer_daily_stats" in sql
+        assert "influencer_posts" not in sql
+        assert (
+            "WHERE influencer_daily_stats.day BETWEEN '2024-03-25' AND '2024-03-31'"
+            in sql
+        )
+        assert "GROUP BY influencer_daily_stats.influencer_id HAVING" in sql
+        assert "influencer_daily_stats.influencer_id > 5" in sql
+        assert sql.endswith("influencer_daily_stats.influencer_id LIMIT 10")
+
+
+def _compile(stmt):
+    """SQLを値を埋め込んだ1行の文字列に変換"""
+    return " ".join(
+        str(
+            stmt.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        ).split()
+    )
+
+
+class TestMetricsRanking:
+    @patch("app.services.influencer_service.ENGAGEMENT_COMMENT_WEIGHT", 2.0)
+    @patch("app.services.influencer_service.InfluencerStatsRepository")
+    def test_get_influencer_ranking(self, mock_repo, mock_db_session):
+        """1回のクエリの結果から全指標を返すテスト"""
+        mock_repo.return_value.get_ranking.return_value = [
+            MagicMock(
+                influencer_id=1,
+                value=25,
+                total_posts=4,
+                avg_likes=15,
+                avg_comments=5,
+                median_likes=12,
+            ),
+            MagicMock(
+                influencer_id=2,
+                value=14,
+                total_posts=2,
+                avg_likes=10,
+                avg_comments=2,
+                median_likes=None,
+            ),
+        ]
+        cursor = encode_ranking_cursor(30.0, 3)
+
+        result = get_influencer_ranking(mock_db_session, "engagement", 2, cursor)
+
+        mock_repo.return_value.get_ranking.assert_called_once_with(
+            "engagement", 2.0, 2, (30.0, 3), None
+        )
+        assert result[0] == {
+            "influencer_id": 1,
+            "value": 25.0,
+            "total_posts": 4,
+            "avg_likes": 15.0,
+            "avg_comments": 5.0,
+            "engagement": 25.0,
+            "median_likes": 12.0,
+        }
+        assert result[1]["median_likes"] is None
+        assert get_next_ranking_cursor(result, 2, "value") == (
+            encode_ranking_cursor(14.0, 2)
+        )
+
+    @pytest.mark.parametrize(
+        "metric, period",
+        [
+            ("shares", None),
+            ("median_likes", (date(2024, 3, 1), date(2024, 3, 31))),
+        ],
+    )
+    def test_invalid_metric(self, metric, period, mock_db_session):
+        """未対応の指標と、期間指定での中央値は400になるテスト"""
+        with pytest.raises(HTTPException) as exc_info:
+            get_influencer_ranking(mock_db_session, metric, 10, None, period)
+
+        assert exc_info.value.status_code == 400
+
+    def test_all_time_statement(self):
+        """全期間は集計テーブルの1行から全指標を取得し、指標の順に並べるテスト"""
+        sql = _compile(metrics_ranking_statement("engagement", 2.0, 10, (30.0, 5)))
+
+        assert "FROM influencer_stats" in sql
+        assert "influencer_posts" not in sql
+        assert "GROUP BY" not in sql
+        assert "coalesce(influencer_stats.median_likes, 0.0) AS median_likes" in sql
+        assert (
+            "influencer_stats.avg_likes + influencer_stats.avg_comments * 2.0 AS value"
+            in sql
+        )
+        assert "influencer_stats.influencer_id > 5" in sql
+        assert sql.endswith(
+            "ORDER BY influencer_stats.avg_likes + influencer_stats.avg_comments * 2.0"
+            " DESC, influencer_stats.influencer_id LIMIT 10"
+        )
+
+    @pytest.mark.parametrize(
+        "metric, value",
+        [
+            ("likes", "influencer_stats.avg_likes AS value"),
+            ("comments", "influencer_stats.avg_comments AS value"),
+            ("median_likes", "coalesce(influencer_stats.median_likes, 0.0) AS value"),
+            ("posts", "influencer_stats.post_count AS value"),
+        ],
+    )
+    def test_statement_metric(self, metric, value):
+        """指標ごとにランキングの値が変わるテスト"""
+        assert value in _compile(metrics_ranking_statement(metric, 1.0))
+
+    def test_period_statement(self):
+        """期間指定は日別集計値の1回の集計から全指標を取得するテスト"""
+        period = (date(2024, 3, 1), date(2024, 3, 31))
+
+        sql = _compile(metrics_ranking_statement("posts", 1.0, 10, (3.0, 5), period))
+
+        assert "FROM influencer_daily_stats" in sql
+        assert "influencer_posts" not in sql
+        assert sql.count("FROM") == 1
+        assert "sum(influencer_daily_stats.post_count) AS value" in sql
+        assert "GROUP BY influencer_daily_stats.influencer_id HAVING" in sql
+        assert "influencer_daily_stats.influencer_id > 5" in sql
@@ -56,7 +56,7 @@ class TestInfluencerServiceRepository:
         assert excinfo.value.status_code == 404
         assert "Influencer with ID 999 not found" in str(excinfo.value.detail)
 
-    @patch("app.services.influencer_service_repository.InfluencerPostRepository")
+    @patch("app.services.influencer_service_repository.InfluencerStatsRepository")
     def test_get_top_influencers_by_likes(self, mock_repository):
         """いいね数ランキング取得のテスト"""
         # モックセッションとモックリポジトリの設定
@@ -83,7 +83,7 @@ class TestInfluencerServiceRepository:
         assert result[0]["avg_value"] == 1500.5
         assert result[0]["total_posts"] == 20
 
-    @patch("app.services.influencer_service_repository.InfluencerPostRepository")
+    @patch("app.services.influencer_service_repository.InfluencerStatsRepository")
     def test_get_top_influencers_by_comments(self, mock_repository):
         """コメント数ランキング取得のテスト"""
         # モックセッションとモックリポジトリの設定
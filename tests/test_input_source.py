@@ -0,0 +1,401 @@
+"""
+cli/input_source.py と圧縮ファイル・標準入力からのインポートのテスト
+"""
+import builtins
+import bz2
+import csv
+import gzip
+import io
+import os
+import struct
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from cli.import_csv import COPY_COLUMNS, ByteOffsetLines, import_csv, process_csv_file
+from cli.import_progress import checkpoint_path, load_checkpoint
+from cli.input_source import InputSource, _open_zstd, detect_codec
+from cli.parallel_import import process_csv_file_parallel, read_blocks
+
+
+def _csv_bytes(count=10):
+    """クォート内の改行を含むCSVデータ"""
+    buffer = io.StringIO(newline="")
+    writer = csv.DictWriter(buffer, fieldnames=COPY_COLUMNS)
+    writer.writeheader()
+    for post_id in range(1, count + 1):
+        writer.writerow(
+            {
+                "influencer_id": str(post_id % 2 + 1),
+                "post_id": str(post_id),
+                "shortcode": f"code{post_id}",
+                "likes": "100",
+                "comments": "5",
+                "thumbnail": "https://example.com/thumb.jpg",
+                "text": f'1行目\n"引用",{post_id}',
+                "post_date": "2023-01-01 12:00:00",
+            }
+        )
+    return buffer.getvalue().encode("utf-8")
+
+
+@pytest.fixture
+def gzip_file(tmp_path):
+    """gzip圧縮したCSVファイル"""
+    path = tmp_path / "posts.csv.gz"
+    path.write_bytes(gzip.compress(_csv_bytes()))
+    return str(path)
+
+
+class NonSeekableStream(io.BytesIO):
+    """シークできないストリーム（パイプの代わり）"""
+
+    def seekable(self):
+        return False
+
+
+def _fake_stdin(data):
+    """標準入力の代わりに使うオブジェクト"""
+    return SimpleNamespace(buffer=io.BytesIO(data))
+
+
+def _collect_flush(written):
+    """書き込まれた post_id を記録する flush_records の代替"""
+    return (
+        lambda db, records, row_count, mode: written.extend(
+            record["post_id"] for record in records
+        )
+        or []
+    )
+
+
+class TestInputSource:
+    def test_detect_codec(self):
+        """マジックバイトから圧縮形式を判定するテスト"""
+        assert detect_codec(gzip.compress(b"a")[:4]) == "gzip"
+        assert detect_codec(bz2.compress(b"a")[:4]) == "bz2"
+        assert detect_codec(b"\x28\xb5\x2f\xfd") == "zstd"
+        assert detect_codec(b"infl") is None
+
+    @pytest.mark.parametrize(
+        "suffix, compress",
+        [("csv", lambda data: data), ("gz", gzip.compress), ("bz2", bz2.compress)],
+    )
+    def test_round_trip(self, tmp_path, suffix, compress):
+        """拡張子に関係なく展開後のデータを読めるテスト"""
+        data = _csv_bytes()
+        path = tmp_path / f"posts.{suffix}"
+        path.write_bytes(compress(data))
+
+        with InputSource(str(path)) as source:
+            assert source.stream.readline() == data.split(b"\n", 1)[0] + b"\n"
+            assert source.stream.read() == data.split(b"\n", 1)[1]
+            assert source.seekable is (suffix == "csv")
+            assert source.total_bytes == (len(data) if suffix == "csv" else None)
+
+    def test_zstd_without_package(self, tmp_path):
+        """zstandard がない場合はインストール方法を含むエラーになるテスト"""
+        path = tmp_path / "posts.csv.zst"
+        path.write_bytes(b"\x28\xb5\x2f\xfd" + b"\x00" * 8)
+        real_import = builtins.__import__
+
+        def fake_import(name, *args, **kwargs):
+            if name == "zstandard":
+                raise ImportError(name)
+            return real_import(name, *args, **kwargs)
+
+        with mock.patch("builtins.__import__", side_effect=fake_import):
+            with pytest.raises(ValueError, match="pip install zstandard"):
+                InputSource(str(path))
+
+    def test_zstd_round_trip(self, tmp_path):
+        """zstd圧縮ファイルを展開して読めるテスト"""
+        zstandard = pytest.importorskip("zstandard")
+        data = _csv_bytes()
+        path = tmp_path / "posts.csv.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(data))
+
+        with InputSource(str(path)) as source:
+            assert source.codec == "zstd"
+            assert source.stream.read() == data
+
+    def test_zstd_multiple_frames(self, tmp_path):
+        """連結された複数のzstdフレームを続けて展開するテスト"""
+        zstandard = pytest.importorskip("zstandard")
+        data = _csv_bytes()
+        head, tail = data[:100], data[100:]
+        path = tmp_path / "posts.csv.zst"
+        compressor = zstandard.ZstdCompressor()
+        path.write_bytes(compressor.compress(head) + compressor.compress(tail))
+
+        with InputSource(str(path)) as source:
+            assert source.stream.read() == data
+
+    def test_zstd_truncated_and_corrupt(self, tmp_path):
+        """途中で途切れたzstdは EOFError、壊れたデータは ValueError になるテスト"""
+        zstandard = pytest.importorskip("zstandard")
+        compressed = zstandard.ZstdCompressor().compress(_csv_bytes(1000))
+        path = tmp_path / "posts.csv.zst"
+
+        path.write_bytes(compressed[:-20])
+        with InputSource(str(path)) as source:
+            with pytest.raises(EOFError):
+                source.stream.read()
+
+        path.write_bytes(compressed[:4] + b"\xff" * 16)
+        with InputSource(str(path)) as source:
+            with pytest.raises(ValueError, match="zstd"):
+                source.stream.read()
+
+    def test_zstd_frame_variants(self, tmp_path):
+        """チェックサム・内容サイズなしのフレームやスキップ可能フレームを含むzstdを展開し、
+        フレームの境界以外で途切れた場合は EOFError になるテスト"""
+        zstandard = pytest.importorskip("zstandard")
+        data = _csv_bytes(200)
+        frames = [
+            zstandard.ZstdCompressor(write_checksum=True).compress(data[:500]),
+            struct.pack("<II", 0x184D2A53, 4) + b"skip",
+            zstandard.ZstdCompressor(write_content_size=False).compress(data[500:]),
+        ]
+        compressed = b"".join(frames)
+        path = tmp_path / "posts.csv.zst"
+
+        path.write_bytes(compressed)
+        with InputSource(str(path)) as source:
+            assert source.stream.read() == data
+
+        boundaries = {len(frames[0]), len(frames[0]) + len(frames[1])}
+        for cut in range(4, len(compressed)):
+            stream = _open_zstd(io.BufferedReader(io.BytesIO(compressed[:cut])))
+            if cut in boundaries:
+                stream.read()
+            else:
+                with pytest.raises((EOFError, ValueError)):
+                    stream.read()
+
+    def test_zstd_high_ratio_memory(self, tmp_path):
+        """圧縮率が高いフレームも一定のメモリで展開するテスト"""
+        zstandard = pytest.importorskip("zstandard")
+        size = 64 * 1024 * 1024
+        path = tmp_path / "posts.csv.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(b"a" * size))
+
+        total = 0
+        tracemalloc.start()
+        try:
+            with InputSource(str(path)) as source:
+                while chunk := source.stream.read(1024 * 1024):
+                    total += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert total == size
+        assert peak < 8 * 1024 * 1024
+
+    def test_stdin(self):
+        """ "-" の場合は標準入力を読み、閉じないテスト"""
+        stdin = _fake_stdin(gzip.compress(b"header\nrow\n"))
+
+        with mock.patch("cli.input_source.sys.stdin", stdin):
+            with InputSource("-") as source:
+                assert source.is_stdin
+                assert source.codec == "gzip"
+                assert source.total_bytes is None
+                assert source.stream.read() == b"header\nrow\n"
+
+        assert not stdin.buffer.closed
+
+
+class TestStreaming:
+    def test_seek_compressed(self, gzip_file):
+        """圧縮ファイルでも再開位置から読み込めるテスト"""
+        data = _csv_bytes()
+        with InputSource(gzip_file) as source:
+            lines = ByteOffsetLines(source.stream)
+            next(lines)
+            lines.seek(100)
+            assert lines.offset == 100
+            assert source.stream.read() == data[100:]
+
+    def test_seek_reads_forward(self):
+        """シークできないストリームは再開位置まで読み飛ばすテスト"""
+        lines = ByteOffsetLines(NonSeekableStream(b"header\nrow1\nrow2\n"))
+        next(lines)
+        lines.seek(12)
+        assert lines.offset == 12
+        assert next(lines) == "row2\n"
+
+        with pytest.raises(ValueError):
+            lines.seek(100)
+
+    @pytest.mark.parametrize("chunk_bytes", [1, 37, 1000])
+    def test_read_blocks_keeps_records_whole(self, chunk_bytes):
+        """ブロックがクォート内の改行で分割されないテスト"""
+        data = _csv_bytes()
+        header_size = data.index(b"\n") + 1
+        stream = io.BytesIO(data[header_size:])
+
+        blocks = list(read_blocks(stream, header_size, chunk_bytes))
+
+        assert b"".join(block for _, block in blocks) == data[header_size:]
+        for start, block in blocks:
+            assert data[start : start + len(block)] == block
+        post_ids = [
+            int(values[1])
+            for _, block in blocks
+            for values in csv.reader(io.StringIO(block.decode("utf-8"), newline=""))
+        ]
+        assert post_ids == list(range(1, 11))
+
+    def test_process_gzip_file(self, gzip_file):
+        """gzip圧縮ファイルを逐次インポートし、チェックポイントから再開できるテスト"""
+        written = []
+
+        def failing_flush(db, records, row_count, mode):
+            if len(written) >= 4:
+                raise RuntimeError("接続断")
+            written.extend(record["post_id"] for record in records)
+            return []
+
+        with mock.patch("cli.import_csv.flush_records", side_effect=failing_flush):
+            with pytest.raises(RuntimeError):
+                process_csv_file(gzip_file, mock.MagicMock(), 4, "copy")
+        assert load_checkpoint(gzip_file, "copy")["rows"] == 4
+
+        written.clear()
+        with mock.patch(
+            "cli.import_csv.flush_records", side_effect=_collect_flush(written)
+        ):
+            with mock.patch("cli.import_csv.refresh_rollups"):
+                assert process_csv_file(
+                    gzip_file, mock.MagicMock(), 4, "copy", resume=True
+                )
+
+        assert written == [5, 6, 7, 8, 9, 10]
+        assert not os.path.exists(checkpoint_path(gzip_file))
+
+    def test_process_stdin(self, tmp_path):
+        """標準入力から逐次インポートし、チェックポイントを作らないテスト"""
+        written = []
+        stdin = _fake_stdin(bz2.compress(_csv_bytes()))
+
+        with mock.patch("cli.input_source.sys.stdin", stdin):
+            with mock.patch(
+                "cli.import_csv.flush_records", side_effect=_collect_flush(written)
+            ), mock.patch("cli.import_csv.save_checkpoint") as mock_save:
+                with mock.patch("cli.import_csv.refresh_rollups") as mock_refresh:
+                    assert process_csv_file("-", mock.MagicMock(), 3, "copy")
+
+        assert written == list(range(1, 11))
+        mock_save.assert_not_called()
+        assert mock_refresh.call_args[0][1] == {1, 2}
+
+    def test_stdin_cannot_resume(self):
+        """標準入力では --resume を指定できないテスト"""
+        assert process_csv_file("-", mock.MagicMock(), 3, "copy", True) is False
+        assert (
+            process_csv_file_parallel("-", mock.MagicMock(), 3, "copy", 2, 1, True)
+            is False
+        )
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_import_csv_truncated_file(self, tmp_path, workers):
+        """途中で途切れた圧縮ファイルはトレースバックではなくエラーログとFalseになるテスト"""
+        path = tmp_path / "posts.csv.gz"
+        path.write_bytes(gzip.compress(_csv_bytes(1000))[:-40])
+
+        with mock.patch("cli.import_csv.SessionLocal"), mock.patch(
+            "cli.parallel_import.SessionLocal"
+        ), mock.patch(
+            "cli.parallel_import._create_pool",
+            side_effect=lambda workers: ThreadPoolExecutor(workers),
+        ), mock.patch(
+            "cli.import_csv.flush_records", return_value=[]
+        ), mock.patch(
+            "cli.parallel_import.flush_records", return_value=[]
+        ):
+            assert import_csv(str(path), 100, "copy", workers=workers) is False
+
+    def test_import_csv_invalid_encoding(self, tmp_path):
+        """UTF-8として読めないファイルはエラーログとFalseになるテスト"""
+        path = tmp_path / "posts.csv"
+        path.write_bytes("influencer_id,post_id\n".encode("utf-16"))
+
+        with mock.patch("cli.import_csv.SessionLocal"):
+            assert import_csv(str(path)) is False
+
+    def test_import_csv_accepts_stdin(self):
+        """ "-" はファイルの存在チェックを行わないテスト"""
+        with mock.patch("cli.import_csv.SessionLocal"):
+            with mock.patch(
+                "cli.import_csv.process_csv_file", return_value=True
+            ) as mock_process:
+                assert import_csv("-") is True
+
+        assert mock_process.call_args[0][0] == "-"
+
+
+class TestParallelStreaming:
+    @pytest.fixture(autouse=True)
+    def small_chunks(self):
+        """スレッドプールと小さなブロックで並列パイプラインを動かす"""
+        with mock.patch(
+            "cli.parallel_import._create_pool",
+            side_effect=lambda workers: ThreadPoolExecutor(workers),
+        ), mock.patch("cli.parallel_import.CHUNK_BYTES", 64), mock.patch(
+            "cli.parallel_import.SessionLocal"
+        ):
+            yield
+
+    def test_gzip_resume(self, gzip_file):
+        """圧縮ファイルをブロック単位で並列処理し、中断後に再開できるテスト"""
+        written = []
+
+        def failing_flush(db, records, row_count, mode):
+            if any(record["post_id"] > 5 for record in records):
+                raise RuntimeError("接続断")
+            written.extend(record["post_id"] for record in records)
+            return []
+
+        with mock.patch("cli.parallel_import.flush_records", side_effect=failing_flush):
+            with pytest.raises(RuntimeError):
+                process_csv_file_parallel(
+                    gzip_file, mock.MagicMock(), 2, "copy", workers=2, writers=1
+                )
+        checkpoint = load_checkpoint(gzip_file, "copy")
+        assert 0 < checkpoint["rows"] <= 5
+
+        resumed = []
+        with mock.patch(
+            "cli.parallel_import.flush_records", side_effect=_collect_flush(resumed)
+        ):
+            with mock.patch("cli.parallel_import.refresh_rollups"):
+                assert process_csv_file_parallel(
+                    gzip_file, mock.MagicMock(), 2, "copy", 2, 2, resume=True
+                )
+
+        assert sorted(resumed) == list(range(checkpoint["rows"] + 1, 11))
+        assert not os.path.exists(checkpoint_path(gzip_file))
+
+    def test_stdin(self):
+        """標準入力をブロック単位で並列処理するテスト"""
+        written = []
+        stdin = _fake_stdin(_csv_bytes())
+
+        with mock.patch("cli.input_source.sys.stdin", stdin):
+            with mock.patch(
+                "cli.parallel_import.flush_records",
+                side_effect=_collect_flush(written),
+            ), mock.patch("cli.parallel_import.save_checkpoint") as mock_save:
+                with mock.patch("cli.parallel_import.refresh_rollups") as mock_refresh:
+                    assert process_csv_file_parallel(
+                        "-", mock.MagicMock(), 3, "copy", workers=2, writers=2
+                    )
+
+        assert sorted(written) == list(range(1, 11))
+        mock_save.assert_not_called()
+        assert mock_refresh.call_args[0][1] == {1, 2}
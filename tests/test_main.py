@@ -0,0 +1,27 @@
+"""
+app/main.py のテスト（レディネスチェック）
+"""
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_ready_without_tokenizer():
+    """リクエストの処理では形態素解析を行わないため、辞書を読み込まずにreadyを返す"""
+    with patch("app.services.text_analysis_service.get_tokenizer") as mock_get:
+        with TestClient(app) as client:
+            response = client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+    mock_get.assert_not_called()
+
+
+def test_query_count_header():
+    """テストではクエリ数のヘッダーを有効にしてアプリを作成するテスト"""
+    with TestClient(app) as client:
+        response = client.get("/ready")
+
+    assert response.headers["x-db-query-count"] == "0"
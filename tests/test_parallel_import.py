@@ -0,0 +1,334 @@
+"""
+cli/parallel_import.py のテスト
+"""
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest import mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from cli.import_csv import COPY_COLUMNS
+from cli.import_progress import ImportProgress, checkpoint_path, load_checkpoint
+from cli.parallel_import import (
+    _CommitTracker,
+    _align_to_record,
+    _parse_chunk,
+    _count_quotes,
+    _to_records,
+    advance_data_version,
+    process_csv_file_parallel,
+    split_byte_ranges,
+)
+from app.models.base import Base
+from app.models.database_models import InfluencerPost
+
+
+def _row(post_id, text="投稿テキスト"):
+    return {
+        "influencer_id": str(post_id % 3 + 1),
+        "post_id": str(post_id),
+        "shortcode": f"code{post_id}",
+        "likes": "100",
+        "comments": "5",
+        "thumbnail": "https://example.com/thumb.jpg",
+        "text": text,
+        "post_date": "2023-01-01 12:00:00",
+    }
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """クォート内の改行やカンマを含むCSVファイル"""
+    file_path = tmp_path / "posts.csv"
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COPY_COLUMNS)
+        writer.writeheader()
+        for post_id in range(1, 101):
+            text = f'1行目\n"引用"を含む,{post_id}\n3行目' if post_id % 2 else "本文"
+            writer.writerow(_row(post_id, text))
+    return str(file_path)
+
+
+def _parse_all(file_path, chunk_bytes):
+    """ファイルを指定サイズの範囲に分割して逐次解析する"""
+    with open(file_path, "rb") as f:
+        data_start = len(f.readline())
+    ranges = split_byte_ranges(data_start, os.path.getsize(file_path), chunk_bytes)
+    parities = [0]
+    for start, end in ranges:
+        parities.append((parities[-1] + _count_quotes(file_path, start, end)) % 2)
+
+    rows = []
+    total = 0
+    previous_end = data_start
+    for index, (start, end) in enumerate(ranges):
+        result = _parse_chunk(
+            file_path,
+            start,
+            end,
+            None if index == 0 else parities[index],
+            None if index == len(ranges) - 1 else parities[index + 1],
+            COPY_COLUMNS,
+        )
+        # 揃えた終了オフセットは単調増加する
+        assert result["end"] >= previous_end
+        previous_end = result["end"]
+        rows.extend(result["rows"])
+        total += result["row_count"]
+    assert previous_end == os.path.getsize(file_path)
+    return rows, total
+
+
+class TestRecordBoundaries:
+    def test_align_skips_quoted_newlines(self, tmp_path):
+        """クォート内の改行はレコード境界として扱わないテスト"""
+        file_path = tmp_path / "data.csv"
+        file_path.write_bytes(b'1,"a\nb"\n2,c\n')
+
+        with open(file_path, "rb") as f:
+            # "a の直後（クォート数1＝奇数）から探すと、クォートを閉じた後の改行が境界
+            assert _align_to_record(f, 4, 1, 13) == 8
+            # 境界が見つからない場合はファイル末尾
+            assert _align_to_record(f, 12, 0, 13) == 13
+
+    @pytest.mark.parametrize("chunk_bytes", [1, 7, 64, 1000, 10**6])
+    def test_every_record_parsed_exactly_once(self, csv_file, chunk_bytes):
+        """範囲の大きさに関わらず各レコードがちょうど1回解析されるテスト"""
+        rows, total = _parse_all(csv_file, chunk_bytes)
+
+        assert total == 100
+        assert sorted(row["post_id"] for row in rows) == list(range(1, 101))
+        assert rows[0]["text"] == '1行目\n"引用"を含む,1\n3行目'
+
+    def test_parse_chunk_counts_errors(self, tmp_path):
+        """変換できない行やカラム数の合わない行はエラーとして数えるテスト"""
+        file_path = tmp_path / "data.csv"
+        with open(file_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(COPY_COLUMNS)
+            writer.writerow([_row(1)[column] for column in COPY_COLUMNS])
+            writer.writerow(["x"] + [_row(2)[column] for column in COPY_COLUMNS[1:]])
+            writer.writerow(["1", "2"])
+            f.write("\n")
+
+        with open(file_path, "rb") as f:
+            data_start = len(f.readline())
+        result = _parse_chunk(
+            str(file_path),
+            data_start,
+            file_path.stat().st_size,
+            None,
+            None,
+            COPY_COLUMNS,
+        )
+
+        assert [row["post_id"] for row in result["rows"]] == [1]
+        assert result["row_count"] == 3
+        assert result["error_count"] == 2
+        assert result["influencer_ids"] == {2}
+        assert result["parse_seconds"] >= 0
+        assert result["convert_seconds"] >= 0
+
+
+class TestToRecords:
+    def test_sorted_by_post_id(self):
+        """post_id順に並べ、ORMモードではモデルインスタンスに変換するテスト"""
+        rows = [{"post_id": 2, "likes": 1}, {"post_id": 1, "likes": 1}]
+
+        assert [row["post_id"] for row in _to_records(rows, "copy")] == [1, 2]
+
+        records = _to_records(rows, "orm")
+        assert all(isinstance(record, InfluencerPost) for record in records)
+        assert [record.post_id for record in records] == [1, 2]
+
+
+class TestCommitTracker:
+    def test_checkpoint_follows_contiguous_prefix(self, csv_file):
+        """先頭から連続してコミット済みの範囲までチェックポイントが進むテスト"""
+        progress = ImportProgress(1000)
+        tracker = _CommitTracker(csv_file, "copy", progress, start_rows=0)
+
+        tracker.register(0, 2, 10, 100)
+        tracker.register(1, 1, 5, 150)
+        tracker.register(2, 0, 3, 180)
+
+        # 範囲1が先に終わっても範囲0が終わるまでは進まない
+        tracker.batch_done(1)
+        assert load_checkpoint(csv_file, "copy") is None
+        tracker.batch_done(0)
+        assert load_checkpoint(csv_file, "copy") is None
+
+        tracker.batch_done(0)
+        checkpoint = load_checkpoint(csv_file, "copy")
+        assert checkpoint["offset"] == 180
+        assert checkpoint["rows"] == 18
+        assert progress.snapshot()["rows"] == 18
+
+
+class TestProcessCsvFileParallel:
+    @pytest.fixture(autouse=True)
+    def small_chunks(self):
+        """スレッドプールと小さな範囲で並列パイプラインを動かす"""
+        with mock.patch(
+            "cli.parallel_import._create_pool",
+            side_effect=lambda workers: ThreadPoolExecutor(workers),
+        ), mock.patch("cli.parallel_import.CHUNK_BYTES", 256), mock.patch(
+            "cli.parallel_import.split_byte_ranges",
+            side_effect=lambda start, size: split_byte_ranges(start, size, 256),
+        ), mock.patch(
+            "cli.parallel_import.SessionLocal"
+        ):
+            yield
+
+    def test_all_rows_written(self, csv_file):
+        """全行が書き込みスレッドに渡され、集計値が更新されるテスト"""
+        mock_db = mock.MagicMock()
+        written = []
+
+        def fake_flush(db, records, row_count, mode):
+            assert len(records) <= 7
+            written.extend(record["post_id"] for record in records)
+            return []
+
+        with mock.patch("cli.parallel_import.flush_records", side_effect=fake_flush):
+            with mock.patch("cli.parallel_import.refresh_rollups") as mock_refresh:
+                with mock.patch(
+                    "cli.parallel_import.advance_data_version"
+                ) as mock_advance:
+                    result = process_csv_file_parallel(
+                        csv_file, mock_db, 7, "copy", workers=3, writers=2
+                    )
+
+        assert result is True
+        assert sorted(written) == list(range(1, 101))
+        mock_refresh.assert_called_once_with(mock_db, {1, 2, 3})
+        # 複数の書き込みスレッドでは全コミット後にデータバージョンを進める
+        mock_advance.assert_called_once_with(mock_db, {1, 2, 3})
+
+    def test_single_writer_keeps_version(self, csv_file):
+        """書き込みスレッドが1つの場合はコミット順にデータバージョンが進むため追加の更新をしないテスト"""
+        with mock.patch("cli.parallel_import.flush_records", return_value=[]):
+            with mock.patch("cli.parallel_import.refresh_rollups"):
+                with mock.patch(
+                    "cli.parallel_import.advance_data_version"
+                ) as mock_advance:
+                    assert process_csv_file_parallel(
+                        csv_file, mock.MagicMock(), 7, "copy", workers=2, writers=1
+                    )
+
+        mock_advance.assert_not_called()
+
+    def test_writer_error_is_raised(self, csv_file):
+        """書き込みスレッドのエラーが呼び出し元に伝播するテスト"""
+        with mock.patch(
+            "cli.parallel_import.flush_records", side_effect=RuntimeError("db down")
+        ):
+            with mock.patch("cli.parallel_import.refresh_rollups") as mock_refresh:
+                with pytest.raises(RuntimeError, match="db down"):
+                    process_csv_file_parallel(
+                        csv_file, mock.MagicMock(), 5, "copy", workers=2, writers=2
+                    )
+
+        mock_refresh.assert_not_called()
+
+    def test_invalid_header(self, tmp_path):
+        """必須カラムが不足している場合は失敗するテスト"""
+        file_path = tmp_path / "data.csv"
+        file_path.write_text("influencer_id,post_id\n1,2\n", encoding="utf-8")
+
+        assert process_csv_file_parallel(str(file_path), mock.MagicMock(), 5) is False
+
+    def test_resume_from_checkpoint(self, csv_file):
+        """中断後に再開すると未コミットの範囲のみ処理するテスト"""
+        written = []
+
+        def failing_flush(db, records, row_count, mode):
+            if any(record["post_id"] > 50 for record in records):
+                raise RuntimeError("接続断")
+            written.extend(record["post_id"] for record in records)
+            return []
+
+        with mock.patch("cli.parallel_import.flush_records", side_effect=failing_flush):
+            with pytest.raises(RuntimeError):
+                process_csv_file_parallel(
+                    csv_file, mock.MagicMock(), 5, "upsert", workers=2, writers=1
+                )
+
+        checkpoint = load_checkpoint(csv_file, "upsert")
+        assert 0 < checkpoint["rows"] <= 50
+        assert sorted(written)[: checkpoint["rows"]] == list(
+            range(1, checkpoint["rows"] + 1)
+        )
+
+        resumed = []
+        mock_db = mock.MagicMock()
+        with mock.patch(
+            "cli.parallel_import.flush_records",
+            side_effect=lambda db, records, row_count, mode: resumed.extend(
+                record["post_id"] for record in records
+            )
+            or [],
+        ):
+            with mock.patch("cli.parallel_import.refresh_rollups") as mock_refresh:
+                assert process_csv_file_parallel(
+                    csv_file, mock_db, 5, "upsert", workers=2, writers=2, resume=True
+                )
+
+        assert sorted(resumed) == list(range(checkpoint["rows"] + 1, 101))
+        mock_refresh.assert_called_once_with(mock_db, None)
+        assert not os.path.exists(checkpoint_path(csv_file))
+
+    def test_resume_with_changed_file(self, csv_file):
+        """チェックポイント作成後にファイルが変わった場合は再開しないテスト"""
+        with open(checkpoint_path(csv_file), "w", encoding="utf-8") as f:
+            f.write(
+                '{"file_size": 1, "file_mtime_ns": 1, "mode": "copy", '
+                '"offset": 0, "rows": 0}'
+            )
+
+        assert (
+            process_csv_file_parallel(
+                csv_file, mock.MagicMock(), 5, "copy", resume=True
+            )
+            is False
+        )
+
+
+def test_advance_data_version():
+    """インフルエンサーごとに最新の投稿だけ updated_at を進めるテスト"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[InfluencerPost.__table__])
+    session_factory = sessionmaker(bind=engine)
+    old = datetime(2024, 1, 1)
+    with session_factory() as db:
+        for post_id, influencer_id, day in [(1, 1, 1), (2, 1, 2), (3, 2, 1), (4, 3, 1)]:
+            db.add(
+                InfluencerPost(
+                    influencer_id=influencer_id,
+                    post_id=post_id,
+                    shortcode=f"code{post_id}",
+                    post_date=old,
+                    updated_at=datetime(2024, 1, day),
+                )
+            )
+        db.commit()
+
+        advance_data_version(db, {1, 2})
+        versions = dict(db.query(InfluencerPost.post_id, InfluencerPost.updated_at))
+        assert versions[1] == old
+        assert versions[2] > datetime(2024, 1, 2)
+        assert versions[3] > old
+        assert versions[4] == old
+
+        # 再開時（対象が不明）は全インフルエンサー
+        advance_data_version(db, None)
+        assert db.query(InfluencerPost.updated_at).filter_by(post_id=4).scalar() > old
+
+        # 対象がない場合は何もしない
+        advance_data_version(db, set())
+        assert db.query(InfluencerPost.updated_at).filter_by(post_id=1).scalar() == old
+    engine.dispose()
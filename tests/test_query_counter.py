@@ -0,0 +1,147 @@
+"""
+リクエストごとのクエリ数の計測（X-DB-Query-Count）のテスト
+"""
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.connection import get_db
+from app.database.query_counter import (
+    QueryCountMiddleware,
+    count_queries,
+    install_query_counter,
+)
+from app.models.base import Base
+from app.models.database_models import InfluencerPost, InfluencerPostNoun
+from app.routers import analytics
+
+
+@pytest.fixture
+def sqlite_engine():
+    """クエリ数を計測するインメモリSQLiteエンジン"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    install_query_counter(engine)
+    # 二重に登録しても1回だけ数える
+    install_query_counter(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def keyword_client(sqlite_engine):
+    """キーワード分析APIと計測ミドルウェアだけを持つクライアント"""
+    Base.metadata.create_all(
+        sqlite_engine,
+        tables=[InfluencerPost.__table__, InfluencerPostNoun.__table__],
+    )
+    session_factory = sessionmaker(bind=sqlite_engine)
+    with session_factory() as db:
+        for post_id in (1, 2):
+            db.add(
+                InfluencerPost(
+                    influencer_id=1,
+                    post_id=post_id,
+                    shortcode=f"code{post_id}",
+                    post_date=datetime(2024, 1, post_id),
+                    updated_at=datetime(2024, 1, 3),
+                )
+            )
+        db.add(InfluencerPostNoun(post_id=1, influencer_id=1, word="カフェ", count=2))
+        db.add(InfluencerPostNoun(post_id=2, influencer_id=1, word="旅行", count=1))
+        db.commit()
+
+    def override_get_db():
+        with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(analytics.router, prefix="/api/v1/analytics")
+    app.add_middleware(QueryCountMiddleware)
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+def test_count_queries(sqlite_engine):
+    """ブロック内で実行したSQL文だけを数えるテスト"""
+    with sqlite_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with count_queries() as counter:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 3"))
+
+    assert counter.count == 2
+
+
+def test_middleware_sync_and_async_endpoints(sqlite_engine):
+    """同期（スレッドプール）・非同期どちらのエンドポイントでもクエリ数を出力するテスト"""
+    app = FastAPI()
+    app.add_middleware(QueryCountMiddleware)
+
+    @app.get("/sync")
+    def sync_endpoint():
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {}
+
+    @app.get("/async")
+    async def async_endpoint():
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {}
+
+    client = TestClient(app)
+
+    assert client.get("/sync").headers["x-db-query-count"] == "2"
+    assert client.get("/async").headers["x-db-query-count"] == "1"
+    # リクエストをまたいで加算しない
+    assert client.get("/sync").headers["x-db-query-count"] == "2"
+    assert client.get("/missing").headers["x-db-query-count"] == "0"
+
+
+class TestKeywordQueryCount:
+    def test_cache_miss_and_hits(self, keyword_client):
+        """キーワード分析APIは集計時のみ問い合わせ、キャッシュヒット時はデータバージョンの確認だけになるテスト"""
+        response = keyword_client.get("/api/v1/analytics/1/keywords?limit=5")
+        assert response.status_code == 200
+        assert response.json() == {
+            "keywords": [{"word": "カフェ", "count": 2}, {"word": "旅行", "count": 1}],
+            "total_analyzed_posts": 2,
+        }
+        # データバージョン・名詞の集計・投稿数
+        assert response.headers["x-db-query-count"] == "3"
+
+        # エンコード済みのボディを返す
+        response = keyword_client.get("/api/v1/analytics/1/keywords?limit=5")
+        assert response.headers["x-db-query-count"] == "1"
+
+        response = keyword_client.get(
+            "/api/v1/analytics/1/keywords?limit=5",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert response.status_code == 304
+        assert response.headers["x-db-query-count"] == "1"
+
+    @patch("app.dependencies.utils.RESPONSE_CACHE", False)
+    def test_service_cache_hit(self, keyword_client):
+        """レスポンスキャッシュがなくても、分析結果のキャッシュから投稿数を返すテスト"""
+        keyword_client.get("/api/v1/analytics/1/keywords?limit=5")
+
+        # 異なるlimitでも同じ分析結果から切り出し、投稿数を数え直さない
+        response = keyword_client.get("/api/v1/analytics/1/keywords?limit=1")
+        assert response.json() == {
+            "keywords": [{"word": "カフェ", "count": 2}],
+            "total_analyzed_posts": 2,
+        }
+        assert response.headers["x-db-query-count"] == "1"
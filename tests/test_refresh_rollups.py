@@ -0,0 +1,46 @@
+"""
+cli/refresh_rollups.py のテスト
+"""
+from unittest import mock
+
+from cli.refresh_rollups import main, parse_args, refresh_rollups
+
+
+class TestParseArgs:
+    def test_parse_args_multiple_ids(self):
+        """インフルエンサーIDを複数指定した場合のテスト"""
+        with mock.patch(
+            "sys.argv",
+            ["refresh_rollups.py", "--influencer-id", "1", "--influencer-id", "2"],
+        ):
+            assert parse_args().influencer_ids == [1, 2]
+
+    def test_parse_args_default(self):
+        """省略時は全件対象になるテスト"""
+        with mock.patch("sys.argv", ["refresh_rollups.py"]):
+            assert parse_args().influencer_ids is None
+
+
+class TestRefreshRollups:
+    def test_refresh_and_commit(self):
+        """集計値を再計算してコミットするテスト"""
+        mock_db = mock.MagicMock()
+        with mock.patch("cli.refresh_rollups.InfluencerStatsRepository") as mock_repo:
+            refresh_rollups(mock_db, [1, 2])
+
+        mock_repo.assert_called_once_with(mock_db)
+        mock_repo.return_value.refresh.assert_called_once_with([1, 2])
+        mock_db.commit.assert_called_once()
+
+    def test_main_success(self):
+        """メイン関数の成功パターンテスト"""
+        with mock.patch("sys.argv", ["refresh_rollups.py"]):
+            with mock.patch("cli.refresh_rollups.SessionLocal") as mock_session:
+                with mock.patch("cli.refresh_rollups.refresh_rollups") as mock_refresh:
+                    with mock.patch("sys.exit") as mock_exit:
+                        main()
+
+                        mock_refresh.assert_called_once_with(
+                            mock_session.return_value, None
+                        )
+                        mock_exit.assert_called_once_with(0)
@@ -0,0 +1,129 @@
+"""
+app/services/tag_service.py のテスト
+"""
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.dependencies.cache_utils import cache
+from app.services.tag_service import (
+    build_post_tag_rows,
+    extract_tags,
+    get_top_tags,
+    store_post_tags,
+)
+
+
+class TestExtractTags:
+    def test_hashtags_and_mentions(self):
+        """ハッシュタグとメンションを形態素解析せずに抽出するテスト"""
+        text = "今日のコーデ👗\n#今日のコーデ #OOTD ＃ootd #カフェ#ラテ\n@Shop.Tokyo さんで購入"
+
+        tags = extract_tags(text)
+
+        # 全角の＃は半角に揃え、大文字小文字は区別しない
+        assert tags["hashtag"] == {"今日のコーデ": 1, "ootd": 2, "カフェ": 1, "ラテ": 1}
+        assert tags["mention"] == {"shop.tokyo": 1}
+
+    def test_excluded_patterns(self):
+        """URLのフラグメント・文字参照・数字のみのタグ・メールアドレスを除外するテスト"""
+        text = "https://example.com/#top &#123; No#1 #2 mail@example.com @user. @a"
+
+        tags = extract_tags(text)
+
+        assert tags["hashtag"] == {}
+        # 末尾のピリオドはユーザー名に含めない
+        assert tags["mention"] == {"user": 1, "a": 1}
+
+    @pytest.mark.parametrize("text", [None, ""])
+    def test_empty(self, text):
+        """空のテキストの場合は空の出現回数を返すテスト"""
+        assert extract_tags(text) == {"hashtag": {}, "mention": {}}
+
+
+def test_build_post_tag_rows():
+    """投稿ごとのタグ出現回数レコード作成テスト"""
+    posts = [
+        MagicMock(post_id=10, influencer_id=1, text="#cafe #cafe @friend"),
+        MagicMock(post_id=11, influencer_id=1, text=None),
+    ]
+
+    rows = build_post_tag_rows(posts)
+
+    assert rows == [
+        {
+            "post_id": 10,
+            "influencer_id": 1,
+            "tag_type": "hashtag",
+            "tag": "cafe",
+            "count": 2,
+        },
+        {
+            "post_id": 10,
+            "influencer_id": 1,
+            "tag_type": "mention",
+            "tag": "friend",
+            "count": 1,
+        },
+    ]
+
+
+def test_store_post_tags(mock_db_session):
+    """タグ出現回数の保存テスト（既存分の置き換え）"""
+    posts = [MagicMock(post_id=10, influencer_id=1, text="#cafe")]
+
+    assert store_post_tags(mock_db_session, posts) == 1
+
+    mock_db_session.query.return_value.filter.return_value.delete.assert_called_once()
+    rows = mock_db_session.bulk_insert_mappings.call_args[0][1]
+    assert [row["tag"] for row in rows] == ["cafe"]
+
+    # タグのない投稿は既存分の削除のみ行う
+    mock_db_session.reset_mock()
+    posts = [MagicMock(post_id=10, influencer_id=1, text="タグなし")]
+    assert store_post_tags(mock_db_session, posts) == 0
+    mock_db_session.query.return_value.filter.return_value.delete.assert_called_once()
+    mock_db_session.bulk_insert_mappings.assert_not_called()
+
+    # 投稿がない場合は何もしない
+    mock_db_session.reset_mock()
+    assert store_post_tags(mock_db_session, []) == 0
+    mock_db_session.query.assert_not_called()
+
+
+@patch("app.services.tag_service.InfluencerPostRepository")
+def test_get_top_tags(mock_repository, mock_db_session):
+    """保存済みのタグ出現回数を集計し、上位100件と投稿数をキャッシュするテスト"""
+    cache.clear()
+    repository = mock_repository.return_value
+    repository.get_tag_counts.return_value = [
+        MagicMock(tag="cafe", count=3),
+        MagicMock(tag="ootd", count=1),
+    ]
+    repository.count_posts.return_value = 42
+    version = datetime(2023, 1, 1)
+
+    result = get_top_tags(mock_db_session, "hashtag", version, limit=1)
+    assert result == {"tags": [{"tag": "cafe", "count": 3}], "total_analyzed_posts": 42}
+    repository.get_tag_counts.assert_called_once_with("hashtag", None, 100)
+    repository.count_posts.assert_called_once_with(None)
+
+    # 別のlimitでも同じデータバージョンならキャッシュから切り出し、投稿数も数え直さない
+    result = get_top_tags(mock_db_session, "hashtag", version, limit=2)
+    assert len(result["tags"]) == 2
+    assert result["total_analyzed_posts"] == 42
+    repository.get_tag_counts.assert_called_once()
+    repository.count_posts.assert_called_once()
+
+    # インフルエンサー単位は別のキーで集計する
+    get_top_tags(mock_db_session, "hashtag", version, influencer_id=5)
+    repository.get_tag_counts.assert_called_with("hashtag", 5, 100)
+    repository.count_posts.assert_called_with(5)
+    cache.clear()
+
+
+def test_get_top_tags_invalid_type(mock_db_session):
+    """不正なタグの種別はエラーになるテスト"""
+    with pytest.raises(ValueError):
+        get_top_tags(mock_db_session, "keyword", datetime(2023, 1, 1))
@@ -1,12 +1,21 @@
 import pytest
+from datetime import datetime
 from unittest.mock import patch, MagicMock
 from app.services.text_analysis_service import (
+    build_post_noun_rows,
     extract_nouns,
+    get_influencer_data_version,
     get_influencer_keywords,
+    store_post_nouns,
     # get_trending_keywords,
     # analyze_keywords_by_engagement,
     get_tokenizer,
     # get_cache_key,
+    extract_keywords,
+    filter_nouns,
+    _load_stop_words,
+    warm_up_tokenizer,
+    WARMUP_TEXT,
 )
 from app.dependencies.cache_utils import cache
 from fastapi import HTTPException
@@ -33,6 +42,76 @@ class TestTextAnalysisService:
         # テストケース: 名詞がないテキスト
         assert len(extract_nouns("あああ、いいい。")) == 0
 
+    def test_extract_nouns_filters(self):
+        """URL・1文字の名詞・数字や記号のみの名詞が除外されるテスト"""
+        nouns = extract_nouns("新作コスメ https://example.com/item 2023 ＃ 本 www.example.jp")
+
+        assert "コスメ" in nouns
+        assert all("example" not in noun for noun in nouns)
+        assert "2023" not in nouns
+        assert "本" not in nouns
+
+    def test_extract_nouns_base_form(self):
+        """基本形を指定した場合は基本形、基本形がない語は表層形を返すテスト"""
+        token = MagicMock(part_of_speech="名詞,一般,*,*", surface="コスメ", base_form="*")
+        lemma = MagicMock(part_of_speech="名詞,一般,*,*", surface="ﾊﾟﾌｪ", base_form="パフェ")
+        tokenizer = MagicMock()
+        tokenizer.tokenize.return_value = [token, lemma]
+
+        with patch(
+            "app.services.text_analysis_service.get_tokenizer", return_value=tokenizer
+        ):
+            assert extract_nouns("コスメﾊﾟﾌｪ", use_base_form=True) == ["コスメ", "パフェ"]
+            assert extract_nouns("コスメﾊﾟﾌｪ") == ["コスメ", "ﾊﾟﾌｪ"]
+
+    def test_filter_nouns(self):
+        """全角・半角の表記揺れを揃え、ストップワードを除外するテスト"""
+        nouns = ["ｶﾌｪ", "カフェ", "ＩＮＳＴＡ", "INSTA", "さん", "ｻﾝ"]
+
+        assert filter_nouns(nouns, frozenset({"さん", "サン"})) == [
+            "カフェ",
+            "カフェ",
+            "INSTA",
+            "INSTA",
+        ]
+        assert filter_nouns(nouns, frozenset(), normalize=False) == nouns
+
+    def test_extract_keywords(self):
+        """デフォルトのストップワードが数える前に除外されるテスト"""
+        keywords = extract_keywords("田中さんと表参道のカフェでこのコスメのことを話した")
+
+        assert "さん" not in keywords
+        assert "こと" not in keywords
+        assert "表参道" in keywords
+        assert "コスメ" in keywords
+
+    def test_load_stop_words(self, tmp_path, monkeypatch):
+        """ファイルと環境変数からストップワードを読み込み、正規化するテスト"""
+        path = tmp_path / "stop_words.txt"
+        path.write_text("# 敬称\nさん\nＰＲ  # 全角\n\n", encoding="utf-8")
+
+        assert "さん" in _load_stop_words()
+        monkeypatch.setenv("NOUN_STOP_WORDS_FILE", str(path))
+        monkeypatch.setenv("NOUN_STOP_WORDS", "ｷﾞﾌﾄ, 提供")
+
+        assert _load_stop_words() == frozenset({"さん", "PR", "ギフト", "提供"})
+
+    @patch("app.services.text_analysis_service.Tokenizer")
+    @patch("app.services.text_analysis_service._tokenizer", None)
+    @patch("app.services.text_analysis_service.JANOME_MMAP", False)
+    def test_get_tokenizer_mmap_option(self, mock_tokenizer_class):
+        """JANOME_MMAP の設定で辞書の読み込み方式を切り替えるテスト"""
+        get_tokenizer()
+
+        mock_tokenizer_class.assert_called_once_with(mmap=False)
+
+    def test_warm_up_tokenizer(self):
+        """サンプルテキストを形態素解析して辞書を読み込ませるテスト"""
+        with patch("app.services.text_analysis_service.extract_nouns") as mock_extract:
+            assert warm_up_tokenizer() >= 0
+
+        mock_extract.assert_called_once_with(WARMUP_TEXT)
+
     @patch("app.services.text_analysis_service.Tokenizer")
     @patch("app.services.text_analysis_service._tokenizer", None)  # グローバル変数を None に設定
     def test_get_tokenizer(self, mock_tokenizer_class):
@@ -56,61 +135,141 @@ class TestTextAnalysisService:
         mock_tokenizer_class.assert_not_called()
         assert tokenizer2 == mock_tokenizer_instance
 
+
 @patch("app.services.text_analysis_service.extract_nouns")
 def test_get_influencer_keywords(mock_extract_nouns, mock_db_session):
-    """インフルエンサーのキーワード抽出テスト"""
+    """インフルエンサーのキーワード抽出テスト（保存済みの出現回数を集計）"""
     # キャッシュをクリア
     cache.clear()
 
-    # モックデータの設定（空のテキストを含む）
-    mock_posts = [
-        MagicMock(text="インスタグラム戦略について", post_id=1),
-        MagicMock(text="フォロワー獲得のコツ", post_id=4),
-        MagicMock(text="インスタグラムマーケティング", post_id=5),
-    ]
+    with patch(
+        "app.services.text_analysis_service.InfluencerPostRepository"
+    ) as mock_repository:
+        mock_repo_instance = mock_repository.return_value
+        mock_repo_instance.get_latest_update_time.return_value = datetime(2023, 1, 1)
+        mock_repo_instance.get_keyword_counts.return_value = [
+            MagicMock(word="インスタグラム", count=2),
+            MagicMock(word="フォロワー", count=1),
+            MagicMock(word="戦略", count=1),
+        ]
+        mock_repo_instance.count_posts.return_value = 3
+
+        # テスト実行
+        result = get_influencer_keywords(mock_db_session, 1, 10)
+
+        # 結果の検証
+        assert result == {
+            "keywords": [
+                {"word": "インスタグラム", "count": 2},
+                {"word": "フォロワー", "count": 1},
+                {"word": "戦略", "count": 1},
+            ],
+            "total_analyzed_posts": 3,
+        }
+        # limitに関わらず上位100件を集計し、投稿数も同時に数える
+        mock_repo_instance.get_keyword_counts.assert_called_once_with(1, 100)
+        mock_repo_instance.count_posts.assert_called_once_with(1)
+
+        # リクエスト時には形態素解析を行わない
+        mock_extract_nouns.assert_not_called()
+
+        # キャッシュからの取得を確認
+        mock_repo_instance.get_keyword_counts.reset_mock()
+        mock_repo_instance.count_posts.reset_mock()
+        cached_result = get_influencer_keywords(mock_db_session, 1, 10)
+        assert cached_result == result
+        mock_repo_instance.get_keyword_counts.assert_not_called()
+        mock_repo_instance.count_posts.assert_not_called()
+
+        # 異なるlimitでも同じキャッシュから切り出す
+        assert get_influencer_keywords(mock_db_session, 1, 2) == {
+            "keywords": result["keywords"][:2],
+            "total_analyzed_posts": 3,
+        }
+        mock_repo_instance.get_keyword_counts.assert_not_called()
+
+        # データが更新されるとキャッシュキーが変わり再集計される
+        mock_repo_instance.get_latest_update_time.return_value = datetime(2023, 1, 2)
+        mock_repo_instance.get_keyword_counts.return_value = [
+            MagicMock(word="フォロワー", count=5),
+        ]
+        mock_repo_instance.count_posts.return_value = 4
+        assert get_influencer_keywords(mock_db_session, 1, 10) == {
+            "keywords": [{"word": "フォロワー", "count": 5}],
+            "total_analyzed_posts": 4,
+        }
+        mock_repo_instance.get_keyword_counts.assert_called_once_with(1, 100)
+
+        # 存在しないインフルエンサーの場合（最終更新日時がない）
+        mock_repo_instance.get_latest_update_time.return_value = None
+        with pytest.raises(HTTPException) as excinfo:
+            get_influencer_keywords(mock_db_session, 999, 10)
+        assert excinfo.value.status_code == 404
+        assert "Influencer with ID 999 not found" in str(excinfo.value.detail)
+
+
+def test_get_influencer_data_version(mock_db_session):
+    """インフルエンサーのデータバージョン取得テスト"""
+    with patch(
+        "app.services.text_analysis_service.InfluencerPostRepository"
+    ) as mock_repository:
+        mock_repo_instance = mock_repository.return_value
+        mock_repo_instance.get_latest_update_time.return_value = datetime(2023, 1, 1)
+        assert get_influencer_data_version(mock_db_session, 1) == datetime(2023, 1, 1)
+        mock_repo_instance.get_latest_update_time.assert_called_once_with(1)
+
+        mock_repo_instance.get_latest_update_time.return_value = None
+        with pytest.raises(HTTPException) as excinfo:
+            get_influencer_data_version(mock_db_session, 999)
+        assert excinfo.value.status_code == 404
 
-    mock_db_session.query().filter().all.return_value = mock_posts
 
+@patch("app.services.text_analysis_service.extract_nouns")
+def test_build_post_noun_rows(mock_extract_nouns):
+    """投稿ごとの名詞出現回数レコード作成テスト"""
     mock_extract_nouns.side_effect = [
-        ["インスタグラム", "戦略"],
-        ["フォロワー", "獲得", "コツ"],
-        ["料理", "マーケティング"],
+        ["インスタグラム", "戦略", "インスタグラム"],
+        ["フォロワー"],
+    ]
+    posts = [
+        MagicMock(post_id=10, influencer_id=1, text="インスタグラム戦略のインスタグラム"),
+        MagicMock(post_id=11, influencer_id=1, text=""),
+        MagicMock(post_id=12, influencer_id=2, text="フォロワー"),
     ]
 
-    # テスト実行
-    result = get_influencer_keywords(mock_db_session, 1, 10)
-
-    # 結果の検証
-    assert len(result) > 0
-
-    # 単語ごとのカウント数を確認
-    word_counts = {item["word"]: item["count"] for item in result}
-    assert "インスタグラム" in word_counts, "インスタグラムがキーワードに含まれていません"
-    assert word_counts["インスタグラム"] == 1, f"インスタグラムのカウント数が1ではなく {word_counts.get('インスタグラム')} です"
-
-    # 他のキーワードも確認 - 実際に結果に含まれているキーワードだけをチェック
-    assert "戦略" in word_counts
-    assert "フォロワー" in word_counts
-    assert "獲得" in word_counts
-
-    if "マーケティング" in word_counts:
-        assert word_counts["マーケティング"] > 0
-    else:
-        print(f"次のキーワードはテスト結果に含まれています: {list(word_counts.keys())}")
-        print("'マーケティング'は含まれていませんが、テストを続行します")
-
-    # キャッシュからの取得を確認
-    mock_extract_nouns.reset_mock()
-    cached_result = get_influencer_keywords(mock_db_session, 1, 10)
-    assert cached_result == result
-    mock_extract_nouns.assert_not_called()
-
-    # 存在しないインフルエンサーの場合
-    mock_db_session.query().filter().all.return_value = []
-    with pytest.raises(HTTPException) as excinfo:
-        get_influencer_keywords(mock_db_session, 999, 10)
-    assert excinfo.value.status_code == 404
-    assert "Influencer with ID 999 not found" in str(excinfo.value.detail)
+    rows = build_post_noun_rows(posts)
+
+    # テキストが空の投稿は解析しない
+    assert mock_extract_nouns.call_count == 2
+    assert {
+        "post_id": 10,
+        "influencer_id": 1,
+        "word": "インスタグラム",
+        "count": 2,
+    } in rows
+    assert {"post_id": 10, "influencer_id": 1, "word": "戦略", "count": 1} in rows
+    assert {"post_id": 12, "influencer_id": 2, "word": "フォロワー", "count": 1} in rows
+    assert len(rows) == 3
+
+
+@patch("app.services.text_analysis_service.build_post_noun_rows")
+def test_store_post_nouns(mock_build_rows, mock_db_session):
+    """名詞出現回数の保存テスト（既存分の置き換え）"""
+    rows = [{"post_id": 10, "influencer_id": 1, "word": "戦略", "count": 1}]
+    mock_build_rows.return_value = rows
+    posts = [MagicMock(post_id=10, influencer_id=1, text="戦略")]
+
+    assert store_post_nouns(mock_db_session, posts) == 1
+
+    # 同じ投稿の既存レコードを削除してから挿入する
+    mock_db_session.query.return_value.filter.return_value.delete.assert_called_once()
+    mock_db_session.bulk_insert_mappings.assert_called_once()
+    assert mock_db_session.bulk_insert_mappings.call_args[0][1] == rows
+
+    # 投稿がない場合は何もしない
+    mock_db_session.reset_mock()
+    assert store_post_nouns(mock_db_session, []) == 0
+    mock_db_session.query.assert_not_called()
 
     # @patch("app.services.text_analysis_service.extract_nouns")
     # @patch("app.services.text_analysis_service.datetime")
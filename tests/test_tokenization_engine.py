@@ -0,0 +1,159 @@
+"""
+形態素解析エンジンのテスト
+"""
+import threading
+import time
+from unittest.mock import patch, MagicMock
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+
+from app.services.tokenization_engine import (
+    TokenizationEngine,
+    _init_worker,
+    get_engine,
+)
+
+
+class TestTokenizationEngine:
+    @patch("app.services.text_analysis_service.extract_nouns")
+    def test_below_threshold_runs_in_process(self, mock_extract_nouns):
+        """閾値未満の件数ではプロセスプールを起動しないテスト"""
+        mock_extract_nouns.side_effect = [["東京", "東京", "セミナー"], []]
+        engine = TokenizationEngine(max_workers=4, parallel_threshold=10)
+
+        with patch.object(engine, "_get_executor") as mock_get_executor:
+            result = engine.count_nouns_many(["東京のセミナー", "ああ"])
+
+        mock_get_executor.assert_not_called()
+        assert result == [{"東京": 2, "セミナー": 1}, {}]
+
+    def test_process_pool_preserves_order(self):
+        """プロセスプールでチャンク処理した結果が入力順に並ぶテスト"""
+        texts = [
+            "今日は東京でセミナーに参加しました。",
+            "大阪の料理が美味しい。",
+            "京都で写真を撮影しました。",
+        ]
+        engine = TokenizationEngine(max_workers=2, parallel_threshold=0, chunk_size=1)
+        try:
+            result = engine.count_nouns_many(texts)
+        finally:
+            engine.shutdown()
+
+        assert len(result) == 3
+        assert "東京" in result[0]
+        assert "料理" in result[1]
+        assert "写真" in result[2]
+
+    @patch("app.services.text_analysis_service.extract_nouns")
+    def test_broken_pool_falls_back(self, mock_extract_nouns):
+        """ワーカーが異常終了した場合に同一プロセスで処理し直すテスト"""
+        mock_extract_nouns.return_value = ["東京"]
+        engine = TokenizationEngine(max_workers=2, parallel_threshold=0)
+        mock_executor = MagicMock()
+        mock_executor.map.side_effect = BrokenProcessPool("worker died")
+        engine._executor = mock_executor
+
+        result = engine.count_nouns_many(["東京"])
+
+        assert result == [{"東京": 1}]
+        mock_executor.shutdown.assert_called_once()
+        assert engine._executor is None
+
+    @patch("app.services.text_analysis_service.extract_nouns")
+    def test_broken_pool_keeps_recreated_pool(self, mock_extract_nouns):
+        """他のスレッドが作り直したプールは停止せず、異常終了したプールだけを停止するテスト"""
+        mock_extract_nouns.return_value = ["東京"]
+        engine = TokenizationEngine(max_workers=2, parallel_threshold=0)
+        broken = MagicMock()
+        recreated = MagicMock()
+
+        def map_and_fail(*args):
+            engine._executor = recreated
+            raise BrokenProcessPool("worker died")
+
+        broken.map.side_effect = map_and_fail
+        engine._executor = broken
+
+        assert engine.count_nouns_many(["東京"]) == [{"東京": 1}]
+        broken.shutdown.assert_called_once()
+        recreated.shutdown.assert_not_called()
+        assert engine._executor is recreated
+
+    @patch("app.services.text_analysis_service.extract_nouns")
+    def test_cancelled_falls_back(self, mock_extract_nouns):
+        """プールの停止で処理が取り消された場合も同一プロセスで処理し直すテスト"""
+        mock_extract_nouns.return_value = ["東京"]
+        engine = TokenizationEngine(max_workers=2, parallel_threshold=0)
+        mock_executor = MagicMock()
+        mock_executor.map.side_effect = CancelledError()
+        engine._executor = mock_executor
+
+        assert engine.count_nouns_many(["東京"]) == [{"東京": 1}]
+        assert engine._executor is None
+
+    @patch("app.services.tokenization_engine.ProcessPoolExecutor")
+    def test_concurrent_get_executor(self, mock_pool):
+        """複数スレッドから同時に呼び出してもプロセスプールは1つだけ起動するテスト"""
+
+        def slow_pool(**kwargs):
+            time.sleep(0.05)
+            return MagicMock()
+
+        mock_pool.side_effect = slow_pool
+        engine = TokenizationEngine(max_workers=2)
+        executors = []
+        threads = [
+            threading.Thread(target=lambda: executors.append(engine._get_executor()))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_pool.assert_called_once()
+        assert all(executor is executors[0] for executor in executors)
+
+        engine.shutdown()
+        executors[0].shutdown.assert_called_once()
+        engine.shutdown()
+        assert engine._executor is None
+
+    @patch("app.services.tokenization_engine._engine", None)
+    def test_get_engine_singleton(self):
+        """エンジンがシングルトンとして使い回されるテスト"""
+        assert get_engine() is get_engine()
+
+    @patch("app.services.tokenization_engine._engine", None)
+    @patch("app.services.tokenization_engine.atexit.register")
+    @patch("app.services.tokenization_engine.TokenizationEngine")
+    def test_get_engine_concurrent(self, mock_engine, mock_register):
+        """複数スレッドから同時に呼び出してもエンジンは1つだけ作成されるテスト"""
+
+        def slow_engine():
+            time.sleep(0.05)
+            return MagicMock()
+
+        mock_engine.side_effect = slow_engine
+        engines = []
+        threads = [
+            threading.Thread(target=lambda: engines.append(get_engine()))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_engine.assert_called_once()
+        mock_register.assert_called_once()
+        assert all(engine is engines[0] for engine in engines)
+
+
+@patch("app.services.text_analysis_service.warm_up_tokenizer")
+def test_init_worker_warms_up(mock_warm_up):
+    """ワーカープロセスの初期化時に辞書を読み込ませるテスト"""
+    _init_worker()
+
+    mock_warm_up.assert_called_once_with()
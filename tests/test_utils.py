@@ -0,0 +1,211 @@
+"""
+ルーター共通ユーティリティ（条件付きGET・高速レスポンスモード）のテスト
+"""
+from datetime import datetime, timezone
+from typing import List
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+
+from app.dependencies.utils import (
+    _accepts_gzip,
+    build_etag,
+    cache_response,
+    format_http_date,
+    get_cached_response,
+    is_not_modified,
+    json_response,
+    set_cache_headers,
+)
+from app.models.schemas import KeywordCount
+
+
+def make_request(headers):
+    """ヘッダーのみを持つリクエストのモック"""
+    request = MagicMock()
+    request.headers = headers
+    return request
+
+
+class TestConditionalGet:
+    def test_build_etag(self):
+        """ETagが値に応じて変わり、同じ値では一致するテスト"""
+        version = datetime(2023, 1, 1)
+        assert build_etag("a", 1, version) == build_etag("a", 1, version)
+        assert build_etag("a", 1, version) != build_etag("a", 2, version)
+        assert build_etag("a", 1).startswith('"')
+
+    def test_format_http_date(self):
+        """タイムゾーンなしの日時をUTCとしてHTTP日付に変換するテスト"""
+        assert (
+            format_http_date(datetime(2023, 1, 1, 12, 0, 0, 123456))
+            == "Sun, 01 Jan 2023 12:00:00 GMT"
+        )
+        aware = datetime(2023, 1, 1, 21, 0, 0, tzinfo=timezone.utc)
+        assert format_http_date(aware) == "Sun, 01 Jan 2023 21:00:00 GMT"
+
+    def test_if_none_match(self):
+        """If-None-Match の一致判定テスト（弱いETag・複数指定・*）"""
+        etag = '"abc"'
+        assert is_not_modified(make_request({"if-none-match": '"abc"'}), etag)
+        assert is_not_modified(make_request({"if-none-match": 'W/"abc"'}), etag)
+        assert is_not_modified(make_request({"if-none-match": '"x", "abc"'}), etag)
+        assert is_not_modified(make_request({"if-none-match": "*"}), etag)
+        assert not is_not_modified(make_request({"if-none-match": '"x"'}), etag)
+
+    def test_if_modified_since(self):
+        """If-Modified-Since の比較テスト（秒未満は無視）"""
+        version = datetime(2023, 1, 1, 12, 0, 0, 500000)
+        same = make_request({"if-modified-since": "Sun, 01 Jan 2023 12:00:00 GMT"})
+        older = make_request({"if-modified-since": "Sun, 01 Jan 2023 11:59:59 GMT"})
+        invalid = make_request({"if-modified-since": "invalid"})
+
+        assert is_not_modified(same, '"abc"', version)
+        assert not is_not_modified(older, '"abc"', version)
+        assert not is_not_modified(invalid, '"abc"', version)
+        assert not is_not_modified(same, '"abc"', None)
+        assert not is_not_modified(make_request({}), '"abc"', version)
+
+    def test_if_none_match_takes_precedence(self):
+        """If-None-Match がある場合は If-Modified-Since を無視するテスト"""
+        request = make_request(
+            {
+                "if-none-match": '"other"',
+                "if-modified-since": "Sun, 01 Jan 2023 12:00:00 GMT",
+            }
+        )
+        assert not is_not_modified(request, '"abc"', datetime(2023, 1, 1, 12))
+
+
+class TestJsonResponse:
+    def test_standard_mode(self):
+        """通常モードでは内容をそのまま返し、FastAPIに検証させるテスト"""
+        content = [{"influencer_id": 1, "avg_value": 1.5}]
+
+        assert json_response(Response(), content) is content
+
+    @patch("app.dependencies.utils.FAST_JSON_RESPONSE", True)
+    def test_fast_mode(self):
+        """高速モードではorjsonでシリアライズし、設定済みのヘッダーを引き継ぐテスト"""
+        response = Response()
+        del response.headers["content-length"]
+        response.headers["ETag"] = '"abc"'
+
+        result = json_response(response, [{"word": "カフェ", "count": 3}])
+
+        assert isinstance(result, ORJSONResponse)
+        assert result.body == '[{"word":"カフェ","count":3}]'.encode("utf-8")
+        assert result.headers["etag"] == '"abc"'
+        assert result.headers["content-type"] == "application/json"
+
+
+@pytest.fixture
+def cached_app():
+    """レスポンスキャッシュを使うエンドポイントだけを持つアプリケーション"""
+    app = FastAPI()
+    calls = []
+
+    @app.get("/words", response_model=List[KeywordCount])
+    def words(request: Request, response: Response, count: int = 1):
+        etag = build_etag("words", count)
+        cached = get_cached_response(request, etag)
+        if cached is not None:
+            return cached
+        calls.append(count)
+        set_cache_headers(response, etag)
+        content = [{"word": f"語{i}", "count": i} for i in range(count)]
+        return cache_response(request, response, etag, content)
+
+    with TestClient(app) as client:
+        yield client, calls
+
+
+class TestResponseCache:
+    def test_cache_hit(self, cached_app):
+        """2回目以降はキャッシュしたボディとヘッダーを返すテスト"""
+        client, calls = cached_app
+
+        first = client.get("/words?count=2")
+        second = client.get("/words?count=2")
+
+        assert calls == [2]
+        assert second.content == first.content
+        assert second.json() == [{"word": "語0", "count": 0}, {"word": "語1", "count": 1}]
+        assert second.headers["etag"] == first.headers["etag"]
+        assert second.headers["cache-control"] == "no-cache"
+        # 小さいボディは圧縮しない
+        assert "content-encoding" not in second.headers
+
+    @patch("app.dependencies.utils.RESPONSE_CACHE_GZIP_MIN_BYTES", 10)
+    def test_gzip(self, cached_app):
+        """一定以上のボディはgzip圧縮したボディもキャッシュし、受け付けるクライアントに返すテスト"""
+        client, _ = cached_app
+
+        response = client.get("/words?count=3", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert len(response.json()) == 3
+
+        response = client.get("/words?count=3", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert len(response.json()) == 3
+
+    @patch("app.dependencies.utils.FAST_JSON_RESPONSE", True)
+    def test_fast_json_response(self, cached_app):
+        """高速レスポンスモードではorjsonでエンコードしてキャッシュするテスト"""
+        client, _ = cached_app
+
+        response = client.get("/words?count=1")
+
+        assert response.content == '[{"word":"語0","count":0}]'.encode("utf-8")
+
+    @patch("app.dependencies.utils.RESPONSE_CACHE", False)
+    def test_disabled(self, cached_app):
+        """無効な場合はキャッシュせず、毎回レスポンスを組み立てるテスト"""
+        client, calls = cached_app
+
+        client.get("/words?count=1")
+        response = client.get("/words?count=1")
+
+        assert calls == [1, 1]
+        assert response.json() == [{"word": "語0", "count": 0}]
+
+    def test_validation_error(self):
+        """内容が response_model に一致しない場合は検証エラーになるテスト"""
+        app = FastAPI()
+
+        @app.get("/invalid", response_model=List[KeywordCount])
+        def invalid(request: Request, response: Response):
+            return cache_response(request, response, '"x"', [{"word": "語"}])
+
+        with TestClient(app, raise_server_exceptions=True) as client:
+            with pytest.raises(ResponseValidationError):
+                client.get("/invalid")
+
+    @pytest.mark.parametrize(
+        "header, expected",
+        [
+            ("gzip", True),
+            ("deflate, gzip;q=0.5", True),
+            ("*", True),
+            ("gzip;q=0", False),
+            ("gzip;q=invalid", False),
+            ("GZIP; Q=0.8", True),
+            # gzipの明示的な拒否は順序に関係なく * より優先する
+            ("*, gzip;q=0", False),
+            ("gzip;q=0, *", False),
+            ("*;q=0, gzip", True),
+            ("*;q=0", False),
+            ("gzip;level=1;q=0", False),
+            ("br, deflate", False),
+            ("", False),
+        ],
+    )
+    def test_accepts_gzip(self, header, expected):
+        """Accept-Encoding ヘッダーからgzipを受け付けるか判定するテスト"""
+        assert _accepts_gzip(make_request({"accept-encoding": header})) is expected